@@ -0,0 +1,124 @@
+'''
+Compare the line diffs of `diff_lines` with `git diff --histogram`, and time both.
+
+For each file modified by the most recent commits of a repository, the
+hunks from `diff_lines` are checked against those of
+`git diff --histogram` for the same pair of blobs. The time to
+diff each commit is then reported for both: for xgit, with the blobs
+already read, and for git, as `git log -p --histogram` takes to print
+the same commits.
+
+Usage:
+    python benchmarks/blob_diff.py [--repository PATH] [--commits N]
+'''
+
+from argparse import ArgumentParser
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from xontrib.xgit.line_diff import diff_lines
+
+
+def git(path: Path, *args: str, input: bytes|None = None) -> bytes:
+    return subprocess.run(['git', *args], cwd=path, check=True, input=input,
+                          capture_output=True).stdout
+
+
+def modified_blobs(path: Path, commits: int
+                   ) -> list[tuple[str, list[tuple[str, str]]]]:
+    '''
+    The most recent non-merge commits, each with the `(old, new)` blob ids
+    of the files it modifies.
+    '''
+    out = git(path, 'log', '--no-merges', '--no-renames', '--raw', '--no-abbrev',
+              '--format=%x00%H', f'-n{commits}', '--diff-filter=M')
+    result = []
+    for record in out.decode().split('\0')[1:]:
+        commit, *lines = record.strip().splitlines()
+        # Each file is `:mode mode old new status\tpath`.
+        files = [line.split('\t', 1)[0].split() for line in lines
+                 if line.startswith(':')]
+        pairs = [(f[2], f[3]) for f in files if f[1] in ('100644', '100755')]
+        if pairs:
+            result.append((commit, pairs))
+    return result
+
+
+def read_blobs(path: Path, ids: set[str]) -> dict[str, bytes]:
+    out = git(path, 'cat-file', '--batch',
+              input=''.join(f'{id}\n' for id in ids).encode())
+    blobs = {}
+    pos = 0
+    while pos < len(out):
+        end = out.index(b'\n', pos)
+        id, _, size = out[pos:end].decode().split()
+        start = end + 1
+        blobs[id] = out[start:start + int(size)]
+        pos = start + int(size) + 1
+    return blobs
+
+
+def git_hunks(path: Path, old: str, new: str) -> str:
+    out = git(path, 'diff', '--histogram', '--no-color', '--no-ext-diff',
+              old, new).decode(errors='replace')
+    if out.startswith('Binary files') or '\nBinary files' in out:
+        return 'Binary files differ'
+    return out.split('\n+++ ', 1)[1].split('\n', 1)[1].rstrip('\n')
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repository', type=Path,
+                        default=Path(__file__).parent.parent)
+    parser.add_argument('--commits', type=int, default=500)
+    args = parser.parse_args()
+    path = args.repository
+
+    commits = modified_blobs(path, args.commits)
+    blobs = read_blobs(path, {id for _, pairs in commits
+                              for pair in pairs for id in pair})
+    pairs = sum(len(p) for _, p in commits)
+    lines = sum(b.count(b'\n') for b in blobs.values())
+    print(f'{len(commits)} commits, {pairs} modified files, '
+          f'{len(blobs)} blobs of {lines} lines in all')
+
+    mismatched = 0
+    for _, p in commits:
+        for old, new in p:
+            ours = '\n'.join(map(str, diff_lines(blobs[old], blobs[new])))
+            if ours != git_hunks(path, old, new):
+                mismatched += 1
+                if mismatched <= 5:
+                    print(f'  differs from git: {old[:10]} {new[:10]}')
+    print(f'{pairs - mismatched} of {pairs} files match git diff --histogram')
+
+    times = []
+    for _, p in commits:
+        start = time.perf_counter()
+        for old, new in p:
+            for _ in diff_lines(blobs[old], blobs[new]):
+                pass
+        times.append(time.perf_counter() - start)
+    times.sort()
+    total = sum(times)
+    print(f'xgit: {total * 1000:8.1f} ms in all, per commit: '
+          f'median {statistics.median(times) * 1000:.2f} ms, '
+          f'90% {times[int(len(times) * 0.9)] * 1000:.2f} ms, '
+          f'max {times[-1] * 1000:.2f} ms')
+
+    start = time.perf_counter()
+    git(path, 'log', '-p', '--histogram', '--no-merges', '--no-renames',
+        '--format=%H', f'-n{args.commits}', '--diff-filter=M')
+    elapsed = time.perf_counter() - start
+    print(f'git:  {elapsed * 1000:8.1f} ms in all, '
+          f'{elapsed * 1000 / len(commits):.2f} ms per commit on average, '
+          'including reading the objects')
+
+
+if __name__ == '__main__':
+    main()
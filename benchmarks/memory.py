@@ -0,0 +1,119 @@
+'''
+Measure the memory used by loaded commits, tree entries and people.
+
+Builds a scratch repository with `git fast-import`, then loads its
+contents through xgit and reports the bytes allocated per item, as seen
+by `tracemalloc`.
+
+Usage:
+    python benchmarks/memory.py [--commits N] [--entries N] [--people N]
+'''
+
+from argparse import ArgumentParser
+import gc
+from pathlib import Path
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def make_repository(path: Path, commits: int, entries: int, people: int):
+    '''
+    Create a repository with a linear history of `commits` commits, by
+    `people` different authors, and a root tree of `entries` files.
+    '''
+    subprocess.run(['git', 'init', '-q', '-b', 'main', str(path)], check=True)
+    script: list[str] = [
+        'blob', 'mark :1', 'data 6', 'hello', '',
+    ]
+    for i in range(commits):
+        who = f'Person {i % people} <person{i % people}@example.com>'
+        when = f'{1700000000 + i * 60} +0000'
+        message = f'Commit {i}'
+        script += [
+            'commit refs/heads/main',
+            f'author {who} {when}',
+            f'committer {who} {when}',
+            f'data {len(message)}', message,
+        ]
+        if i == 0:
+            script += [f'M 100644 :1 file{n}.txt' for n in range(entries)]
+        script += [f'M 100644 :1 changed{i % 10}.txt', '']
+    subprocess.run(['git', 'fast-import', '--quiet'], cwd=path, check=True,
+                   input='\n'.join(script).encode())
+
+
+def measure(label: str, count: int, fn):
+    '''
+    Run `fn`, keeping its result alive, and report the bytes allocated
+    per item.
+    '''
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    result = fn()
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{label:>8s}: {(after - before) / count:8.0f} bytes each ({count} items)')
+    return result
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--commits', type=int, default=5000)
+    parser.add_argument('--entries', type=int, default=20000)
+    parser.add_argument('--people', type=int, default=5000)
+    args = parser.parse_args()
+
+    from xonsh.main import setup
+    setup()
+    from xonsh.built_ins import XSH
+    from xontrib.xgit.context import _GitContext
+    from xontrib.xgit.person import Person
+
+    with TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'repo'
+        make_repository(path, args.commits, args.entries, args.people)
+        context = _GitContext(XSH)
+        XSH.env['XGIT'] = context
+        repository = context.open_repository(path / '.git')
+        # Measure only what `measure` keeps alive, not the recently-used cache.
+        repository.objects.capacity = 0
+        head = repository.rev_parse('refs/heads/main')
+        ids = subprocess.run(['git', 'rev-list', head], cwd=path, check=True,
+                             capture_output=True, text=True).stdout.split()
+        root = subprocess.run(['git', 'rev-parse', f'{ids[-1]}^{{tree}}'],
+                              cwd=path, check=True, capture_output=True,
+                              text=True).stdout.strip()
+
+        def load_commits():
+            commits = [repository.get_object(id, 'commit') for id in ids]
+            for c in commits:
+                _ = c.message, c.author.person.name, c.committer.date
+            return commits
+
+        def load_entries():
+            tree = repository.get_object(root, 'tree')
+            return tree, list(tree.values())
+
+        def load_people():
+            people = [Person(f'Someone {i} <someone{i}@example.com>')
+                      for i in range(args.people)]
+            for p in people:
+                _ = p.name
+            return people
+
+        kept = [
+            measure('commit', len(ids), load_commits),
+            measure('entry', args.entries, load_entries),
+            measure('person', args.people, load_people),
+        ]
+        del kept
+
+
+if __name__ == '__main__':
+    main()
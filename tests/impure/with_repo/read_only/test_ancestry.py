@@ -0,0 +1,50 @@
+'''
+Tests of history walking.
+'''
+
+def test_ancestors(f_repo):
+    '''
+    Test walking the history of a commit.
+    '''
+    repo = f_repo.repository
+    meta = f_repo.metadata
+    commit = repo.get_object(meta.ids.commit, 'commit')
+    assert [c.hash for c in commit.ancestors()] == [meta.ids.commit]
+    assert [c.hash for c in commit.ancestors(order='topo')] == [meta.ids.commit]
+    assert list(commit.ancestors(limit=0)) == []
+
+
+def test_merge_base(f_repo):
+    '''
+    Test merge bases and ancestry of a commit with itself.
+    '''
+    repo = f_repo.repository
+    meta = f_repo.metadata
+    commit = repo.get_object(meta.ids.commit, 'commit')
+    base = commit.merge_base(meta.ids.commit)
+    assert base is not None
+    assert base.hash == meta.ids.commit
+    assert commit.is_ancestor(commit)
+
+
+def test_ahead_behind(f_repo):
+    '''
+    Test ahead/behind counts for a ref.
+    '''
+    repo = f_repo.repository
+    head = repo.get_ref('refs/heads/main')
+    assert head.ahead_behind(head) == (0, 0)
+
+
+def test_commits(f_repo):
+    '''
+    Test listing commits in bulk.
+    '''
+    repo = f_repo.repository
+    meta = f_repo.metadata
+    commits = list(repo.commits(meta.ids.commit))
+    assert [c.hash for c in commits] == [meta.ids.commit]
+    commit = repo.get_object(meta.ids.commit, 'commit')
+    assert commits[0] is commit
+    assert commits[0].tree.hash == commit.tree.hash
+    assert list(repo.commits(meta.ids.commit, limit=0)) == []
@@ -0,0 +1,79 @@
+'''
+Tests of the `git cat-file` coprocess.
+'''
+
+from pytest import raises
+
+def test_cat_file_blob(f_repo):
+    '''
+    Test reading a blob through the coprocess.
+    '''
+    repo = f_repo.repository
+    meta = f_repo.metadata
+    type, data = repo.cat_file(meta.ids.blob)
+    assert type == 'blob'
+    assert data == b''
+
+
+def test_cat_file_check(f_repo):
+    '''
+    Test getting the type and size of objects through the coprocess.
+    '''
+    repo = f_repo.repository
+    meta = f_repo.metadata
+    assert repo.cat_file_check(meta.ids.commit)[0] == 'commit'
+    assert repo.cat_file_check(meta.ids.tree)[0] == 'tree'
+    assert repo.cat_file_check(meta.ids.blob) == ('blob', 0)
+
+
+def test_cat_file_commit(f_repo):
+    '''
+    Test that commit objects are loaded through the coprocess.
+    '''
+    repo = f_repo.repository
+    meta = f_repo.metadata
+    commit = repo.get_object(meta.ids.commit, 'commit')
+    assert commit.tree.hash == meta.ids.tree
+    assert commit.parents == []
+
+
+def test_cat_file_missing(f_repo):
+    '''
+    Test that a missing object raises `ObjectNotFoundError`,
+    and the coprocess keeps working afterwards.
+    '''
+    from xontrib.xgit.types import ObjectNotFoundError
+    repo = f_repo.repository
+    meta = f_repo.metadata
+    with raises(ObjectNotFoundError):
+        repo.cat_file('0' * 40)
+    assert repo.cat_file(meta.ids.blob) == ('blob', b'')
+
+
+def test_cat_file_native(f_repo, monkeypatch):
+    '''
+    Test that the native backend returns the same results as `git cat-file`.
+    '''
+    from xonsh.built_ins import XSH
+    repo = f_repo.repository
+    meta = f_repo.metadata
+    ids = [meta.ids.commit, meta.ids.tree, meta.ids.blob]
+    expected = [repo.cat_file(id) for id in ids]
+    monkeypatch.setitem(XSH.env, 'XGIT_OBJECT_BACKEND', 'native')
+    assert [repo.cat_file(id) for id in ids] == expected
+    assert [repo.cat_file_check(id) for id in ids] == [
+        (type, len(data)) for type, data in expected
+    ]
+    assert [(t, d) for _, t, d in repo.cat_file_many(ids)] == expected
+
+
+def test_get_object_interned(f_repo):
+    '''
+    Test that `get_object` returns the same instance for the same id.
+    '''
+    repo = f_repo.repository
+    meta = f_repo.metadata
+    commit = repo.get_object(meta.ids.commit, 'commit')
+    assert repo.get_object(meta.ids.commit) is commit
+    assert repo.get_object(meta.ids.tree, 'tree') is commit.tree
+    assert repo.objects.stats.hits >= 2
@@ -0,0 +1,32 @@
+'''
+Tests of commit lookups via the commit-graph.
+'''
+
+def test_commit_graph_info(f_repo, f_git):
+    '''
+    Test that the commit-graph agrees with the commit itself.
+    '''
+    repo = f_repo.repository
+    meta = f_repo.metadata
+    f_git('commit-graph', 'write', '--reachable', cwd=f_repo.repository_path)
+    info = repo.commit_info(meta.ids.commit)
+    assert info is not None
+    assert info.tree == meta.ids.tree
+    assert info.parents == ()
+    commit = repo.get_object(meta.ids.commit, 'commit')
+    assert commit.tree.hash == meta.ids.tree
+    assert commit.parents == []
+    assert commit.generation == info.generation
+    assert commit.commit_time == int(commit.committer.date.timestamp())
+
+
+def test_commit_graph_missing(f_repo):
+    '''
+    Test that commits not in the commit-graph are read from the commit.
+    '''
+    repo = f_repo.repository
+    meta = f_repo.metadata
+    commit = repo.get_object(meta.ids.commit, 'commit')
+    if repo.commit_info(meta.ids.commit) is None:
+        assert commit.generation is None
+    assert commit.tree.hash == meta.ids.tree
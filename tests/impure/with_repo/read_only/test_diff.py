@@ -0,0 +1,46 @@
+'''
+Tests of comparing trees.
+'''
+
+from pathlib import PurePosixPath
+
+from xontrib.xgit.diff import diff_trees
+
+def test_diff_same_tree(f_repo):
+    '''
+    Test that a tree has no changes from itself.
+    '''
+    repo = f_repo.repository
+    meta = f_repo.metadata
+    tree = repo.get_object(meta.ids.tree, 'tree')
+    assert list(diff_trees(tree, tree)) == []
+
+def test_diff_from_empty(f_repo):
+    '''
+    Test that every file is added, compared with no tree.
+    '''
+    repo = f_repo.repository
+    meta = f_repo.metadata
+    commit = repo.get_object(meta.ids.commit, 'commit')
+    changes = list(diff_trees(None, commit))
+    assert all(c.status == 'A' and c.old is None for c in changes)
+    assert PurePosixPath('foo') in [c.path for c in changes]
+    assert [(c.status, c.path) for c in diff_trees(commit, None)] == [
+        ('D', c.path) for c in changes
+    ]
+
+def test_diff_lines_from_empty(f_repo):
+    '''
+    Test that an added file's lines are all added, and that a blob has no
+    changes from itself.
+    '''
+    repo = f_repo.repository
+    meta = f_repo.metadata
+    commit = repo.get_object(meta.ids.commit, 'commit')
+    change = next(c for c in diff_trees(None, commit)
+                  if c.path == PurePosixPath('foo'))
+    blob = change.new.object
+    hunks = list(change.hunks())
+    assert all(line.startswith(('+', '\\')) for h in hunks for line in h.lines)
+    assert change.patch().startswith('--- /dev/null\n+++ b/foo\n')
+    assert list(blob.diff(blob)) == []
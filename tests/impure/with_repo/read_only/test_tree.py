@@ -48,4 +48,162 @@ def test_tree_entry_get(f_repo):
     entry = tree['.']
     entry = entry['foo']
     assert entry.name == 'foo'
-    assert entry.path == PurePosixPath('./foo')
\ No newline at end of file
+    assert entry.path == PurePosixPath('./foo')
+
+def test_tree_prefetch(f_repo):
+    '''
+    Test loading the sizes of a tree's entries in one batch.
+    '''
+    repo = f_repo.repository
+    meta = f_repo.metadata
+    info = repo.prefetch([meta.ids.blob, meta.ids.commit])
+    assert info[meta.ids.blob] == ('blob', 0)
+    assert info[meta.ids.commit][0] == 'commit'
+    tree = repo.get_object(meta.ids.tree, 'tree')
+    assert tree.prefetch() is tree
+    assert tree['foo'].size == 0
+
+def test_tree_mapping(f_repo):
+    '''
+    Test the mapping API of a tree, whose entries are created on access.
+    '''
+    repo = f_repo.repository
+    meta = f_repo.metadata
+    tree = repo.get_object(meta.ids.tree, 'tree')
+    keys = list(tree)
+    assert keys[0] == '.'
+    assert 'foo' in keys
+    assert len(tree) == len(keys)
+    assert tree['foo'] is tree['foo']
+    assert dict(tree.items())['foo'] is tree['foo']
+    assert tree['foo'] in tree.hashes[tree['foo'].hash]
+
+def test_tree_walk(f_repo):
+    '''
+    Test walking a tree, and finding entries by pattern.
+    '''
+    repo = f_repo.repository
+    meta = f_repo.metadata
+    tree = repo.get_object(meta.ids.tree, 'tree')
+    path, _dirs, files = next(tree.walk())
+    assert path == PurePosixPath()
+    assert 'foo' in files
+    assert [e.name for e in tree.rglob('foo')] == ['foo']
+    assert next(iter(tree.walk(filter=lambda p, t: t == 'tree')))[2] == []
+
+def test_tree_path_index(f_repo):
+    '''
+    Test that looking up a path again returns the same entry.
+    '''
+    repo = f_repo.repository
+    meta = f_repo.metadata
+    tree = repo.get_object(meta.ids.tree, 'tree')
+    assert tree.get('./foo') is tree.get('foo')
+    root = tree['.']
+    assert root['foo'] is root['./foo']
+    assert root['foo'].path == PurePosixPath('foo')
+    assert root.get('foo/bar') is None
+
+def test_tree_nested_get(f_XGIT, f_git, f_testdir, f_gitconfig):
+    '''
+    Test that entries looked up by a path of several names have that
+    path, and the entry of their directory as their parent.
+    '''
+    path = f_testdir / 'nested'
+    (path / 'd1' / 'sub1').mkdir(parents=True)
+    (path / 'd2' / 'sub1').mkdir(parents=True)
+    # The same subtree under two directories.
+    for d in ('d1', 'd2'):
+        (path / d / 'sub1' / 'file 1.txt').write_text('same\n')
+    f_git('init', '-q', cwd=path)
+    f_git('add', '-A', cwd=path)
+    f_git('commit', '-q', '-m', 'nested', cwd=path)
+    repo = f_XGIT.open_repository(path / '.git')
+    tree = repo.get_object(f_git('rev-parse', 'HEAD^{tree}', cwd=path), 'tree')
+    entry = tree.get('d1/sub1/file 1.txt')
+    assert entry.path == PurePosixPath('d1/sub1/file 1.txt')
+    assert entry.parent is tree.get('d1/sub1')
+    assert tree.get('d1/sub1').path == PurePosixPath('d1/sub1')
+    assert tree.get('d1/sub1').parent is tree['d1']
+    other = tree.get('d2/sub1/file 1.txt')
+    assert other.path == PurePosixPath('d2/sub1/file 1.txt')
+    assert other.hash == entry.hash
+    assert tree['d1/sub1/file 1.txt'] is entry
+    assert tree.get('d1/sub1/missing') is None
+    assert tree.get('d1/sub1/file 1.txt/x') is None
+
+def test_tree_prefetch_existing_blobs(f_XGIT, f_git, f_testdir, f_gitconfig,
+                                      monkeypatch):
+    '''
+    Test that prefetching a tree whose blobs already exist, without their
+    sizes, looks the sizes up in one batch.
+    '''
+    from xontrib.xgit.repository import _GitRepository
+    path = f_testdir / 'prefetch'
+    path.mkdir()
+    for i in range(6):
+        (path / f'file{i}').write_text(f'{i}\n' * (i + 1))
+    f_git('init', '-q', cwd=path)
+    f_git('add', '-A', cwd=path)
+    f_git('commit', '-q', '-m', 'files', cwd=path)
+    repo = f_XGIT.open_repository(path / '.git')
+    tree = repo.get_object(f_git('rev-parse', 'HEAD^{tree}', cwd=path), 'tree')
+    ids = f_git('ls-tree', '--object-only', 'HEAD', cwd=path).split()
+    blobs = [repo.get_object(id, 'blob') for id in ids]
+    checks = []
+    check = _GitRepository.cat_file_check
+    monkeypatch.setattr(_GitRepository, 'cat_file_check',
+                        lambda self, name: checks.append(name) or check(self, name))
+    tree.prefetch()
+    assert checks == []
+    assert [b.size for b in blobs] == [2 * (i + 1) for i in range(6)]
+    assert checks == []
+
+
+def test_large_blob_read_once(f_XGIT, f_git, f_testdir, f_gitconfig, monkeypatch):
+    '''
+    Test that a blob too large for the blob cache is read once, however
+    its lines are looked up.
+    '''
+    import xontrib.xgit.objects as xo
+    path = f_testdir / 'large'
+    path.mkdir()
+    f_git('init', '-q', cwd=path)
+    text = ''.join(f'line {i}\n' for i in range(10_000))
+    id = f_git('hash-object', '-w', '--stdin', cwd=path, input=text)
+    repo = f_XGIT.open_repository(path / '.git')
+    repo.blob_cache.limit = 1024
+    reads = []
+    read = xo._read_object
+    monkeypatch.setattr(xo, '_read_object',
+                        lambda *args: reads.append(args[1]) or read(*args))
+    blob = repo.get_object(id, 'blob')
+    assert blob.line(1) == 'line 0'
+    assert blob.line(5000) == 'line 4999'
+    assert blob.lines[9998:] == ['line 9998', 'line 9999']
+    with blob.reader() as reader:
+        assert reader.read(7) == b'line 0\n'
+    assert blob.stream.readline() == 'line 0\n'
+    assert reads == [id]
+
+
+def test_prefetch_info_bounded(f_XGIT, f_git, f_testdir, f_gitconfig, monkeypatch):
+    '''
+    Test that the types and sizes found by `prefetch`, and the blobs
+    classified by `text_info`, are kept only for the most recent objects.
+    '''
+    import xontrib.xgit.repository as xr
+    monkeypatch.setattr(xr, 'OBJECT_INFO_SIZE', 3)
+    path = f_testdir / 'bounded'
+    path.mkdir()
+    f_git('init', '-q', cwd=path)
+    ids = [f_git('hash-object', '-w', '--stdin', cwd=path, input=f'{i}\n' * (i + 1))
+           for i in range(6)]
+    repo = f_XGIT.open_repository(path / '.git')
+    assert len(repo.prefetch(ids)) == 6
+    info = repo._GitRepository__object_info  # type: ignore
+    assert len(info) == 3
+    assert [id in info for id in ids] == [False] * 3 + [True] * 3
+    assert [repo.get_object(id).size for id in ids] == [2 * (i + 1) for i in range(6)]
+    assert len(repo.text_info(ids)) == 6
+    assert len(repo._GitRepository__text_info) == 3  # type: ignore
@@ -0,0 +1,42 @@
+'''
+Tests of the `git cat-file` coprocess being interrupted.
+'''
+
+from shutil import which
+from pathlib import Path
+
+from pytest import raises
+
+from xontrib.xgit.cat_file import _CatFileProcess
+
+
+def test_cat_file_interrupted(f_git, f_testdir, monkeypatch):
+    '''
+    Test that a request interrupted partway through a reply does not
+    leave the rest of the reply to be read as the next one.
+    '''
+    path = f_testdir / 'interrupted'
+    path.mkdir()
+    f_git('init', '-q', cwd=path)
+    big = f_git('hash-object', '-w', '--stdin', cwd=path, input='x' * 100_000)
+    small = f_git('hash-object', '-w', '--stdin', cwd=path, input='small\n')
+    process = _CatFileProcess(Path(which('git') or 'git'), path)
+    read_reply = _CatFileProcess._CatFileProcess__read_reply  # type: ignore
+
+    def interrupted(self, stdout, name):
+        stdout.readline()
+        raise KeyboardInterrupt
+
+    try:
+        for request in (lambda: process.request(big),
+                        lambda: list(process.request_many((big, small)))):
+            monkeypatch.setattr(_CatFileProcess, '_CatFileProcess__read_reply',
+                                interrupted)
+            with raises(KeyboardInterrupt):
+                request()
+            monkeypatch.setattr(_CatFileProcess, '_CatFileProcess__read_reply',
+                                read_reply)
+            assert process.request(small) == ('blob', 6, b'small\n')
+            assert process.request(big) == ('blob', 100_000, b'x' * 100_000)
+    finally:
+        process.close()
@@ -0,0 +1,69 @@
+'''
+Tests of reading objects through the persistent cache.
+'''
+
+import pytest
+from xonsh.built_ins import XSH
+
+
+@pytest.fixture(params=['native', 'git'])
+def f_cached_repo(request, f_XGIT, f_git, f_testdir, f_gitconfig, monkeypatch):
+    '''
+    A repository with a few commits, read with a disk cache in a
+    temporary directory, with each object backend.
+    '''
+    env = XSH.env
+    monkeypatch.setitem(env, 'XGIT_DISK_CACHE_MB', '16')
+    monkeypatch.setitem(env, 'XDG_CACHE_HOME', str(f_testdir / 'cache'))
+    monkeypatch.setitem(env, 'XGIT_OBJECT_BACKEND', request.param)
+    path = f_testdir / 'cached'
+    path.mkdir()
+    f_git('init', '-q', cwd=path)
+    for i in range(3):
+        (path / 'file').write_text(f'version {i}\n')
+        f_git('add', 'file', cwd=path)
+        f_git('commit', '-q', '-m', f'commit {i}', cwd=path)
+    objects = f_git('rev-list', '--objects', '--no-object-names', 'HEAD',
+                    cwd=path).split()
+    repository = f_XGIT.open_repository(path / '.git')
+    assert repository.disk_cache is not None
+    return repository, path, objects
+
+
+def test_check_then_read(f_cached_repo, f_git):
+    '''
+    Test that contents are cached for objects first seen by a check.
+    '''
+    repository, path, objects = f_cached_repo
+    disk = repository.disk_cache
+    commit = objects[0]
+    assert repository.cat_file_check(commit)[0] == 'commit'
+    disk.flush()
+    assert disk.get(commit).data is None
+    type, data = repository.cat_file(commit)
+    assert type == 'commit'
+    disk.flush()
+    assert disk.get(commit).data == data
+    tree = f_git('rev-parse', 'HEAD^{tree}', cwd=path)
+    list(repository.cat_file_check_many([tree]))
+    disk.flush()
+    assert [d for _, _, d in repository.cat_file_many([tree])] == [disk.get(tree).data]
+
+
+def test_many_in_order(f_cached_repo):
+    '''
+    Test that objects are listed in the order asked for, whether they
+    come from the disk cache or not.
+    '''
+    repository, _, objects = f_cached_repo
+    disk = repository.disk_cache
+    # Cache every other object.
+    list(repository.cat_file_many(objects[::2]))
+    disk.flush()
+    names = [*reversed(objects), '0' * 40, objects[0]]
+    expected = [n for n in names if n != '0' * 40]
+    assert [n for n, *_ in repository.cat_file_many(names)] == expected
+    assert [n for n, *_ in repository.cat_file_check_many(names)] == expected
+    list(repository.cat_file_check_many(objects))
+    disk.flush()
+    assert [n for n, *_ in repository.cat_file_check_many(names)] == expected
@@ -0,0 +1,135 @@
+'''
+Tests of history walking on a history with many merges and no
+commit-graph, checked against git.
+'''
+
+from random import Random
+
+import pytest
+
+BASE_TIME = 1_700_000_000
+
+
+@pytest.fixture()
+def f_history(f_XGIT, f_git, f_testdir, f_gitconfig, monkeypatch):
+    '''
+    A repository of 120 commits on branches that fork and merge, with
+    tied and skewed commit times, and no commit-graph.
+    '''
+    path = f_testdir / 'history'
+    path.mkdir()
+    f_git('init', '-q', '-b', 'main', cwd=path)
+    f_git('config', 'gc.auto', '0', cwd=path)
+    f_git('config', 'core.commitGraph', 'false', cwd=path)
+    empty = f_git('mktree', cwd=path, input='')
+    rng = Random(42)
+    commits: list[str] = []
+    heads: list[str] = []
+    time = BASE_TIME
+    for i in range(120):
+        # Many commits share a time, and some are older than their parents.
+        time += rng.choice((0, 0, 60, 3600, -7200))
+        date = f'{time} +0000'
+        monkeypatch.setenv('GIT_AUTHOR_DATE', date)
+        monkeypatch.setenv('GIT_COMMITTER_DATE', date)
+        if not heads:
+            parents = []
+        elif len(heads) > 1 and rng.random() < 0.3:
+            parents = rng.sample(heads, 2)
+            heads.remove(parents[1])
+        elif rng.random() < 0.2:
+            # Fork a new branch from somewhere in the history.
+            parents = [rng.choice(commits)]
+            heads.append(parents[0])
+        else:
+            parents = [rng.choice(heads)]
+        args = [a for p in parents for a in ('-p', p)]
+        commit = f_git('commit-tree', empty, *args, '-m', f'commit {i}', cwd=path)
+        if parents:
+            heads.remove(parents[0])
+        heads.append(commit)
+        commits.append(commit)
+    for n, head in enumerate(heads):
+        f_git('branch', f'b{n}', head, cwd=path)
+    assert not (path / '.git' / 'objects' / 'info' / 'commit-graph').exists()
+    repository = f_XGIT.open_repository(path / '.git')
+    pairs = [tuple(rng.sample(commits, 2)) for _ in range(150)]
+    return repository, path, commits, pairs
+
+
+def reachable(f_git, path) -> dict[str, set[str]]:
+    '''
+    The commits reachable from each commit, from the full list of commits
+    and parents. (`git rev-list A..B` itself stops early, and with times
+    this skewed, can miscount.)
+    '''
+    parents = {}
+    for line in f_git('rev-list', '--parents', '--all', cwd=path).splitlines():
+        child, *rest = line.split()
+        parents[child] = rest
+    result = {}
+    for commit in parents:
+        seen = {commit}
+        stack = [commit]
+        while stack:
+            for parent in parents[stack.pop()]:
+                if parent not in seen:
+                    seen.add(parent)
+                    stack.append(parent)
+        result[commit] = seen
+    return result
+
+
+def test_ahead_behind(f_history, f_git):
+    '''
+    Test ahead/behind counts against the commits reachable from each side.
+    '''
+    repository, path, _, pairs = f_history
+    ancestry = repository.ancestry
+    history = reachable(f_git, path)
+    for one, other in pairs:
+        expected = (len(history[one] - history[other]),
+                    len(history[other] - history[one]))
+        assert ancestry.ahead_behind(one, other) == expected
+
+
+def test_merge_bases(f_history, f_git):
+    '''
+    Test merge bases against `git merge-base --all`.
+    '''
+    repository, path, _, pairs = f_history
+    ancestry = repository.ancestry
+    for one, other in pairs:
+        expected = f_git('merge-base', '--all', one, other, cwd=path, check=False)
+        assert sorted(ancestry.merge_bases(one, other)) == sorted(expected.split())
+
+
+def test_is_ancestor(f_history, f_git):
+    '''
+    Test ancestry against the commits reachable from each commit.
+    '''
+    repository, path, _, pairs = f_history
+    ancestry = repository.ancestry
+    history = reachable(f_git, path)
+    for one, other in pairs:
+        expected = one in history[other]
+        assert ancestry.is_ancestor(one, other) == expected
+
+
+def test_walk_order(f_history, f_git):
+    '''
+    Test walking in date and topological order against `git rev-list`.
+    '''
+    repository, path, _, _ = f_history
+    ancestry = repository.ancestry
+    heads = f_git('for-each-ref', '--format=%(objectname)', 'refs/heads',
+                  cwd=path).split()
+    for head in heads:
+        expected = f_git('rev-list', head, cwd=path)
+        assert list(ancestry.walk((head,))) == expected.split()
+        expected = f_git('rev-list', '--topo-order', head, cwd=path)
+        assert list(ancestry.walk((head,), order='topo')) == expected.split()
+        expected = f_git('rev-list', '--topo-order', '--first-parent', head,
+                         cwd=path)
+        walked = ancestry.walk((head,), order='topo', first_parent=True)
+        assert list(walked) == expected.split()
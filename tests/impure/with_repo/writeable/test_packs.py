@@ -0,0 +1,140 @@
+'''
+Tests of reading packfiles, checked against `git cat-file --batch`.
+'''
+
+from random import Random
+from subprocess import run, PIPE
+
+import pytest
+
+from xontrib.xgit.native import object_dirs
+from xontrib.xgit.packs import PackError, _PackStore
+
+
+def cat_file_batch(path, names: list[str]) -> dict[str, tuple[str, bytes]]:
+    '''
+    The type and contents of each object, as read by git.
+    '''
+    out = run(['git', 'cat-file', '--batch'], cwd=path, check=True,
+              input=''.join(f'{n}\n' for n in names).encode(),
+              stdout=PIPE).stdout
+    result = {}
+    pos = 0
+    for name in names:
+        end = out.index(b'\n', pos)
+        _, type, size = out[pos:end].split()
+        start = end + 1
+        pos = start + int(size) + 1
+        result[name] = type.decode(), out[start:pos - 1]
+    return result
+
+
+@pytest.fixture(params=['ofs', 'ref'])
+def f_packed(request, f_git, f_testdir, f_gitconfig):
+    '''
+    A repository whose objects are all in one pack, with long delta
+    chains, based by offset (`ofs`) or by id (`ref`).
+    '''
+    path = f_testdir / 'packed'
+    path.mkdir()
+    f_git('init', '-q', cwd=path)
+    rng = Random(7)
+    lines = [f'line {i}\n' for i in range(400)]
+    data = bytearray(rng.randbytes(20_000))
+    for i in range(40):
+        # Small edits to large files make good deltas.
+        lines.insert(rng.randrange(len(lines)), f'inserted {i}\n')
+        del lines[rng.randrange(len(lines))]
+        (path / 'text.txt').write_text(''.join(lines))
+        data[rng.randrange(len(data))] = i
+        (path / 'data.bin').write_bytes(bytes(data))
+        (path / f'small{i % 5}').write_text(f'{i}\n')
+        f_git('add', '-A', cwd=path)
+        f_git('commit', '-q', '-m', f'commit {i}', cwd=path)
+    f_git('tag', '-a', '-m', 'a tag', 'v1', cwd=path)
+    f_git('-c', f'repack.useDeltaBaseOffset={request.param == "ofs"}',
+          'repack', '-q', '-a', '-d', '-f', '--depth=50', '--window=50', cwd=path)
+    packs = list((path / '.git' / 'objects' / 'pack').glob('pack-*.idx'))
+    assert len(packs) == 1
+    verify = f_git('verify-pack', '-v', str(packs[0]), cwd=path)
+    assert 'chain length = 10' in verify
+    names = f_git('cat-file', '--batch-all-objects',
+                  '--batch-check=%(objectname)', cwd=path).split()
+    store = _PackStore(object_dirs(path / '.git' / 'objects'))
+    yield store, path, names
+    store.close()
+
+
+def test_pack_read(f_packed):
+    '''
+    Test reading every object in the pack, in two orders, so the delta
+    chains are resolved both with and without their bases cached.
+    '''
+    store, path, names = f_packed
+    expected = cat_file_batch(path, names)
+    assert {t for t, _ in expected.values()} == {'commit', 'tree', 'blob', 'tag'}
+    shuffled = list(names)
+    Random(1).shuffle(shuffled)
+    for order in (names, shuffled):
+        store.cache.clear()
+        for name in order:
+            oid = bytes.fromhex(name)
+            type, data = expected[name]
+            assert store.read(oid) == (type, data)
+            assert store.info(oid) == (type, len(data))
+            found_type, size, prefix = store.read_prefix(oid, 10)
+            assert (found_type, size) == (type, len(data))
+            assert data.startswith(prefix) and len(prefix) >= min(10, size)
+
+
+def test_pack_rescan(f_packed, f_git):
+    '''
+    Test that an object missed in the packs is found once it is added in
+    a new pack.
+    '''
+    store, path, names = f_packed
+    name = f_git('hash-object', '--stdin', cwd=path, input='new object\n')
+    oid = bytes.fromhex(name)
+    assert store.read(oid) is None
+    (path / 'new.txt').write_text('new object\n')
+    f_git('add', 'new.txt', cwd=path)
+    f_git('commit', '-q', '-m', 'new object', cwd=path)
+    f_git('repack', '-q', '-d', cwd=path)
+    assert store.read(oid) == ('blob', b'new object\n')
+    assert len(store.packs) == 2
+    assert store.info(bytes.fromhex(names[0])) is not None
+
+
+def test_pack_rescan_keeps_old_packs_open(f_packed, f_git):
+    '''
+    Test that a pack replaced by a repack is dropped, but left open for
+    anything still reading it.
+    '''
+    store, path, names = f_packed
+    old = store.packs[0]
+    oid = bytes.fromhex(names[0])
+    offset = old.index.find(oid)
+    assert offset is not None
+    expected = old.read_at(offset)
+    f_git('repack', '-q', '-a', '-d', '-f', '--window=5', cwd=path)
+    assert store.rescan()
+    assert old not in store.packs
+    assert old.read_at(offset) == expected
+    assert store.read(oid) == expected
+
+
+def test_pack_closed_while_reading(f_packed):
+    '''
+    Test that reading a pack that has been closed under the store is
+    reported as a `PackError`, for the caller to fall back to `git`.
+    '''
+    store, _, names = f_packed
+    oid = bytes.fromhex(names[0])
+    pack = store.packs[0]
+    offset = pack.index.find(oid)
+    # Close only the pack itself, so the store still finds the object.
+    pack._Pack__map.close()  # type: ignore
+    assert pack.index.find(oid) == offset
+    for read in (store.read, store.info, lambda oid: store.read_prefix(oid, 10)):
+        with pytest.raises(PackError):
+            read(oid)
@@ -0,0 +1,58 @@
+'''
+Tests of reading blob contents as a file and by line number.
+'''
+
+import io
+
+import pytest
+
+import xontrib.xgit.blob_reader as br
+from xontrib.xgit.blob_reader import BlobLines, BlobReader, line_index
+
+
+def test_reader():
+    with BlobReader(memoryview(b'ab\ncd\n\nef')) as reader:
+        buf = bytearray(4)
+        assert reader.readinto(buf) == 4 and buf == b'ab\nc'
+        assert reader.read() == b'd\n\nef'
+        assert reader.readinto(buf) == 0
+        reader.seek(3)
+        assert list(reader.line_offsets()) == [(3, b'cd\n'), (6, b'\n'), (7, b'ef')]
+        assert reader.seek(-2, io.SEEK_END) == 7
+        assert reader.readline() == b'ef'
+    assert reader.closed
+    with pytest.raises(ValueError):
+        reader.read()
+
+
+def test_reader_as_text():
+    reader = io.BufferedReader(BlobReader(memoryview('é\nx'.encode())))
+    assert list(io.TextIOWrapper(reader, encoding='utf-8')) == ['é\n', 'x']
+
+
+def test_lines():
+    lines = BlobLines(memoryview(b'a \nb\r\n\nc'))
+    assert list(lines) == ['a', 'b', '', 'c']
+    assert len(lines) == 4
+    assert lines[1] == 'b' and lines[-1] == 'c'
+    assert lines[1:3] == ['b', '']
+    assert lines.offset(3) == 7
+    with pytest.raises(IndexError):
+        lines[4]
+    assert list(BlobLines(memoryview(b'a\n'))) == ['a']
+    assert len(BlobLines(memoryview(b'a\n'))) == 1
+    assert len(BlobLines(memoryview(b''))) == 0
+
+
+def test_lines_across_chunks(monkeypatch):
+    monkeypatch.setattr(br, 'CHUNK', 4)
+    data = b''.join(b'x' * (n % 7) + b'\n' for n in range(50)) + b'end'
+    expected = data.decode().split('\n')
+    index = line_index()
+    lines = BlobLines(memoryview(data), index)
+    assert list(lines) == expected
+    assert lines[:] == expected
+    assert lines[20:22] == expected[20:22]
+    # The index is kept, for other readers of the same blob.
+    assert len(index) == 51
+    assert BlobLines(memoryview(data), index)[-1] == 'end'
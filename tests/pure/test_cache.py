@@ -0,0 +1,119 @@
+'''
+Tests of the byte-budgeted caches.
+'''
+
+from xontrib.xgit.cache import _BlobCache, _ByteLRU
+
+
+def test_lru_hits_and_misses():
+    cache = _ByteLRU(10)
+    assert cache.get('a') is None
+    cache.put('a', b'12345')
+    assert cache.get('a') == b'12345'
+    stats = cache.stats
+    assert (stats.hits, stats.misses, stats.entries, stats.size) == (1, 1, 1, 5)
+
+
+def test_lru_evicts_least_recent():
+    cache = _ByteLRU(10)
+    cache.put('a', b'1234')
+    cache.put('b', b'1234')
+    cache.get('a')
+    cache.put('c', b'1234')
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert 'c' in cache
+    assert cache.size == 8
+
+
+def test_lru_skips_oversize():
+    cache = _ByteLRU(4, sizeof=lambda v: len(v[1]))
+    cache.put('a', ('blob', b'12345'))
+    assert len(cache) == 0
+    cache.put('b', ('blob', b'1234'))
+    assert cache.get('b') == ('blob', b'1234')
+
+
+class Value:
+    def __init__(self, name):
+        self.name = name
+
+
+def test_intern_shares_live_values():
+    from xontrib.xgit.cache import _InternTable
+    table = _InternTable(0)
+    a = Value('a')
+    assert table.intern('a', a) is a
+    assert table.intern('a', Value('b')) is a
+    assert table.get('a') is a
+    del a
+    assert table.get('a') is None
+    assert table.stats.hits == 1
+    assert table.stats.misses == 1
+
+
+def test_intern_retains_recent():
+    from xontrib.xgit.cache import _InternTable
+    table = _InternTable(2)
+    for name in 'abc':
+        table.intern(name, Value(name))
+    assert 'a' not in table
+    assert 'b' in table
+    assert 'c' in table
+    assert table.stats.retained == 2
+
+
+class Obj:
+    def __init__(self, hash):
+        self.hash = hash
+
+
+def test_store_records_loaders():
+    from xontrib.xgit.object_store import _ObjectStore
+    store = _ObjectStore(0)
+    one, two = object(), object()
+    a = Obj('a')
+    assert store.intern('a', a, loader=one) is a
+    assert store.intern('a', Obj('a'), loader=two) is a
+    store.add_loader(a, one)
+    assert store.loaders('a') == [one, two]
+    assert store.loaders('b') == []
+
+
+def test_blob_cache_shares_buffers():
+    cache = _BlobCache(10, limit=5)
+    data = b'12345'
+    view = cache.put('a', data)
+    assert view.obj is data
+    again = cache.get('a')
+    assert again is not None and again.obj is data
+    assert cache.get('b') is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_blob_cache_bypasses_large():
+    cache = _BlobCache(100, limit=5)
+    assert bytes(cache.put('a', b'123456')) == b'123456'
+    assert 'a' not in cache
+
+
+def test_blob_cache_spills_large():
+    cache = _BlobCache(100, limit=5, spill=10)
+    view = cache.put('a', b'1234567')
+    assert bytes(view) == b'1234567'
+    assert 'a' in cache and cache.stats.size == 0
+    assert cache.spill_stats.size == 7
+    cache.put('b', b'1234567')
+    assert 'a' not in cache
+    # The evicted file stays mapped while viewed.
+    assert bytes(view) == b'1234567'
+    assert cache.put('c', b'x' * 11).obj == b'x' * 11
+    assert 'c' not in cache
+
+
+def test_blob_cache_empty():
+    cache = _BlobCache(0, limit=0, spill=10)
+    assert bytes(cache.put('a', b'')) == b''
+    assert cache.spill_stats.size == 0
+    assert bytes(cache.put('b', b'1')) == b'1'
+    assert cache.spill_stats.size == 1
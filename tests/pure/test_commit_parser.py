@@ -0,0 +1,55 @@
+'''
+Tests of decoding raw commits, and `git rev-list --header` records.
+'''
+
+import pytest
+
+from xontrib.xgit.commit_parser import parse_commit, parse_rev_list_record
+from xontrib.xgit.types import GitValueError
+
+TREE = '1' * 40
+PARENT = '2' * 40
+ID = '3' * 40
+
+HEADER = (f'tree {TREE}\n'
+          f'parent {PARENT}\n'
+          'author A U Thor <a@example.com> 1700000000 +0100\n'
+          'committer C O Mitter <c@example.com> 1700000060 -0500\n'
+          'mergetag object 4444\n'
+          ' type commit\n'
+          'gpgsig -----BEGIN PGP SIGNATURE-----\n'
+          ' \n'
+          ' abc\n'
+          ' -----END PGP SIGNATURE-----\n'
+          'encoding UTF-8\n').encode()
+
+
+def test_parse_commit():
+    fields = parse_commit(HEADER + b'\n\nSubject  \r\n\nBody\n\n')
+    assert fields.tree == TREE
+    assert fields.parents == (PARENT,)
+    assert fields.author == 'A U Thor <a@example.com> 1700000000 +0100'
+    assert fields.committer == 'C O Mitter <c@example.com> 1700000060 -0500'
+    assert fields.signature == '\n'.join([
+        'gpgsig -----BEGIN PGP SIGNATURE-----',
+        '',
+        ' abc',
+        ' -----END PGP SIGNATURE-----',
+    ])
+    assert fields.message == 'Subject\n\nBody'
+
+
+def test_parse_rev_list_record():
+    # As `git log --format=raw` shows the commit above.
+    record = (f'{ID}\n'.encode() + HEADER
+              + b'\n    Subject\n    \n    Body\n')
+    id, fields = parse_rev_list_record(record)
+    assert id == ID
+    assert fields == parse_commit(HEADER + b'\n\nSubject  \r\n\nBody\n\n')
+
+
+def test_parse_commit_no_message():
+    fields = parse_commit(f'tree {TREE}\n\n'.encode())
+    assert (fields.parents, fields.message, fields.signature) == ((), '', '')
+    with pytest.raises(GitValueError):
+        parse_commit(b'author nobody\n\n')
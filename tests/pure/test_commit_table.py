@@ -0,0 +1,71 @@
+'''
+Tests of the columnar commit table.
+'''
+
+import io
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from xontrib.xgit.commit_table import DAY, WEEK, CommitTable  # noqa: E402
+from xontrib.xgit.identities import IdentityTable, Mailmap  # noqa: E402
+
+A, B, C = ('a' * 40, 'b' * 40, 'c' * 40)
+MONDAY_2024 = 1704067200
+'''
+2024-01-01T00:00:00Z, a Monday.
+'''
+
+
+def row(id, parents, author, time, tz, committer=None):
+    date = f'{time} {tz}'
+    return '\x1f'.join((id, parents, author, date,
+                        committer or author, date)).encode()
+
+
+def test_table():
+    people = IdentityTable()
+    table = CommitTable([
+        row(C, f'{B} {A}', 'Ann <ann@example.com>', MONDAY_2024 + WEEK, '+0100'),
+        row(B, A, 'Bob <bob@example.com>', MONDAY_2024 + DAY, '-0530'),
+        row(A, '', 'Ann <ann@example.com>', MONDAY_2024 + 2 * DAY, '+0000'),
+        b'',
+    ], people)
+    assert len(table) == 3 and table.ids == [C, B, A]
+    assert table.people is people
+    assert [people.person(i).name for i in range(2)] == ['Ann', 'Bob']
+    assert set(people) == {'Ann <ann@example.com>', 'Bob <bob@example.com>'}
+    assert table.author.tolist() == [0, 1, 0]
+    assert table.author_tz.tolist() == [3600, -19800, 0]
+    assert table.parent_start.tolist() == [0, 2, 3, 3]
+    assert table.parent_rows.tolist() == [1, 2, 2]
+    assert table.parent_count.tolist() == [2, 1, 0]
+    assert table.parents(0) == [B, A] and table.row(B) == 1
+
+
+def test_count_by_person():
+    table = CommitTable([
+        row(C, B, 'Ann <ann@example.com>', MONDAY_2024 + WEEK, '+0100'),
+        # Sunday evening in UTC, Monday morning in local time.
+        row(B, A, 'Ann <ann@example.com>', MONDAY_2024 + WEEK - 3600, '+0200'),
+        row(A, '', 'Bob <bob@example.com>', MONDAY_2024, '+0000'),
+    ])
+    counts = table.count_by_person()
+    assert counts.person.tolist() == [0, 1]
+    days = counts.start.astype('datetime64[s]').astype('datetime64[D]')
+    assert days.astype(str).tolist() == ['2024-01-08', '2024-01-01']
+    assert counts.count.tolist() == [2, 1]
+    assert table.count_by_person(DAY).count.tolist() == [2, 1]
+    mailmap = Mailmap('Ann <ann@example.com> <bob@example.com>')
+    assert table.canonical(mailmap).tolist() == [0, 0, 0]
+    counts = table.count_by_person(mailmap=mailmap)
+    assert (counts.person.tolist(), counts.count.tolist()) == ([0, 0], [1, 2])
+
+
+def test_to_csv():
+    table = CommitTable([row(B, A, 'Ann <ann@example.com>', 100, '-0100')])
+    out = io.StringIO()
+    table.to_csv(out)
+    assert out.getvalue().splitlines()[1] == (
+        f'{B},{A},Ann,ann@example.com,100,-3600,Ann,ann@example.com,100,-3600')
@@ -0,0 +1,170 @@
+'''
+Tests of the tree comparison helpers.
+'''
+
+from hashlib import sha1
+from pathlib import PurePosixPath
+from random import Random
+from typing import NamedTuple, Optional
+
+from xontrib.xgit.diff import TreeChange, _differ, _key, find_renames
+
+
+class Entry(NamedTuple):
+    '''
+    Just enough of a blob entry for `find_renames`.
+    '''
+    path: PurePosixPath
+    data: bytes
+    mode: str = '100644'
+    type: str = 'blob'
+
+    @property
+    def hash(self) -> str:
+        return sha1(self.data).hexdigest()
+
+    @property
+    def object(self) -> 'Entry':
+        return self
+
+
+WORDS = [f'word{i}' for i in range(500)]
+
+
+def text(seed: int, lines: int = 100) -> bytes:
+    rng = Random(seed)
+    return b''.join(f'{i} {" ".join(rng.choices(WORDS, k=6))}\n'.encode()
+                    for i in range(lines))
+
+
+def edited(data: bytes, seed: int, lines: int) -> bytes:
+    '''
+    `data` with `lines` of its lines replaced.
+    '''
+    rng = Random(seed)
+    split = data.splitlines(keepends=True)
+    for i in rng.sample(range(len(split)), lines):
+        split[i] = f'{i} changed {rng.random():.12f} {rng.random():.12f}\n'.encode()
+    return b''.join(split)
+
+
+def change(status, name: str,
+           old: Optional[bytes] = None,
+           new: Optional[bytes] = None,
+           mode: str = '100644') -> TreeChange:
+    path = PurePosixPath(name)
+    return TreeChange(status, path,
+                      None if old is None else Entry(path, old),
+                      None if new is None else Entry(path, new, mode))
+
+
+def summary(changes: list[TreeChange]) -> list[tuple[str, str, str]]:
+    return sorted((c.status,
+                   str(c.old.path) if c.old else '',
+                   str(c.path) if c.new else '')
+                  for c in changes)
+
+
+def test_differ():
+    old = bytes(range(20)) * 1000
+    new = bytearray(old)
+    new[20 * 3] ^= 1
+    new[20 * 999 + 19] ^= 1
+    found = _differ(memoryview(old), memoryview(bytes(new)), 20, 0, 1000)
+    assert list(found) == [3, 999]
+
+
+def test_key_sorts_trees_as_directories():
+    names = sorted([_key('a.b', ('100644', 'blob')), _key('a', ('040000', 'tree'))])
+    assert names == ['a.b', 'a/']
+
+
+def test_renames_exact():
+    '''
+    Test that files with the same contents are paired, each deleted file
+    at most once, and not with a different kind of file.
+    '''
+    one, two = text(1), text(2)
+    changes = [change('D', 'a', old=one), change('D', 'b', old=one),
+               change('A', 'c', new=one), change('A', 'd', new=one),
+               change('A', 'e', new=one), change('A', 'f', new=two)]
+    found = find_renames(changes)
+    assert summary(found) == [('A', '', 'e'), ('A', '', 'f'),
+                              ('R', 'a', 'c'), ('R', 'b', 'd')]
+    assert {c.score for c in found if c.status == 'R'} == {100}
+    changes = [change('D', 'a', old=one), change('A', 'b', new=one, mode='120000')]
+    assert summary(find_renames(changes)) == [('A', '', 'b'), ('D', 'a', '')]
+
+
+def test_renames_and_copies():
+    '''
+    Test that a deleted file is renamed only once, to its best match, and
+    that the other files like it are copies only with `copies`, as are
+    files like a modified file.
+    '''
+    old, kept = text(1), text(2)
+    changes = [change('D', 'old', old=old),
+               change('M', 'kept', old=kept, new=edited(kept, 1, 30)),
+               change('A', 'near', new=edited(old, 2, 5)),
+               change('A', 'far', new=edited(old, 3, 20)),
+               change('A', 'copy', new=edited(kept, 4, 10))]
+    found = find_renames(changes)
+    assert summary(found) == [('A', '', 'copy'), ('A', '', 'far'),
+                              ('M', 'kept', 'kept'), ('R', 'old', 'near')]
+    found = find_renames(changes, copies=True)
+    assert summary(found) == [('C', 'kept', 'copy'), ('C', 'old', 'far'),
+                              ('M', 'kept', 'kept'), ('R', 'old', 'near')]
+    scores = {str(c.path): c.score for c in found}
+    assert scores['near'] > scores['far'] > 50
+
+
+def test_renames_threshold():
+    '''
+    Test that files less similar than the threshold are not paired.
+    '''
+    old = text(1)
+    changes = [change('D', 'old', old=old), change('A', 'new', new=edited(old, 1, 40))]
+    found = find_renames(changes)
+    assert summary(found) == [('R', 'old', 'new')]
+    score = found[0].score
+    assert score is not None and 50 < score < 70
+    found = find_renames(changes, threshold=(score + 1) / 100)
+    assert summary(found) == [('A', '', 'new'), ('D', 'old', '')]
+
+
+def test_renames_limit():
+    '''
+    Test that the similarity search is skipped above the limit, but files
+    with the same contents are still paired.
+    '''
+    one, two = text(1), text(2)
+    changes = [change('D', 'a', old=one), change('D', 'b', old=two),
+               change('A', 'c', new=one), change('A', 'd', new=edited(two, 1, 5)),
+               change('A', 'e', new=text(3))]
+    # Two files are left to search, for one source.
+    assert summary(find_renames(changes, limit=1)) == [
+        ('A', '', 'd'), ('A', '', 'e'), ('D', 'b', ''), ('R', 'a', 'c')]
+    assert summary(find_renames(changes, limit=2)) == [
+        ('A', '', 'e'), ('R', 'a', 'c'), ('R', 'b', 'd')]
+
+
+def test_renames_workers():
+    '''
+    Test that scoring in a process pool finds the same renames and copies
+    as scoring in this process.
+    '''
+    rng = Random(1)
+    changes = []
+    for i in range(60):
+        data = text(i)
+        if i % 3:
+            changes.append(change('D', f'old{i}', old=data))
+        else:
+            changes.append(change('M', f'mod{i}', old=data, new=edited(data, i, 50)))
+        for j in range(rng.randrange(3)):
+            changes.append(change('A', f'new{i}.{j}',
+                                  new=edited(data, i * 10 + j, rng.randrange(60))))
+    for copies in (False, True):
+        alone = find_renames(changes, copies=copies, workers=0)
+        assert any(c.status == 'R' for c in alone)
+        assert find_renames(changes, copies=copies, workers=2) == alone
@@ -0,0 +1,64 @@
+'''
+Tests of the persistent cache of object metadata.
+'''
+
+from xontrib.xgit.disk_cache import _DiskCache
+
+COMMIT = 'c' * 40
+TREE = 'd' * 40
+BLOB = 'e' * 40
+
+
+def test_disk_cache(tmp_path):
+    path = tmp_path / 'xgit' / 'repo.sqlite'
+    cache = _DiskCache(path, 1 << 20)
+    cache.put(COMMIT, 'commit', 5, b'tree ')
+    cache.put(BLOB, 'blob', 3, b'abc')
+    # Readable before it is written.
+    assert cache.get(COMMIT) == ('commit', 5, b'tree ')
+    cache.flush()
+    cache.close()
+    # A later session.
+    cache = _DiskCache(path, 1 << 20)
+    assert cache.get(BLOB) == ('blob', 3, None)
+    assert cache.get(TREE) is None
+    assert set(cache.get_many([COMMIT, TREE, BLOB])) == {COMMIT, BLOB}
+    assert cache.stats.entries == 2
+    cache.close()
+
+
+def test_disk_cache_contents_added(tmp_path):
+    cache = _DiskCache(tmp_path / 'repo.sqlite', 1 << 20)
+    # Seen first by a type and size check, then read.
+    cache.put(TREE, 'tree', 5)
+    cache.flush()
+    cache.put(TREE, 'tree', 5, b'12345')
+    # A check while the contents are waiting to be written keeps them.
+    cache.put(TREE, 'tree', 5)
+    assert cache.get(TREE) == ('tree', 5, b'12345')
+    cache.flush()
+    cache.put(TREE, 'tree', 5)
+    cache.flush()
+    cache.close()
+    cache = _DiskCache(tmp_path / 'repo.sqlite', 1 << 20)
+    assert cache.get(TREE) == ('tree', 5, b'12345')
+    cache.close()
+
+
+def test_disk_cache_prune(tmp_path):
+    cache = _DiskCache(tmp_path / 'repo.sqlite', 200_000)
+    for i in range(3000):
+        cache.put(f'{i:040x}', 'tree', 100, b'x' * 100)
+    cache.flush()
+    assert cache.stats.entries < 2000
+    assert cache.get(f'{2999:040x}') is not None
+    cache.close()
+
+
+def test_disk_cache_damaged(tmp_path):
+    path = tmp_path / 'repo.sqlite'
+    path.write_bytes(b'not a database' * 100)
+    cache = _DiskCache(path, 1 << 20)
+    assert not cache.enabled
+    cache.put(COMMIT, 'commit', 5, b'tree ')
+    assert cache.get(COMMIT) is None
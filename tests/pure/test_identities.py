@@ -0,0 +1,53 @@
+'''
+Tests of interning people, and of `.mailmap` parsing and lookup.
+'''
+
+from xontrib.xgit.identities import IdentityTable, Mailmap
+from xontrib.xgit.types import ObjectId
+
+MAILMAP = '''\
+# A comment
+Proper Name <commit@example.com>
+<proper@example.com> <Other@Example.com>
+Jane Doe <jane@example.com> <jdoe@example.com>  # trailing comment
+Joe <joe@example.com> joe <shared@example.com>
+Jane Doe <jane@example.com> JD <shared@example.com>
+Proper Name <proper@example.com>
+'''
+
+
+def test_mailmap():
+    mailmap = Mailmap(MAILMAP)
+    assert mailmap.map('Who', 'commit@example.com') == ('Proper Name',
+                                                         'commit@example.com')
+    assert mailmap.map('Who', 'other@example.com') == ('Who', 'proper@example.com')
+    assert mailmap.map('J', 'jdoe@example.com') == ('Jane Doe', 'jane@example.com')
+    assert mailmap.map('JOE', 'shared@example.com') == ('Joe', 'joe@example.com')
+    assert mailmap.map('jd', 'shared@example.com') == ('Jane Doe', 'jane@example.com')
+    assert mailmap.map('Other', 'shared@example.com') == ('Other',
+                                                          'shared@example.com')
+    assert mailmap.map('Who', 'proper@example.com') == ('Proper Name',
+                                                         'proper@example.com')
+    assert not Mailmap('# nothing\n\n')
+
+
+def test_identity_table():
+    people = IdentityTable()
+    jd = people.intern('J <jdoe@example.com>')
+    jane = people.intern('Jane Doe <jane@example.com>')
+    assert (jd, jane) == (0, 1)
+    assert people.intern('J <jdoe@example.com>') == jd
+    assert people['J <jdoe@example.com>'] is people.person(jd)
+    assert list(people) == ['J <jdoe@example.com>', 'Jane Doe <jane@example.com>']
+    loads = []
+    def text():
+        loads.append(1)
+        return MAILMAP
+    mailmap = people.mailmap(ObjectId('1' * 40), text)
+    assert people.mailmap(ObjectId('1' * 40), text) is mailmap and len(loads) == 1
+    assert people.canonical(jd, mailmap) == jane
+    joe = people.intern('joe <shared@example.com>')
+    # The canonical identity is interned when first needed.
+    assert people.canonical_ids(mailmap) == [jane, jane, 3, 3]
+    assert people.person(3).full_name == 'Joe <joe@example.com>'
+    assert people.canonical(joe, Mailmap()) == joe
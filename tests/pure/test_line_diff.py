@@ -0,0 +1,82 @@
+'''
+Tests of the line-by-line blob comparison, against the output of
+`git diff --histogram` for the same contents.
+'''
+
+from xontrib.xgit.line_diff import Hunk, diff_lines, is_binary, split_lines
+
+
+def patch(old: bytes, new: bytes, **kwargs) -> str:
+    return '\n'.join(str(h) for h in diff_lines(old, new, **kwargs))
+
+
+def test_split_lines():
+    assert split_lines(b'a\nb\r\nc') == [b'a\n', b'b\r\n', b'c']
+    assert split_lines(b'a\rb\n') == [b'a\rb\n']
+    assert split_lines(b'') == []
+
+
+def test_same():
+    assert list(diff_lines(b'a\nb\n', b'a\nb\n')) == []
+
+
+def test_hunks_and_no_newline():
+    old = b'a\nb\nc\nd\ne\nf\ng\nh\ni\nj\n'
+    new = b'a\nb\nC\nd\ne\nf\ng\nh\ni\nj\nk'
+    assert patch(old, new) == '\n'.join([
+        '@@ -1,6 +1,6 @@',
+        ' a',
+        ' b',
+        '-c',
+        '+C',
+        ' d',
+        ' e',
+        ' f',
+        '@@ -8,3 +8,4 @@ g',
+        ' h',
+        ' i',
+        ' j',
+        '+k',
+        '\\ No newline at end of file',
+    ])
+    hunks = list(diff_lines(old, new, context=0))
+    assert [h.header for h in hunks] == ['@@ -3 +3 @@ b', '@@ -10,0 +11 @@ j']
+
+
+def test_added_to_empty():
+    assert list(diff_lines(b'', b'x\ny\n')) == [
+        Hunk(0, 0, 1, 2, ('+x', '+y')),
+    ]
+
+
+def test_indent_heuristic():
+    old = b'\nx = 1\n\n'
+    new = b'\nx = 1\n    pass\nx = 1\n\n'
+    assert patch(old, new).splitlines()[1:4] == [' ', '+x = 1', '+    pass']
+    assert patch(old, new, indent_heuristic=False).splitlines()[1:4] == [
+        ' ', ' x = 1', '+    pass',
+    ]
+
+
+def test_repeated_lines():
+    # Every common line is too common, so Myers' algorithm is used.
+    old = b'a\nb\n' * 100
+    new = b'a\nb\n' * 50 + b'c\n' + b'a\nb\n' * 50
+    assert patch(old, new) == '\n'.join([
+        '@@ -98,6 +98,7 @@ a',
+        ' b',
+        ' a',
+        ' b',
+        '+c',
+        ' a',
+        ' b',
+        ' a',
+    ])
+
+
+def test_binary():
+    assert is_binary(b'x\0y')
+    assert not is_binary(b'x' * 8000 + b'\0')
+    hunks = list(diff_lines(b'x\ny\n', b'x\n\0y\n'))
+    assert len(hunks) == 1 and hunks[0].binary
+    assert str(hunks[0]) == 'Binary files differ'
@@ -0,0 +1,50 @@
+'''
+Tests of the slotted `Person` class, and of listing slotted attributes.
+'''
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from xontrib.xgit.identities import IdentityTable
+from xontrib.xgit.person import CommittedBy, Person, tz_minutes
+from xontrib.xgit.utils import instance_vars
+
+
+def test_person_split():
+    person = Person('A. Person <a@example.com>')
+    assert not hasattr(person, '__dict__')
+    assert person.name == 'A. Person'
+    assert person.email == 'a@example.com'
+    assert person == Person('A. Person <a@example.com>')
+
+
+def test_committed_by():
+    repository = SimpleNamespace(context=SimpleNamespace(people=IdentityTable()))
+    def by(line):
+        return CommittedBy(line, repository=repository)  # type: ignore
+    early = by('A. Person <a@example.com> 1700000000 -0130')
+    late = by('B. Person <b@example.com> 1700000060 +0545')
+    assert (early.timestamp, early.tz_offset) == (1700000000, -90)
+    assert early.person is by('A. Person <a@example.com> 1 +0000').person
+    assert sorted([late, early]) == [early, late] and early < late
+    assert early.date == datetime(2023, 11, 14, 20, 43, 20,
+                                  tzinfo=timezone(timedelta(minutes=-90)))
+    assert early.date.tzinfo is by('X <x> 0 -0130').date.tzinfo
+    assert tz_minutes('+0545') == 345
+    with pytest.raises(ValueError):
+        _ = by('A. Person <a@example.com> 1700000000 0130').timestamp
+
+
+def test_instance_vars_slots():
+    person = Person('A. Person <a@example.com>')
+    assert instance_vars(person) == {'_Person__full_name': 'A. Person <a@example.com>',
+                                     '_Person__name': None}
+    _ = person.email
+    assert instance_vars(person)['_Person__email'] == 'a@example.com'
+
+
+def test_instance_vars_no_attributes():
+    with pytest.raises(TypeError):
+        instance_vars(1)
@@ -0,0 +1,41 @@
+'''
+Tests of the blob similarity estimator used for rename detection.
+'''
+
+from xontrib.xgit.similarity import (
+    SimilarityIndex, fingerprint, similarity, init_worker, match_many,
+)
+
+
+def lines(name: str, n: int) -> bytes:
+    return b''.join(b'%s line %d\n' % (name.encode(), i) for i in range(n))
+
+
+def test_fingerprint_counts_bytes():
+    data = b'a\nbb\na\n' + b'x' * 100 + b'\n'
+    fp = fingerprint(data)
+    assert sum(fp.values()) == len(data)
+
+
+def test_similarity():
+    a = lines('a', 100)
+    half = a[:len(a) // 2]
+    assert similarity(fingerprint(a), fingerprint(a), len(a), len(a)) == 1.0
+    score = similarity(fingerprint(a), fingerprint(half), len(a), len(half))
+    assert 0.45 < score < 0.55
+
+
+def test_index_matches():
+    sources = [lines(name, 40) for name in ('a', 'b', 'c')]
+    index = SimilarityIndex(sources)
+    edited = sources[1][:-50] + b'something new\n'
+    (score, source), = index.matches(edited, 0.5)
+    assert source == 1
+    assert 0.8 < score < 1.0
+    assert index.matches(lines('d', 40), 0.5) == []
+
+
+def test_match_many():
+    sources = [lines(name, 40) for name in ('a', 'b')]
+    init_worker(SimilarityIndex(sources), [sources[1], lines('z', 40)])
+    assert match_many(0, 2, 0.5) == [(1.0, 0, 1)]
@@ -36,4 +36,30 @@ def test_table_view_cols():
         ],
         columns=defs,
     )
-    pretty(table)
\ No newline at end of file
+    pretty(table)
+
+class Prefetching(list):
+    '''
+    A list that counts the calls to its `prefetch` method.
+    '''
+    prefetches = 0
+
+    def prefetch(self):
+        self.prefetches += 1
+        return self
+
+
+def test_table_view_prefetch():
+    '''
+    Test that the target is prefetched once, not on every use.
+    '''
+    rows = Prefetching([{'a': 1}, {'a': 2}])
+    table = TableView(rows)
+    pretty(table)
+    pretty(table)
+    assert table._columns['a'].elements == [1, 2]
+    assert rows.prefetches == 1
+    other = Prefetching([{'a': 3}])
+    table._target = other
+    assert table._columns['a'].elements == [3]
+    assert (rows.prefetches, other.prefetches) == (1, 1)
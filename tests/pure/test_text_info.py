@@ -0,0 +1,36 @@
+'''
+Tests of telling text from binary by the start of a blob.
+'''
+
+import codecs
+
+from xontrib.xgit.text_info import BINARY, TextInfo, classify, is_binary
+
+
+def test_binary():
+    assert classify(b'x\0y') == BINARY
+    assert is_binary(memoryview(b'x\0y'))
+    # Only the start is looked at.
+    assert classify(b'x' * 8000 + b'\0') == TextInfo(False, 'utf-8')
+
+
+def test_encodings():
+    assert classify(b'') == TextInfo(False, 'utf-8')
+    assert classify('é'.encode()).encoding == 'utf-8'
+    assert classify('é'.encode('latin-1')).encoding == 'latin-1'
+    # A character cut off by the end of the prefix is still UTF-8.
+    assert classify(b'x' * 7999 + 'é'.encode()).encoding == 'utf-8'
+
+
+def test_byte_order_marks():
+    for bom, encoding, expected in [
+        (codecs.BOM_UTF8, 'utf-8', 'utf-8-sig'),
+        (codecs.BOM_UTF16_LE, 'utf-16-le', 'utf-16'),
+        (codecs.BOM_UTF16_BE, 'utf-16-be', 'utf-16'),
+        (codecs.BOM_UTF32_LE, 'utf-32-le', 'utf-32'),
+        (codecs.BOM_UTF32_BE, 'utf-32-be', 'utf-32'),
+    ]:
+        data = bom + 'x\n'.encode(encoding)
+        info = classify(memoryview(data))
+        assert info == TextInfo(False, expected), encoding
+        assert data.decode(expected) == 'x\n'
@@ -0,0 +1,47 @@
+'''
+Tests of decoding raw tree objects.
+'''
+
+import pytest
+
+from xontrib.xgit.tree_parser import parse_tree
+from xontrib.xgit.types import GitValueError
+
+
+def entry(mode: bytes, name: bytes, fill: int) -> bytes:
+    return mode + b' ' + name + b'\0' + bytes([fill]) * 20
+
+
+def test_parse_tree():
+    data = (entry(b'100644', b'a file.txt', 0)
+            + entry(b'40000', b'dir', 1)
+            + entry(b'160000', b'sub', 2))
+    assert list(parse_tree(data)) == [
+        ('100644', 'blob', '00' * 20, 'a file.txt'),
+        ('040000', 'tree', '01' * 20, 'dir'),
+        ('160000', 'commit', '02' * 20, 'sub'),
+    ]
+
+
+def test_parse_tree_shares_modes():
+    data = entry(b'100644', b'a', 0) + entry(b'100644', b'b', 1)
+    (mode_a, *_), (mode_b, *_) = parse_tree(data)
+    assert mode_a is mode_b
+
+
+def test_parse_tree_unusual_mode():
+    (mode, type, _, _), = parse_tree(entry(b'100664', b'old', 0))
+    assert (mode, type) == ('100664', 'blob')
+
+
+def test_parse_tree_truncated():
+    with pytest.raises(GitValueError):
+        list(parse_tree(entry(b'100644', b'a', 0)[:-1]))
+
+
+def test_unpack_tree():
+    from xontrib.xgit.tree_parser import unpack_tree
+    entries = unpack_tree(entry(b'100644', b'a', 0) + entry(b'40000', b'b', 1))
+    assert entries.names == ['a', 'b']
+    assert entries.kinds == [('100644', 'blob'), ('040000', 'tree')]
+    assert entries.id(1) == '01' * 20
@@ -23,10 +23,12 @@ from xontrib.xgit.types import (
     GitValueError,
     RepositoryNotFoundError,
     WorktreeNotFoundError,
+    ObjectNotFoundError,
     GitException,
     GitNoWorktreeException,
     GitNoRepositoryException,
     DirectoryKind,    
+    DiffStatus,
 )
 
 from xontrib.xgit.utils import (
@@ -53,6 +55,20 @@ from xontrib.xgit.entry_types import (
     EntryObject,
     ParentObject,
 )
+from xontrib.xgit.diff import (
+    diff_trees,
+    find_renames,
+    TreeChange,
+)
+from xontrib.xgit.blob_reader import (
+    BlobLines,
+    BlobReader,
+)
+from xontrib.xgit.line_diff import (
+    diff_lines,
+    Hunk,
+)
+from xontrib.xgit.text_info import TextInfo
 from xontrib.xgit.ref_types import (
     GitRef,
     Branch,
@@ -102,7 +118,7 @@ from xontrib.xgit.decorators import (
     prefix_command,
 )
 from xontrib.xgit.cmds import (
-    git_cd, git_pwd, git_ls,
+    git_cd, git_pwd, git_ls, git_diff,
 )
 
 __all__ = (  # noqa: RUF022
@@ -111,6 +127,7 @@ __all__ = (  # noqa: RUF022
     "git_cd",
     "git_pwd",
     "git_ls",
+    "git_diff",
     "ObjectId",
     "CommitId",
     "TreeId",
@@ -121,6 +138,7 @@ __all__ = (  # noqa: RUF022
     "GitValueError",
     "RepositoryNotFoundError",
     "WorktreeNotFoundError",
+    "ObjectNotFoundError",
     "GitNoWorktreeException",
     "GitNoRepositoryException",
     "GitId",
@@ -147,6 +165,15 @@ __all__ = (  # noqa: RUF022
     "RemoteBranch",
     "Replacement",
     "DirectoryKind",
+    "DiffStatus",
+    "diff_trees",
+    "find_renames",
+    "TreeChange",
+    "diff_lines",
+    "Hunk",
+    "BlobLines",
+    "BlobReader",
+    "TextInfo",
     "path_and_parents",
     "pre",
     "post",
@@ -0,0 +1,378 @@
+'''
+In-process history walking.
+
+Walks work on commit ids, not `GitCommit` objects, and get each commit's
+parents and commit time from the commit-graph when the commit is in it.
+Otherwise the commit is read (in batches) and its header parsed.
+
+Walks are driven by a priority queue. `walk` orders it by commit time (or
+topologically). `merge_bases` and `ahead_behind` order it by generation
+number, then commit time. Commits missing from the commit-graph count as
+having infinite generation, so they come before any commit that is in it.
+With generation numbers, a commit is never visited before one of its
+descendants. That lets these queries, and `is_ancestor`, stop as soon as
+the answer is settled, without walking all of history.
+'''
+
+from collections.abc import Iterable, Iterator, Sequence
+import heapq
+from itertools import count
+from typing import NamedTuple, Optional, TYPE_CHECKING
+
+from xontrib.xgit.types import CommitId, GitValueError, ObjectId, WalkOrder
+
+if TYPE_CHECKING:
+    import xontrib.xgit.context_types as ct
+    import xontrib.xgit.object_types as ot
+    import xontrib.xgit.ref_types as rt
+
+GENERATION_INFINITY = 2 ** 63
+'''
+The generation of a commit not in the commit-graph.
+'''
+
+LOAD_BATCH = 256
+'''
+The maximum number of commits to read in one batch when there is no
+commit-graph entry for them.
+'''
+
+PARENT1 = 1
+PARENT2 = 2
+STALE = 4
+
+
+class AncestryInfo(NamedTuple):
+    '''
+    What the walker needs to know about a commit.
+    '''
+    parents: tuple[CommitId, ...]
+    commit_time: int
+    generation: int
+
+
+def parse_commit_header(data: bytes) -> tuple[tuple[CommitId, ...], int]:
+    '''
+    Get the parents and commit time from the raw text of a commit.
+    '''
+    parents: list[CommitId] = []
+    commit_time = 0
+    for line in data.split(b'\n'):
+        if not line:
+            break
+        if line.startswith(b'parent '):
+            parents.append(CommitId(ObjectId(line[7:].decode())))
+        elif line.startswith(b'committer '):
+            # committer Name <email> <time> <tz>
+            fields = line.rsplit(b' ', 2)
+            if len(fields) == 3 and fields[1].lstrip(b'-').isdigit():
+                commit_time = int(fields[1])
+    return tuple(parents), commit_time
+
+
+class _Ancestry:
+    '''
+    History walking for one repository.
+
+    The information about each commit is cached, so repeated queries over
+    the same history get cheaper.
+    '''
+    __repository: 'ct.GitRepository'
+    __info: dict[CommitId, AncestryInfo]
+
+    def __init__(self, repository: 'ct.GitRepository', /):
+        self.__repository = repository
+        self.__info = {}
+
+    def load(self, commits: Iterable[CommitId], /):
+        '''
+        Make sure we have the information for `commits`. Commits in the
+        commit-graph are looked up individually; the rest are read in
+        batches.
+        '''
+        info = self.__info
+        repository = self.__repository
+        missing: list[CommitId] = []
+        for commit in commits:
+            if commit in info:
+                continue
+            graph = repository.commit_info(commit)
+            if graph is not None:
+                info[commit] = AncestryInfo(graph.parents,
+                                            graph.commit_time,
+                                            graph.generation)
+            else:
+                missing.append(commit)
+        for start in range(0, len(missing), LOAD_BATCH):
+            batch = missing[start:start + LOAD_BATCH]
+            for name, type, data in repository.cat_file_many(batch):
+                if type != 'commit':
+                    raise GitValueError(f"Expected a commit, got a {type}: {name}")
+                parents, commit_time = parse_commit_header(data)
+                info[CommitId(ObjectId(name))] = AncestryInfo(parents,
+                                                              commit_time,
+                                                              GENERATION_INFINITY)
+            for commit in batch:
+                if commit not in info:
+                    raise GitValueError(f"Commit not found: {commit}")
+
+    def info(self, commit: CommitId, /) -> AncestryInfo:
+        '''
+        The parents, commit time and generation of a commit.
+        '''
+        found = self.__info.get(commit)
+        if found is None:
+            self.load((commit,))
+            found = self.__info[commit]
+        return found
+
+    def __key(self, commit: CommitId) -> tuple[int, int, str]:
+        '''
+        A heap key: newest (highest generation, then latest) first.
+        '''
+        info = self.info(commit)
+        return (-info.generation, -info.commit_time, commit)
+
+    def __date_key(self, commit: CommitId, order: int) -> tuple[int, int, str]:
+        '''
+        A heap key: latest first, ties in the order queued (as git does).
+        '''
+        return (-self.info(commit).commit_time, order, commit)
+
+    def walk(self, starts: Iterable[CommitId], /, *,
+             first_parent: bool = False,
+             since: Optional[int] = None,
+             until: Optional[int] = None,
+             order: WalkOrder = 'date',
+             limit: Optional[int] = None,
+             ) -> Iterator[CommitId]:
+        '''
+        Walk the history from `starts`, yielding each commit once.
+
+        PARAMETERS
+        ----------
+        starts: Iterable[CommitId]
+            The commits to start from.
+        first_parent: bool
+            Follow only the first parent of merges.
+        since: Optional[int]
+            Stop at commits older than this timestamp: they are neither
+            yielded nor followed.
+        until: Optional[int]
+            Skip (but follow) commits newer than this timestamp.
+        order: 'date'|'topo'
+            `date`: newest commit time first, like `git log`.
+            `topo`: no parent before all its children, and each line of
+            history shown as far as it goes before the next, like
+            `git log --topo-order`. This walks all the history first.
+        limit: Optional[int]
+            The maximum number of commits to yield.
+        '''
+        starts = list(dict.fromkeys(starts))
+        if order == 'topo':
+            commits = self.__topo(starts, first_parent=first_parent, since=since)
+        elif order == 'date':
+            commits = self.__by_date(starts, first_parent=first_parent, since=since)
+        else:
+            raise GitValueError(f"Invalid walk order: {order!r}")
+        yielded = 0
+        for commit in commits:
+            if limit is not None and yielded >= limit:
+                return
+            if until is not None and self.info(commit).commit_time > until:
+                continue
+            yielded += 1
+            yield commit
+
+    def __parents(self, commit: CommitId, first_parent: bool) -> Sequence[CommitId]:
+        parents = self.info(commit).parents
+        return parents[:1] if first_parent else parents
+
+    def __by_date(self, starts: list[CommitId], /, *,
+                  first_parent: bool,
+                  since: Optional[int]) -> Iterator[CommitId]:
+        self.load(starts)
+        seen = set(starts)
+        counter = count()
+        heap = [self.__date_key(c, next(counter)) for c in starts]
+        heapq.heapify(heap)
+        while heap:
+            *_, commit = heapq.heappop(heap)
+            if since is not None and self.info(commit).commit_time < since:
+                continue
+            yield commit
+            parents = [p for p in self.__parents(commit, first_parent)
+                       if p not in seen]
+            self.load(parents)
+            for parent in parents:
+                seen.add(parent)
+                heapq.heappush(heap, self.__date_key(parent, next(counter)))
+
+    def __topo(self, starts: list[CommitId], /, *,
+               first_parent: bool,
+               since: Optional[int]) -> Iterator[CommitId]:
+        '''
+        Sort the commits of a date-order walk topologically, as git's
+        `sort_in_topological_order` does: a commit is ready once all its
+        children (within the walk) have been emitted, and the one that
+        became ready last is emitted next, so each line of history is
+        followed as far as it goes before the next one is started.
+        '''
+        commits = list(self.__by_date(starts, first_parent=first_parent,
+                                      since=since))
+        children = dict.fromkeys(commits, 0)
+        for commit in commits:
+            for parent in self.__parents(commit, first_parent):
+                if parent in children:
+                    children[parent] += 1
+        # A stack, with the newest of the commits with no children on top.
+        ready = [c for c in reversed(commits) if children[c] == 0]
+        while ready:
+            commit = ready.pop()
+            yield commit
+            for parent in self.__parents(commit, first_parent):
+                if parent not in children:
+                    continue
+                children[parent] -= 1
+                if children[parent] == 0:
+                    ready.append(parent)
+
+    def __paint(self, one: CommitId, others: Sequence[CommitId], /, *,
+                exact: bool = False,
+                ) -> tuple[dict[CommitId, int], list[CommitId]]:
+        '''
+        Paint down from `one` (PARENT1) and `others` (PARENT2), as in git's
+        `paint_down_to_common`. Stops when only commits reachable from both
+        sides (STALE) remain.
+
+        Commits without a generation are visited in order of commit time,
+        so with skewed or tied times, one can be visited before one of its
+        descendants, and be reached again from the other side later. That
+        does not change the merge bases, but it can leave the flags of
+        commits already visited wrong. With `exact`, the walk goes on past
+        those commits until it reaches commits with generations (whose
+        order is exact), or runs out, so every flag is right.
+
+        RETURNS
+        -------
+        flags: dict[CommitId, int]
+            The flags of each commit visited.
+        candidates: list[CommitId]
+            The commits first reached from both sides, newest first.
+        '''
+        self.load((one, *others))
+        flags: dict[CommitId, int] = {one: PARENT1}
+        for other in others:
+            flags[other] = flags.get(other, 0) | PARENT2
+        heap = [self.__key(c) for c in flags]
+        heapq.heapify(heap)
+        queued = set(flags)
+        # The number of queued commits not yet known to be STALE.
+        active = len(queued)
+        candidates: list[CommitId] = []
+        infinite = -GENERATION_INFINITY
+        while heap and (active or (exact and heap[0][0] == infinite)):
+            *_, commit = heapq.heappop(heap)
+            queued.discard(commit)
+            f = flags[commit]
+            if not f & STALE:
+                active -= 1
+            if f & (PARENT1 | PARENT2) == (PARENT1 | PARENT2) and not f & STALE:
+                candidates.append(commit)
+                f |= STALE
+                flags[commit] = f
+            parents = self.info(commit).parents
+            self.load(parents)
+            for parent in parents:
+                pf = flags.get(parent, 0)
+                if pf & f == f:
+                    continue
+                flags[parent] = pf | f
+                if parent in queued:
+                    if f & STALE and not pf & STALE:
+                        active -= 1
+                else:
+                    queued.add(parent)
+                    heapq.heappush(heap, self.__key(parent))
+                    if not (pf | f) & STALE:
+                        active += 1
+        return flags, candidates
+
+    def merge_bases(self, one: CommitId, *others: CommitId) -> list[CommitId]:
+        '''
+        All the best common ancestors of `one` and any of `others`,
+        like `git merge-base --all`.
+        '''
+        if not others:
+            return [one]
+        if one in others:
+            return [one]
+        _, candidates = self.__paint(one, others)
+        # Drop candidates that are ancestors of other candidates.
+        result = []
+        for c in candidates:
+            if not any(c != o and self.is_ancestor(c, o) for o in candidates):
+                result.append(c)
+        return result
+
+    def is_ancestor(self, ancestor: CommitId, descendant: CommitId) -> bool:
+        '''
+        Whether `ancestor` is reachable from `descendant`. A commit is its
+        own ancestor, as with `git merge-base --is-ancestor`.
+        '''
+        if ancestor == descendant:
+            return True
+        target = self.info(ancestor)
+        min_generation = target.generation
+        pruning = min_generation != GENERATION_INFINITY
+        seen = {descendant}
+        stack = [descendant]
+        while stack:
+            commit = stack.pop()
+            parents = [p for p in self.info(commit).parents if p not in seen]
+            self.load(parents)
+            for parent in parents:
+                if parent == ancestor:
+                    return True
+                seen.add(parent)
+                if pruning and self.info(parent).generation <= min_generation:
+                    continue
+                stack.append(parent)
+        return False
+
+    def ahead_behind(self, one: CommitId, other: CommitId) -> tuple[int, int]:
+        '''
+        Count the commits reachable from `one` but not from `other` (ahead),
+        and from `other` but not from `one` (behind), like
+        `git rev-list --left-right --count one...other`.
+        '''
+        flags, _ = self.__paint(one, (other,), exact=True)
+        ahead = behind = 0
+        for f in flags.values():
+            if f & STALE:
+                continue
+            side = f & (PARENT1 | PARENT2)
+            if side == PARENT1:
+                ahead += 1
+            elif side == PARENT2:
+                behind += 1
+        return ahead, behind
+
+
+def commit_id(commit: 'ot.Commitish|rt.GitRef', /, *,
+              repository: 'ct.GitRepository') -> CommitId:
+    '''
+    Resolve a commit, ref, tag or name to a commit id.
+    '''
+    import xontrib.xgit.object_types as ot
+    import xontrib.xgit.ref_types as rt
+    target = commit
+    if isinstance(target, rt.GitRef):
+        target = target.target
+    elif isinstance(target, str):
+        target = repository.get_object(target)
+    while isinstance(target, ot.GitTagObject):
+        target = target.object
+    if not isinstance(target, ot.GitCommit):
+        raise GitValueError(f"Not a commit: {commit!r}")
+    return target.hash
@@ -0,0 +1,264 @@
+'''
+Reading the contents of blobs as a file, or by line number.
+
+Both work over a blob's cached contents (a `memoryview`), so nothing is
+copied or decoded until it is asked for:
+
+* `BlobReader` is a seekable binary file, with `readinto` for reading in
+  chunks and `line_offsets` for the lines with where each begins.
+* `BlobLines` is the text of the lines as a sequence, so `lines[n]` or
+  `lines[a:b]` decodes only those lines. The start of each line is found
+  once, the first time a line is looked up by number, and kept in an
+  `array` that can be shared by everything reading the same blob.
+
+Lines end at each newline, as git counts them.
+'''
+
+from array import array
+from collections.abc import Iterator, Sequence
+from itertools import accumulate, repeat
+import io
+import mmap
+from operator import add
+from typing import overload
+
+CHUNK = 1024 * 1024
+'''
+How many bytes are split into lines, or decoded, at a time.
+'''
+
+LineIndex = array
+'''
+The offset of the start of each line, as an `array('q')`. Empty until
+the lines have been found.
+'''
+
+
+def line_index() -> LineIndex:
+    '''
+    An empty index, to be filled in by the first `BlobLines` to need it.
+    '''
+    return array('q')
+
+
+def _searchable(buffer: memoryview) -> 'bytes|bytearray|mmap.mmap':
+    '''
+    The object `buffer` views, which can be searched with `find`, or a
+    copy of the contents if it views something else.
+    '''
+    data = buffer.obj
+    if isinstance(data, (bytes, bytearray, mmap.mmap)) and len(data) == buffer.nbytes:
+        return data
+    return buffer.tobytes()
+
+
+def _line_starts(buffer: memoryview) -> LineIndex:
+    '''
+    Find the offset of the start of each line of `buffer`.
+
+    After the first line, each line begins one past the end of the
+    previous one, so the offsets are a running sum of the lengths of the
+    lines split at each newline, plus one.
+    '''
+    starts = array('q', [0])
+    size = buffer.nbytes
+    for base in range(0, size, CHUNK):
+        parts = bytes(buffer[base:base + CHUNK]).split(b'\n')
+        # The last part continues into the next chunk, or is the last line.
+        parts.pop()
+        ends = list(accumulate(map(add, map(len, parts), repeat(1)),
+                               initial=base))
+        starts.fromlist(ends[1:])
+    return starts
+
+
+class BlobReader(io.RawIOBase):
+    '''
+    A seekable binary file over the contents of a blob.
+
+    Closing the reader, as at the end of a `with` block, releases its
+    view of the contents.
+    '''
+    __view: memoryview
+    __data: 'bytes|bytearray|mmap.mmap'
+    __pos: int
+
+    def __init__(self, buffer: memoryview, /):
+        '''
+        PARAMETERS
+        ----------
+        buffer: memoryview
+            The contents of the blob.
+        '''
+        super().__init__()
+        self.__view = memoryview(buffer).cast('B')
+        self.__data = _searchable(self.__view)
+        self.__pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer, /) -> int:
+        '''
+        Read into `buffer`, returning how many bytes were read; 0 at the end.
+        '''
+        self._checkClosed()
+        pos = self.__pos
+        with memoryview(buffer) as raw, raw.cast('B') as out:
+            n = min(out.nbytes, self.__view.nbytes - pos)
+            out[:n] = self.__view[pos:pos + n]
+        self.__pos = pos + n
+        return n
+
+    def readall(self) -> bytes:
+        self._checkClosed()
+        pos = self.__pos
+        self.__pos = max(pos, self.__view.nbytes)
+        return self.__view[pos:].tobytes()
+
+    def readline(self, size: int|None = -1, /) -> bytes:
+        self._checkClosed()
+        pos = self.__pos
+        end = self.__data.find(b'\n', pos) + 1 or self.__view.nbytes
+        if size is not None and size >= 0:
+            end = min(end, pos + size)
+        end = max(pos, end)
+        self.__pos = end
+        return self.__view[pos:end].tobytes()
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET, /) -> int:
+        self._checkClosed()
+        if whence == io.SEEK_CUR:
+            offset += self.__pos
+        elif whence == io.SEEK_END:
+            offset += self.__view.nbytes
+        elif whence != io.SEEK_SET:
+            raise ValueError(f'Invalid whence: {whence}')
+        if offset < 0:
+            raise ValueError(f'Negative seek position: {offset}')
+        self.__pos = offset
+        return offset
+
+    def tell(self) -> int:
+        self._checkClosed()
+        return self.__pos
+
+    def line_offsets(self) -> Iterator[tuple[int, bytes]]:
+        '''
+        The lines from the current position on, each with the offset where
+        it begins. The lines include their newlines.
+        '''
+        while True:
+            pos = self.__pos
+            line = self.readline()
+            if not line:
+                return
+            yield pos, line
+
+    def close(self):
+        if not self.closed:
+            self.__view.release()
+        super().close()
+
+    def __repr__(self):
+        if self.closed:
+            return f'{type(self).__name__}(closed)'
+        return f'{type(self).__name__}({self.__pos}/{self.__view.nbytes})'
+
+
+class BlobLines(Sequence[str]):
+    '''
+    The lines of a blob's text, looked up by number without decoding
+    the lines before them.
+
+    Each line is stripped of its newline and any other whitespace at
+    its end.
+    '''
+    __view: memoryview
+    __index: LineIndex
+
+    def __init__(self, buffer: memoryview, index: LineIndex|None = None, /):
+        '''
+        PARAMETERS
+        ----------
+        buffer: memoryview
+            The contents of the blob.
+        index: LineIndex|None
+            Where to keep the start of each line. If empty, it is filled
+            in when first needed, so it can be shared by other `BlobLines`
+            over the same contents.
+        '''
+        self.__view = memoryview(buffer).cast('B')
+        self.__index = line_index() if index is None else index
+
+    @property
+    def index(self) -> LineIndex:
+        '''
+        The offset of the start of each line, found on first use.
+        '''
+        index = self.__index
+        if not index:
+            # Concurrent readers compute the same offsets.
+            index[:] = _line_starts(self.__view)
+        return index
+
+    def __len__(self) -> int:
+        index = self.index
+        return len(index) - (index[-1] == self.__view.nbytes)
+
+    def __line(self, n: int, index: LineIndex) -> str:
+        start = index[n]
+        end = index[n + 1] if n + 1 < len(index) else self.__view.nbytes
+        return str(self.__view[start:end], 'utf-8').rstrip()
+
+    @overload
+    def __getitem__(self, n: int) -> str: ...
+    @overload
+    def __getitem__(self, n: slice) -> list[str]: ...
+    def __getitem__(self, n: int|slice) -> str|list[str]:
+        index = self.index
+        size = len(self)
+        if isinstance(n, slice):
+            return [self.__line(i, index) for i in range(*n.indices(size))]
+        if n < 0:
+            n += size
+        if not 0 <= n < size:
+            raise IndexError(f'Line {n} of {size}')
+        return self.__line(n, index)
+
+    def offset(self, n: int) -> int:
+        '''
+        The offset in the contents where line `n` begins.
+        '''
+        return self.index[range(len(self))[n]]
+
+    def __iter__(self) -> Iterator[str]:
+        '''
+        The lines in order, decoded a chunk at a time, without finding
+        the start of each line in advance.
+        '''
+        view = self.__view
+        data = _searchable(view)
+        size = view.nbytes
+        start = 0
+        while start < size:
+            stop = start + CHUNK
+            if stop >= size:
+                end = size
+            else:
+                end = (data.rfind(b'\n', start, stop) + 1
+                       or data.find(b'\n', stop) + 1
+                       or size)
+            lines = str(view[start:end], 'utf-8').split('\n')
+            if not lines[-1]:
+                lines.pop()
+            yield from map(str.rstrip, lines)
+            start = end
+
+    def __repr__(self):
+        if not self.__index:
+            return f'{type(self).__name__}({self.__view.nbytes} bytes)'
+        return f'{type(self).__name__}({len(self)} lines)'
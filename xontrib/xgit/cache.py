@@ -0,0 +1,437 @@
+'''
+Bounded caches for object data.
+
+- `_ByteLRU`: least-recently-used, limited by the total size of the values.
+- `_InternTable`: an identity map, holding values weakly, plus a bounded
+  number of recently used values strongly.
+- `_BlobCache`: the contents of blobs, in memory or in temporary files.
+'''
+
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+import mmap
+from tempfile import TemporaryFile
+from threading import Lock
+from weakref import WeakValueDictionary
+from typing import Any, Generic, NamedTuple, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+class CacheStats(NamedTuple):
+    '''
+    A snapshot of a cache's counters.
+    '''
+    hits: int
+    misses: int
+    entries: int
+    size: int
+    budget: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class _ByteLRU(Generic[K, V]):
+    '''
+    A least-recently-used cache limited by the total size of its values,
+    as given by `sizeof` (default: `len`).
+
+    Values larger than the whole budget are not cached at all.
+    '''
+    __entries: OrderedDict[K, V]
+    __sizeof: Callable[[Any], int]
+    __budget: int
+    __size: int
+    __hits: int
+    __misses: int
+    __lock: Lock
+
+    @property
+    def budget(self) -> int:
+        '''
+        The maximum total size of the cached values, in bytes.
+        '''
+        return self.__budget
+
+    @budget.setter
+    def budget(self, budget: int):
+        with self.__lock:
+            self.__budget = max(0, int(budget))
+            self.__evict()
+
+    @property
+    def size(self) -> int:
+        '''
+        The current total size of the cached values, in bytes.
+        '''
+        return self.__size
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self.__hits,
+            misses=self.__misses,
+            entries=len(self.__entries),
+            size=self.__size,
+            budget=self.__budget,
+        )
+
+    def __init__(self, budget: int, /, *,
+                 sizeof: Callable[[Any], int] = len):
+        self.__entries = OrderedDict()
+        self.__sizeof = sizeof
+        self.__budget = max(0, int(budget))
+        self.__size = 0
+        self.__hits = 0
+        self.__misses = 0
+        self.__lock = Lock()
+
+    def __evict(self):
+        '''
+        Drop the least-recently-used values until we are within budget.
+        Must be called with the lock held.
+        '''
+        entries = self.__entries
+        while self.__size > self.__budget and entries:
+            _, value = entries.popitem(last=False)
+            self.__size -= self.__sizeof(value)
+
+    def get(self, key: K, /) -> V|None:
+        '''
+        Get a value, marking it as recently used. Counts a hit or a miss.
+        '''
+        with self.__lock:
+            value = self.__entries.get(key)
+            if value is None:
+                self.__misses += 1
+                return None
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return value
+
+    def put(self, key: K, value: V, /):
+        '''
+        Add (or replace) a value, evicting older values to make room.
+        '''
+        size = self.__sizeof(value)
+        with self.__lock:
+            old = self.__entries.pop(key, None)
+            if old is not None:
+                self.__size -= self.__sizeof(old)
+            if size > self.__budget:
+                return
+            self.__entries[key] = value
+            self.__size += size
+            self.__evict()
+
+    def clear(self):
+        '''
+        Drop all values. The counters are kept.
+        '''
+        with self.__lock:
+            self.__entries.clear()
+            self.__size = 0
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.__entries
+
+    def __repr__(self):
+        s = self.stats
+        return (f'{type(self).__name__}(entries={s.entries}, '
+                f'size={s.size}/{s.budget}, hits={s.hits}, misses={s.misses})')
+
+
+class InternStats(NamedTuple):
+    '''
+    A snapshot of an intern table's counters.
+    '''
+    hits: int
+    misses: int
+    live: int
+    '''
+    The number of values still referenced from anywhere.
+    '''
+    retained: int
+    '''
+    The number of values kept alive by the table itself.
+    '''
+    capacity: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class _InternTable(Generic[K, V]):
+    '''
+    An identity map: at most one value per key is alive at a time.
+
+    Values are held weakly, so any value still in use elsewhere is found
+    and shared. The `capacity` most recently used values are also held
+    strongly, so they survive between uses.
+    '''
+    __weak: WeakValueDictionary[K, V]
+    __strong: OrderedDict[K, V]
+    __capacity: int
+    __hits: int
+    __misses: int
+    __lock: Lock
+
+    @property
+    def capacity(self) -> int:
+        '''
+        The number of recently used values to keep alive.
+        '''
+        return self.__capacity
+
+    @capacity.setter
+    def capacity(self, capacity: int):
+        with self.__lock:
+            self.__capacity = max(0, int(capacity))
+            self.__trim()
+
+    @property
+    def stats(self) -> InternStats:
+        return InternStats(
+            hits=self.__hits,
+            misses=self.__misses,
+            live=len(self.__weak),
+            retained=len(self.__strong),
+            capacity=self.__capacity,
+        )
+
+    def __init__(self, capacity: int, /):
+        self.__weak = WeakValueDictionary()
+        self.__strong = OrderedDict()
+        self.__capacity = max(0, int(capacity))
+        self.__hits = 0
+        self.__misses = 0
+        self.__lock = Lock()
+
+    def __trim(self):
+        '''
+        Release the least-recently-used strong references beyond capacity.
+        Must be called with the lock held.
+        '''
+        strong = self.__strong
+        while len(strong) > self.__capacity:
+            strong.popitem(last=False)
+
+    def __touch(self, key: K, value: V):
+        '''
+        Mark a value as recently used. Must be called with the lock held.
+        '''
+        if self.__capacity:
+            self.__strong[key] = value
+            self.__strong.move_to_end(key)
+            self.__trim()
+
+    def get(self, key: K, /) -> V|None:
+        '''
+        Get the live value for `key`, if any. Counts a hit or a miss.
+        '''
+        with self.__lock:
+            value = self.__weak.get(key)
+            if value is None:
+                self.__misses += 1
+                return None
+            self.__hits += 1
+            self.__touch(key, value)
+            return value
+
+    def intern(self, key: K, value: V, /) -> V:
+        '''
+        Add `value` unless there is already a live value for `key`.
+        Returns the value now in the table.
+        '''
+        with self.__lock:
+            existing = self.__weak.get(key)
+            if existing is not None:
+                value = existing
+            else:
+                self.__weak[key] = value
+            self.__touch(key, value)
+            return value
+
+    def peek(self, key: K, /) -> V|None:
+        '''
+        Get the live value for `key`, if any, without counting it as a use.
+        '''
+        return self.__weak.get(key)
+
+    def keys(self) -> list[K]:
+        '''
+        The keys of the live values.
+        '''
+        with self.__lock:
+            return list(self.__weak.keys())
+
+    def discard(self, key: K, /):
+        '''
+        Remove a value from the table.
+        '''
+        with self.__lock:
+            self.__weak.pop(key, None)
+            self.__strong.pop(key, None)
+
+    def clear(self):
+        '''
+        Drop all values. The counters are kept.
+        '''
+        with self.__lock:
+            self.__weak.clear()
+            self.__strong.clear()
+
+    def values(self) -> list[V]:
+        '''
+        The live values.
+        '''
+        with self.__lock:
+            return list(self.__weak.values())
+
+    def __len__(self) -> int:
+        return len(self.__weak)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.__weak
+
+    def __repr__(self):
+        s = self.stats
+        return (f'{type(self).__name__}(live={s.live}, '
+                f'retained={s.retained}/{s.capacity}, '
+                f'hits={s.hits}, misses={s.misses})')
+
+
+class _BlobCache(Generic[K]):
+    '''
+    The contents of recently read blobs, as `memoryview`s over the cached
+    buffers, so they can be used again without reading or copying them.
+
+    Blobs up to `limit` bytes are held in memory, within `budget` bytes.
+    Larger blobs are written to (unlinked) temporary files and mapped,
+    within `spill` bytes, or are not cached at all if `spill` is 0.
+    A view keeps its buffer alive after it is evicted.
+    '''
+    __memory: _ByteLRU[K, bytes]
+    __spilled: _ByteLRU[K, mmap.mmap]
+    __limit: int
+
+    @property
+    def budget(self) -> int:
+        '''
+        The most bytes to hold in memory.
+        '''
+        return self.__memory.budget
+
+    @budget.setter
+    def budget(self, budget: int):
+        self.__memory.budget = budget
+
+    @property
+    def limit(self) -> int:
+        '''
+        The largest blob to hold in memory, in bytes.
+        '''
+        return self.__limit
+
+    @limit.setter
+    def limit(self, limit: int):
+        self.__limit = max(0, int(limit))
+
+    @property
+    def spill(self) -> int:
+        '''
+        The most bytes of larger blobs to keep in temporary files.
+        '''
+        return self.__spilled.budget
+
+    @spill.setter
+    def spill(self, spill: int):
+        self.__spilled.budget = spill
+
+    @property
+    def stats(self) -> CacheStats:
+        '''
+        The counters of the cache in memory, whose misses are all the
+        misses. See `spill_stats` for the temporary files.
+        '''
+        return self.__memory.stats
+
+    @property
+    def spill_stats(self) -> CacheStats:
+        return self.__spilled.stats
+
+    def __init__(self, budget: int, /, *, limit: int, spill: int = 0):
+        '''
+        PARAMETERS
+        ----------
+        budget: int
+            The most bytes to hold in memory.
+        limit: int
+            The largest blob to hold in memory, in bytes.
+        spill: int
+            The most bytes of larger blobs to keep in temporary files.
+            0 to not cache them.
+        '''
+        self.__memory = _ByteLRU(budget)
+        self.__spilled = _ByteLRU(spill)
+        self.__limit = max(0, int(limit))
+
+    def get(self, key: K, /) -> memoryview|None:
+        '''
+        Get the contents of a blob, if cached, marking them as recently used.
+        '''
+        if key in self.__spilled:
+            mapped = self.__spilled.get(key)
+            if mapped is not None:
+                return memoryview(mapped)
+        data = self.__memory.get(key)
+        return None if data is None else memoryview(data)
+
+    def put(self, key: K, data: bytes, /) -> memoryview:
+        '''
+        Cache the contents of a blob, if they fit, and return a view of
+        them.
+        '''
+        size = len(data)
+        if size == 0:
+            # Nothing to hold, and an empty file cannot be mapped.
+            return memoryview(data)
+        if size <= self.__limit:
+            self.__memory.put(key, data)
+            return memoryview(data)
+        if size > self.__spilled.budget:
+            return memoryview(data)
+        with TemporaryFile() as f:
+            f.write(data)
+            f.flush()
+            mapped = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        self.__spilled.put(key, mapped)
+        return memoryview(mapped)
+
+    def clear(self):
+        '''
+        Drop all the cached contents. The counters are kept.
+        '''
+        self.__memory.clear()
+        self.__spilled.clear()
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.__memory or key in self.__spilled
+
+    def __len__(self) -> int:
+        return len(self.__memory) + len(self.__spilled)
+
+    def __repr__(self):
+        s, t = self.stats, self.spill_stats
+        return (f'{type(self).__name__}(entries={s.entries}, '
+                f'size={s.size}/{s.budget}, spilled={t.size}/{t.budget}, '
+                f'hits={s.hits + t.hits}, misses={s.misses})')
@@ -0,0 +1,250 @@
+'''
+A long-lived `git cat-file --batch` (or `--batch-check`) coprocess.
+
+Reading an object with `git cat-file <type> <hash>` costs a fork/exec per
+object. Instead, we keep one `git cat-file` process per repository running,
+and send it one object name per line. The replies are framed as:
+
+    <hash> <type> <size>\\n
+    <contents>\\n
+
+(The contents are omitted for `--batch-check`.) Objects that cannot be
+found are reported as `<name> missing\\n` or `<name> ambiguous\\n`.
+
+The process is started on first use, restarted if it dies, and access is
+serialized with a lock, so a single instance can be shared between threads.
+'''
+
+from collections.abc import Iterable, Iterator
+from contextlib import suppress
+from itertools import islice
+from pathlib import Path
+from subprocess import Popen, PIPE, DEVNULL
+from threading import Lock
+from typing import IO, Literal, Optional, cast
+import weakref
+
+from xontrib.xgit.types import (
+    GitException, GitObjectType, ObjectNotFoundError,
+)
+
+PIPELINE_CHUNK = 256
+'''
+The number of requests to write before reading the replies. At up to 65 bytes
+per request, this stays well within a 64K pipe buffer.
+'''
+
+
+def _terminate(proc: Popen):
+    '''
+    Shut down a coprocess. Closing stdin is enough for `git cat-file`
+    to exit; we wait briefly, and kill it if it doesn't.
+    '''
+    if proc.poll() is not None:
+        return
+    try:
+        if proc.stdin:
+            proc.stdin.close()
+        proc.wait(timeout=1)
+    except Exception:
+        proc.kill()
+    finally:
+        if proc.stdout:
+            proc.stdout.close()
+
+
+class _CatFileProcess:
+    '''
+    A `git cat-file --batch` or `--batch-check` coprocess.
+    '''
+    __git: Path
+    __cwd: Path
+    __mode: Literal['--batch', '--batch-check']
+    __proc: Optional[Popen]
+    __lock: Lock
+    __finalizer: Optional[weakref.finalize]
+
+    @property
+    def mode(self) -> str:
+        '''
+        The `git cat-file` mode of this process.
+        '''
+        return self.__mode
+
+    def __init__(self, git: Path, cwd: Path, /, *,
+                 mode: Literal['--batch', '--batch-check'] = '--batch'):
+        self.__git = git
+        self.__cwd = cwd
+        self.__mode = mode
+        self.__proc = None
+        self.__lock = Lock()
+        self.__finalizer = None
+
+    def __start(self) -> Popen:
+        '''
+        Start (or restart) the coprocess. Must be called with the lock held.
+        '''
+        self.__stop()
+        proc = Popen([str(self.__git), 'cat-file', self.__mode],
+                     stdin=PIPE,
+                     stdout=PIPE,
+                     stderr=DEVNULL,
+                     cwd=self.__cwd,
+                     )
+        self.__proc = proc
+        self.__finalizer = weakref.finalize(self, _terminate, proc)
+        return proc
+
+    def __stop(self):
+        '''
+        Stop the coprocess, if running. Must be called with the lock held.
+        '''
+        if self.__finalizer is not None:
+            self.__finalizer()
+            self.__finalizer = None
+        self.__proc = None
+
+    def close(self):
+        '''
+        Stop the coprocess. It will be restarted if used again.
+        '''
+        with self.__lock:
+            self.__stop()
+
+    def __running(self) -> Popen:
+        '''
+        Return the running coprocess, starting it if necessary.
+        '''
+        proc = self.__proc
+        if proc is None or proc.poll() is not None:
+            proc = self.__start()
+        return proc
+
+    def __read_reply(self, stdout: IO[bytes], name: str
+                     ) -> tuple[GitObjectType, int, bytes|None]:
+        '''
+        Read one framed reply from the coprocess.
+        '''
+        header = stdout.readline()
+        if not header:
+            raise EOFError(f'git cat-file exited while reading {name}')
+        fields = header.split()
+        if len(fields) == 2 and fields[1] in (b'missing', b'ambiguous'):
+            raise ObjectNotFoundError(name, fields[1].decode())
+        if len(fields) != 3:
+            raise GitException(f'Bad reply from git cat-file: {header!r}')
+        _, type, size_ = fields
+        size = int(size_)
+        data = None
+        if self.__mode == '--batch':
+            data = stdout.read(size + 1)
+            if len(data) != size + 1:
+                raise EOFError(f'git cat-file exited while reading {name}')
+            data = data[:-1]
+        return cast('GitObjectType', type.decode()), size, data
+
+    def request(self, name: str, /) -> tuple[GitObjectType, int, bytes|None]:
+        '''
+        Look up one object.
+
+        If the coprocess has died (or dies during the request), it is
+        restarted and the request retried once.
+
+        PARAMETERS
+        ----------
+        name: str
+            The object name, normally a full hash.
+
+        RETURNS
+        -------
+        type: GitObjectType
+            The type of the object.
+        size: int
+            The size of the object in bytes.
+        data: bytes|None
+            The contents of the object, or `None` for `--batch-check`.
+        '''
+        if '\n' in name:
+            raise ObjectNotFoundError(name, 'missing')
+        request = f'{name}\n'.encode()
+        with self.__lock:
+            for retry in (False, True):
+                proc = self.__running()
+                stdin = cast('IO[bytes]', proc.stdin)
+                stdout = cast('IO[bytes]', proc.stdout)
+                try:
+                    stdin.write(request)
+                    stdin.flush()
+                    return self.__read_reply(stdout, name)
+                except ObjectNotFoundError:
+                    raise
+                except (BrokenPipeError, EOFError):
+                    self.__stop()
+                    if retry:
+                        raise
+                except BaseException:
+                    # Any other failure, even an interrupt, can leave a
+                    # reply unread, out of step with the next request.
+                    self.__stop()
+                    raise
+            raise AssertionError('unreachable')
+
+    def request_many(self, names: Iterable[str], /
+                     ) -> Iterator[tuple[str, GitObjectType, int, bytes|None]]:
+        '''
+        Look up many objects, pipelining the requests.
+
+        Requests are written in chunks of `PIPELINE_CHUNK` names before
+        reading the replies. This keeps the pending requests small enough
+        to fit in the pipe buffer, so neither side can block the other.
+
+        Objects that are missing or ambiguous are skipped.
+
+        PARAMETERS
+        ----------
+        names: Iterable[str]
+            The object names, normally full hashes.
+
+        RETURNS
+        -------
+        Iterator[tuple[str, GitObjectType, int, bytes|None]]
+            The name, type, size, and contents (`None` for `--batch-check`)
+            of each object found, in the order requested.
+        '''
+        names = (n for n in names if '\n' not in n)
+        while chunk := list(islice(names, PIPELINE_CHUNK)):
+            yield from self.__request_chunk(chunk)
+
+    def __request_chunk(self, chunk: list[str]
+                        ) -> list[tuple[str, GitObjectType, int, bytes|None]]:
+        '''
+        Send one chunk of requests, and collect the replies.
+        '''
+        request = ''.join(f'{name}\n' for name in chunk).encode()
+        with self.__lock:
+            for retry in (False, True):
+                proc = self.__running()
+                stdin = cast('IO[bytes]', proc.stdin)
+                stdout = cast('IO[bytes]', proc.stdout)
+                try:
+                    stdin.write(request)
+                    stdin.flush()
+                    result = []
+                    for name in chunk:
+                        with suppress(ObjectNotFoundError):
+                            result.append((name, *self.__read_reply(stdout, name)))
+                    return result
+                except (BrokenPipeError, EOFError):
+                    self.__stop()
+                    if retry:
+                        raise
+                except BaseException:
+                    self.__stop()
+                    raise
+            raise AssertionError('unreachable')
+
+    def __repr__(self):
+        proc = self.__proc
+        pid = proc.pid if proc is not None and proc.poll() is None else None
+        return (f'{type(self).__name__}({self.__mode!r}, '
+                f'cwd={str(self.__cwd)!r}, {pid=})')
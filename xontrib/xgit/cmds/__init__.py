@@ -1,9 +1,11 @@
 from xontrib.xgit.cmds.cd import git_cd
 from xontrib.xgit.cmds.pwd import git_pwd
 from xontrib.xgit.cmds.ls import git_ls
+from xontrib.xgit.cmds.diff import git_diff
 
 __all__ = [
     "git_cd",
+    "git_diff",
     "git_ls",
     "git_pwd",
 ]
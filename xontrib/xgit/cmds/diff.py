@@ -0,0 +1,85 @@
+'''
+The xgit diff command.
+'''
+from typing import Optional
+
+from xontrib.xgit.context_types import GitContext
+from xontrib.xgit.decorators import command, xgit
+from xontrib.xgit.diff import RENAME_LIMIT, Diffable, TreeChange, diff_trees
+from xontrib.xgit.types import GitNoRepositoryException, GitNoWorktreeException
+from xontrib.xgit.views import View, TableView
+
+@command(
+    for_value=True,
+    export=True,
+    prefix=(xgit, 'diff'),
+    flags={'table': True, 'recursive': True, 'renames': True, 'copies': True,
+           'patch': True},
+)
+def git_diff(old: Optional[str] = None,
+             new: Optional[str] = None, *,
+             XGIT: GitContext,
+             table: bool=False,
+             recursive: bool=True,
+             renames: bool=False,
+             copies: bool=False,
+             patch: bool=False,
+             threshold: float|str=0.5,
+             limit: int|str=RENAME_LIMIT,
+             workers: Optional[int|str]=None,
+             **_) -> list[TreeChange]|View|str:
+    """
+    List the paths changed between two commits or trees.
+
+    With no arguments, list the changes made by the current commit;
+    with one, the changes made by that commit; with two, the changes
+    from the first to the second. Commits are named as for `git rev-parse`.
+    Use `--no-recursive` to compare only the top-level entries,
+    `--renames` to detect renamed files, and `--copies` to also detect
+    copied files. Use `--patch` to show the changes to the files, line by
+    line, as a unified diff.
+
+    For renames and copies, `--threshold` is the lowest similarity (0.5),
+    `--limit` the most added files to search (`RENAME_LIMIT`), and
+    `--workers` the number of processes to search in (by default, one per
+    CPU for large searches). See `find_renames`.
+    """
+    if not XGIT:
+        raise GitNoRepositoryException()
+    try:
+        repository = XGIT.worktree.repository
+    except GitNoWorktreeException:
+        repository = XGIT.repository
+
+    def resolve(rev: str) -> Diffable:
+        return repository.get_object(repository.rev_parse(rev))
+
+    before: Optional[Diffable]
+
+    if new is not None:
+        before, after = resolve(old or 'HEAD'), resolve(new)
+    else:
+        after = resolve(old) if old is not None else XGIT.commit
+        if after.type != 'commit':
+            raise ValueError(f'Not a commit: {old}')
+        parents = after.parents
+        before = parents[0] if parents else None
+    changes = list(diff_trees(before, after, recursive=recursive,
+                              renames=renames, copies=copies,
+                              threshold=float(threshold), limit=int(limit),
+                              workers=None if workers is None else int(workers)))
+    if patch:
+        return '\n'.join(p for p in (c.patch() for c in changes) if p)
+    if table:
+        return TableView([
+            {
+                'status': c.status if c.score is None else f'{c.status}{c.score:03d}',
+                'mode': (c.new or c.old).mode,
+                'old': c.old.hash[:8] if c.old else '',
+                'new': c.new.hash[:8] if c.new else '',
+                'path': (str(c.path) if c.score is None or c.old is None
+                         else f'{c.old.path} -> {c.path}'),
+            }
+            for c in changes
+        ])
+    return changes
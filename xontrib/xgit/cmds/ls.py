@@ -50,6 +50,9 @@ def git_ls(path: Path | str = Path('.'), *,
     except GitNoWorktreeException:
         git_path = XGIT.path
         val = do_ls(git_path)
+    if isinstance(val, GitEntryTree):
+        # Load the entry sizes for the listing in one batch.
+        val.prefetch()
     if table:
         val = TableView(val)
     return val
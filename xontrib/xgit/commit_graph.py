@@ -0,0 +1,388 @@
+'''
+Memory-mapped access to git's commit-graph files.
+
+`git commit-graph write` (run by `git gc` and `git maintenance`) stores the
+parents, root tree, commit time, and generation number of each commit in a
+compact table, so they can be read without inflating and parsing the commit.
+
+The graph is either a single file, `objects/info/commit-graph`, or a chain of
+files in `objects/info/commit-graphs/`, listed base-first in
+`commit-graph-chain`. In a chain, commits are numbered across all the files,
+and each file's parents may refer to commits in the files before it.
+
+Each file is a set of chunks:
+
+- `OIDF`: 256-entry fanout table over the first byte of the commit ids.
+- `OIDL`: the sorted commit ids.
+- `CDAT`: tree id, two parent positions, generation and commit time.
+- `EDGE`: the extra parents of octopus merges.
+- `GDA2`/`GDO2`: corrected commit date offsets (generation number v2).
+
+The graph is only a cache: commits not (yet) in it are read from the object
+database as usual.
+'''
+
+from collections.abc import Iterator
+import mmap
+from pathlib import Path
+import struct
+from threading import Lock
+from typing import NamedTuple
+
+from xontrib.xgit.types import CommitId, GitException, ObjectId, TreeId
+
+GRAPH_MAGIC = b'CGPH'
+
+PARENT_NONE = 0x70000000
+PARENT_EXTRA = 0x80000000
+'''
+In the second parent slot: the rest is an index into the `EDGE` chunk.
+'''
+EDGE_LAST = 0x80000000
+'''
+In the `EDGE` chunk: this is the last parent of the commit.
+'''
+GDA2_OVERFLOW = 0x80000000
+'''
+In the `GDA2` chunk: the rest is an index into the `GDO2` chunk.
+'''
+
+HASH_SIZES = {1: 20, 2: 32}
+
+
+class CommitGraphError(GitException):
+    '''
+    A commit-graph file is malformed or unsupported.
+    '''
+
+
+class CommitInfo(NamedTuple):
+    '''
+    The information about a commit available from the commit-graph.
+    '''
+    tree: TreeId
+    parents: tuple[CommitId, ...]
+    commit_time: int
+    '''
+    The committer timestamp, in seconds since the epoch.
+    '''
+    generation: int
+    '''
+    The generation number: corrected commit date if the graph has it,
+    otherwise the topological level. If `a` is an ancestor of `b`,
+    `a.generation < b.generation`.
+    '''
+
+
+class _CommitGraphFile:
+    '''
+    One memory-mapped commit-graph file.
+    '''
+    __map: mmap.mmap
+    __hash_size: int
+    __count: int
+    __base: int
+    __fanout: int
+    __oids: int
+    __data: int
+    __edges: int|None
+    __gda2: int|None
+    __gdo2: int|None
+
+    @property
+    def count(self) -> int:
+        '''
+        The number of commits in this file.
+        '''
+        return self.__count
+
+    @property
+    def base(self) -> int:
+        '''
+        The position of this file's first commit in the chain.
+        '''
+        return self.__base
+
+    @property
+    def has_generation_v2(self) -> bool:
+        return self.__gda2 is not None
+
+    def __init__(self, path: Path, /, *, base: int = 0):
+        with path.open('rb') as f:
+            self.__map = m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, hash_version, nchunks = struct.unpack_from('>4sBBB', m, 0)
+            if magic != GRAPH_MAGIC or version != 1 or hash_version not in HASH_SIZES:
+                raise CommitGraphError(f'Unsupported commit-graph: {path}')
+            self.__hash_size = HASH_SIZES[hash_version]
+            chunks: dict[bytes, int] = {}
+            for i in range(nchunks):
+                id, offset = struct.unpack_from('>4sQ', m, 8 + 12 * i)
+                chunks[id] = offset
+            try:
+                self.__fanout = chunks[b'OIDF']
+                self.__oids = chunks[b'OIDL']
+                self.__data = chunks[b'CDAT']
+            except KeyError as ex:
+                raise CommitGraphError(f'Missing chunk {ex} in {path}') from None
+        except (struct.error, CommitGraphError):
+            m.close()
+            raise
+        self.__edges = chunks.get(b'EDGE')
+        self.__gda2 = chunks.get(b'GDA2')
+        self.__gdo2 = chunks.get(b'GDO2')
+        self.__count = struct.unpack_from('>I', m, self.__fanout + 255 * 4)[0]
+        self.__base = base
+
+    def __oid(self, i: int) -> bytes:
+        start = self.__oids + i * self.__hash_size
+        return self.__map[start:start + self.__hash_size]
+
+    def oid(self, pos: int, /) -> bytes:
+        '''
+        The binary id of the commit at chain position `pos`.
+        '''
+        return self.__oid(pos - self.__base)
+
+    def find(self, oid: bytes, /) -> int|None:
+        '''
+        The chain position of a commit, or `None` if not in this file.
+        '''
+        m = self.__map
+        first = oid[0]
+        fanout = self.__fanout
+        lo = struct.unpack_from('>I', m, fanout + (first - 1) * 4)[0] if first else 0
+        hi = struct.unpack_from('>I', m, fanout + first * 4)[0]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            name = self.__oid(mid)
+            if name < oid:
+                lo = mid + 1
+            elif name > oid:
+                hi = mid
+            else:
+                return mid + self.__base
+        return None
+
+    def entry(self, pos: int, /, *, corrected: bool = True
+              ) -> tuple[bytes, list[int], int, int]:
+        '''
+        Decode the `CDAT` entry for the commit at chain position `pos`.
+
+        If `corrected` is false, or the file has no `GDA2` chunk, the
+        generation is the topological level rather than the corrected
+        commit date.
+
+        RETURNS
+        -------
+        tree: bytes
+            The binary id of the root tree.
+        parents: list[int]
+            The chain positions of the parents.
+        commit_time: int
+            The committer timestamp.
+        generation: int
+            The generation number.
+        '''
+        m = self.__map
+        i = pos - self.__base
+        hs = self.__hash_size
+        start = self.__data + i * (hs + 16)
+        tree = m[start:start + hs]
+        p1, p2, high, low = struct.unpack_from('>IIII', m, start + hs)
+        parents: list[int] = []
+        if p1 != PARENT_NONE:
+            parents.append(p1)
+        if p2 & PARENT_EXTRA:
+            if self.__edges is None:
+                raise CommitGraphError('Octopus merge without an EDGE chunk')
+            edge = p2 & ~PARENT_EXTRA
+            while True:
+                p = struct.unpack_from('>I', m, self.__edges + edge * 4)[0]
+                parents.append(p & ~EDGE_LAST)
+                if p & EDGE_LAST:
+                    break
+                edge += 1
+        elif p2 != PARENT_NONE:
+            parents.append(p2)
+        commit_time = ((high & 0x3) << 32) | low
+        generation = high >> 2
+        if corrected and self.__gda2 is not None:
+            offset = struct.unpack_from('>I', m, self.__gda2 + i * 4)[0]
+            if offset & GDA2_OVERFLOW:
+                if self.__gdo2 is None:
+                    raise CommitGraphError('Generation overflow without a GDO2 chunk')
+                index = offset & ~GDA2_OVERFLOW
+                offset = struct.unpack_from('>Q', m, self.__gdo2 + index * 8)[0]
+            generation = commit_time + offset
+        return tree, parents, commit_time, generation
+
+    def close(self):
+        self.__map.close()
+
+
+def _graph_paths(info: Path, /) -> list[Path]:
+    '''
+    The commit-graph files for an `objects/info` directory, base first.
+    '''
+    chain = info / 'commit-graphs' / 'commit-graph-chain'
+    if chain.is_file():
+        return [
+            info / 'commit-graphs' / f'graph-{line.strip()}.graph'
+            for line in chain.read_text().splitlines()
+            if line.strip()
+        ]
+    single = info / 'commit-graph'
+    if single.is_file():
+        return [single]
+    return []
+
+
+def graph_usable(repository: Path, /) -> bool:
+    '''
+    Whether the commit-graph can be trusted for this repository.
+
+    Like git, we ignore it in shallow repositories and with grafts or
+    replacement refs, which change the parents of commits.
+    '''
+    from xontrib.xgit.native import has_replacements
+    if (repository / 'shallow').exists():
+        return False
+    if (repository / 'info' / 'grafts').exists():
+        return False
+    return not has_replacements(repository)
+
+
+class _CommitGraph:
+    '''
+    The commit-graph of a repository: a single file, or a chain of them.
+
+    The files are re-read if they change (e.g. after `git gc`) and a commit
+    is not found.
+    '''
+    __info: Path
+    __files: list[_CommitGraphFile]
+    __corrected: bool
+    __stamp: tuple
+    __lock: Lock
+
+    def __init__(self, objects: Path, /):
+        self.__info = objects / 'info'
+        self.__files = []
+        self.__corrected = False
+        self.__stamp = ()
+        self.__lock = Lock()
+        self.refresh()
+
+    @property
+    def count(self) -> int:
+        '''
+        The number of commits in the graph.
+        '''
+        return sum(f.count for f in self.__files)
+
+    def __bool__(self) -> bool:
+        return bool(self.__files)
+
+    def __scan_stamp(self) -> tuple:
+        stamp = []
+        for path in (self.__info / 'commit-graph',
+                     self.__info / 'commit-graphs' / 'commit-graph-chain'):
+            try:
+                stamp.append(path.stat().st_mtime_ns)
+            except OSError:
+                stamp.append(0)
+        return tuple(stamp)
+
+    def refresh(self) -> bool:
+        '''
+        Re-read the graph files if they have changed.
+        Returns `True` if they were re-read.
+        '''
+        with self.__lock:
+            stamp = self.__scan_stamp()
+            if stamp == self.__stamp:
+                return False
+            self.__stamp = stamp
+            for f in self.__files:
+                f.close()
+            files: list[_CommitGraphFile] = []
+            base = 0
+            try:
+                for path in _graph_paths(self.__info):
+                    f = _CommitGraphFile(path, base=base)
+                    files.append(f)
+                    base += f.count
+            except (OSError, ValueError, struct.error, CommitGraphError):
+                for f in files:
+                    f.close()
+                files = []
+            self.__files = files
+            # Generation numbers are only comparable if every file has
+            # the same kind.
+            self.__corrected = bool(files) and all(f.has_generation_v2 for f in files)
+            return True
+
+    def __file(self, pos: int) -> _CommitGraphFile:
+        for f in self.__files:
+            if pos < f.base + f.count:
+                return f
+        raise CommitGraphError(f'Commit position out of range: {pos}')
+
+    def __find(self, oid: bytes) -> int|None:
+        # Newer files are smaller and hold the most recent commits.
+        for f in reversed(self.__files):
+            pos = f.find(oid)
+            if pos is not None:
+                return pos
+        return None
+
+    def position(self, hash: str, /) -> int|None:
+        '''
+        The position of a commit in the graph, or `None` if not present.
+        '''
+        oid = bytes.fromhex(hash)
+        pos = self.__find(oid)
+        if pos is None and self.refresh():
+            pos = self.__find(oid)
+        return pos
+
+    def oid(self, pos: int, /) -> CommitId:
+        '''
+        The id of the commit at `pos`.
+        '''
+        return CommitId(ObjectId(self.__file(pos).oid(pos).hex()))
+
+    def entry(self, pos: int, /) -> tuple[bytes, list[int], int, int]:
+        '''
+        The raw entry for the commit at `pos`, with parents as positions.
+        See `_CommitGraphFile.entry`.
+        '''
+        return self.__file(pos).entry(pos, corrected=self.__corrected)
+
+    def info(self, hash: str, /) -> CommitInfo|None:
+        '''
+        Look up a commit. Returns `None` if it is not in the graph.
+        '''
+        pos = self.position(hash)
+        if pos is None:
+            return None
+        tree, parents, commit_time, generation = self.entry(pos)
+        return CommitInfo(
+            tree=TreeId(ObjectId(tree.hex())),
+            parents=tuple(self.oid(p) for p in parents),
+            commit_time=commit_time,
+            generation=generation,
+        )
+
+    def __iter__(self) -> Iterator[CommitId]:
+        for f in self.__files:
+            for pos in range(f.base, f.base + f.count):
+                yield CommitId(ObjectId(f.oid(pos).hex()))
+
+    def close(self):
+        with self.__lock:
+            for f in self.__files:
+                f.close()
+            self.__files = []
+            self.__stamp = ()
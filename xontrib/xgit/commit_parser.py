@@ -0,0 +1,134 @@
+'''
+Decoding of raw git commit objects, singly or streamed from
+`git rev-list --header`.
+
+A commit is a header, a blank line, and the message:
+
+    tree <id>
+    parent <id>            (any number)
+    author <name> <<email>> <time> <tz>
+    committer <name> <<email>> <time> <tz>
+    gpgsig -----BEGIN PGP SIGNATURE-----
+     <continuation lines begin with a space>
+
+    <message>
+
+Other headers (`encoding`, `mergetag`, ...) are skipped, as git does.
+
+`git rev-list --header` writes each commit as its id, a newline, and the
+commit as `git log --format=raw` shows it, ended by a NUL. The message is
+indented by four spaces. Leading and trailing blank lines of the message,
+and whitespace at the ends of lines, are dropped. Messages read from
+commit objects are cleaned up in the same way, so either way a commit
+has the message that `git log` shows.
+'''
+
+from typing import NamedTuple
+
+from xontrib.xgit.types import CommitId, GitValueError, ObjectId, TreeId
+
+SIGNATURE_HEADERS = (b'gpgsig ', b'gpgsig-sha256 ')
+'''
+The headers that hold a signature of the commit.
+'''
+
+INDENT = 4
+'''
+How far `git log --format=raw` indents each line of the message.
+'''
+
+
+class CommitFields(NamedTuple):
+    '''
+    The parsed contents of a commit. The author and committer are their
+    header lines, less the header name.
+    '''
+    tree: TreeId
+    parents: tuple[CommitId, ...]
+    author: str
+    committer: str
+    signature: str
+    message: str
+
+
+def _message(lines: list[str], /) -> str:
+    '''
+    Join the lines of a message, without trailing whitespace and
+    surrounding blank lines.
+    '''
+    lines = [line.rstrip() for line in lines]
+    start = 0
+    end = len(lines)
+    while start < end and not lines[start]:
+        start += 1
+    while end > start and not lines[end - 1]:
+        end -= 1
+    return '\n'.join(lines[start:end])
+
+
+def _fields(header: bytes, message: str, /) -> CommitFields:
+    '''
+    Parse the header lines of a commit, and pair them with its message.
+    '''
+    tree = ''
+    parents: list[CommitId] = []
+    author = committer = ''
+    sig_lines: list[bytes] = []
+    in_sig = False
+    for line in header.split(b'\n'):
+        if line[:1] == b' ':
+            if in_sig:
+                sig_lines.append(line.rstrip())
+            continue
+        in_sig = False
+        name, _, value = line.partition(b' ')
+        match name:
+            case b'tree':
+                tree = value.decode()
+            case b'parent':
+                parents.append(CommitId(ObjectId(value.decode())))
+            case b'author':
+                author = value.decode()
+            case b'committer':
+                committer = value.decode()
+            case _ if line.startswith(SIGNATURE_HEADERS):
+                in_sig = True
+                sig_lines.append(line.rstrip())
+    if not tree:
+        raise GitValueError(f'No tree in commit header: {header[:100]!r}')
+    return CommitFields(
+        tree=TreeId(ObjectId(tree)),
+        parents=tuple(parents),
+        author=author,
+        committer=committer,
+        signature=b'\n'.join(sig_lines).decode(),
+        message=message,
+    )
+
+
+def _lines(text: str, /) -> list[str]:
+    '''
+    Split text into lines at `\\n`, `\\r\\n`, or `\\r`.
+    '''
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text.split('\n')
+
+
+def parse_commit(data: bytes, /) -> CommitFields:
+    '''
+    Parse the raw contents of a commit object.
+    '''
+    header, _, message = data.partition(b'\n\n')
+    return _fields(header, _message(_lines(message.decode())))
+
+
+def parse_rev_list_record(record: bytes, /) -> tuple[CommitId, CommitFields]:
+    '''
+    Parse one NUL-delimited record of `git rev-list --header` output.
+    '''
+    id, _, rest = record.partition(b'\n')
+    header, _, message = rest.partition(b'\n\n')
+    text = '\n'.join(line[INDENT:] for line in message.decode().split('\n'))
+    return CommitId(ObjectId(id.decode())), _fields(header, _message(_lines(text)))
+
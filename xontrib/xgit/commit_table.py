@@ -0,0 +1,250 @@
+'''
+The metadata of many commits, as columns of NumPy arrays.
+
+For looking at a whole history at once, such as counting commits per
+author per week, a `CommitTable` holds only the commit ids, the author
+and committer of each commit, their times and timezones, and the
+parents, in arrays indexed by row:
+
+* `author_time` and `committer_time` are `int64` seconds since the epoch,
+  and `author_tz` and `committer_tz` are `int64` seconds east of UTC.
+* `author` and `committer` are `int32` ids of people in `people`, an
+  `IdentityTable`. With a `.mailmap`, `canonical` maps them to the ids of
+  their canonical identities.
+* The parents are in compressed sparse row form: the parents of row `i`
+  are `parent_rows[parent_start[i]:parent_start[i+1]]`, the row of each
+  parent, or -1 if it is not in the table. Their ids are in `parent_ids`,
+  in the same order.
+
+The table is read from one `git log -z` process, with no commit objects
+created. NumPy is needed (`xpip install numpy`), but only when a table
+is made.
+'''
+
+from collections.abc import Iterable
+import csv
+from pathlib import Path
+from typing import IO, Literal, NamedTuple
+
+try:
+    import numpy as np
+except ImportError as ex:
+    raise ImportError('A commit table needs NumPy: xpip install numpy') from ex
+
+from xontrib.xgit.identities import IdentityTable, Mailmap
+from xontrib.xgit.person import tz_minutes
+from xontrib.xgit.types import CommitId, GitValueError, ObjectId
+
+LOG_FORMAT = '%x1f'.join(('%H', '%P', '%an <%ae>', '%ad', '%cn <%ce>', '%cd'))
+'''
+The `git log --format` for each row, with `--date=raw`.
+'''
+
+LOG_ARGS = ('-z', '--no-show-signature', '--date=raw', f'--format={LOG_FORMAT}')
+'''
+The arguments to `git log` to list the rows of a table.
+'''
+
+DAY = 24 * 60 * 60
+WEEK = 7 * DAY
+MONDAY = -3 * DAY
+'''
+The start of the week of the epoch (a Thursday), in seconds.
+'''
+
+
+class PersonCounts(NamedTuple):
+    '''
+    How many commits each person made in each period, one row for each
+    person and period with any.
+    '''
+    person: 'np.ndarray'
+    '''
+    The id of each person in `CommitTable.people`.
+    '''
+    start: 'np.ndarray'
+    '''
+    The start of each period, in seconds since the epoch, in the local time
+    of the commits. `start.astype('datetime64[s]')` gives the dates.
+    '''
+    count: 'np.ndarray'
+
+
+class CommitTable:
+    '''
+    The ids, authors, committers, times, and parents of many commits, as
+    columns. See the module documentation for the columns.
+    '''
+    ids: list[CommitId]
+    people: IdentityTable
+    author: 'np.ndarray'
+    author_time: 'np.ndarray'
+    author_tz: 'np.ndarray'
+    committer: 'np.ndarray'
+    committer_time: 'np.ndarray'
+    committer_tz: 'np.ndarray'
+    parent_start: 'np.ndarray'
+    parent_rows: 'np.ndarray'
+    parent_ids: list[CommitId]
+    __rows: dict[CommitId, int]
+
+    def __init__(self, records: Iterable[bytes],
+                 people: IdentityTable|None = None, /):
+        '''
+        PARAMETERS
+        ----------
+        records: Iterable[bytes]
+            The output of `git log` with `LOG_ARGS`, split at each NUL.
+        people: IdentityTable|None
+            The people already known, such as those of a context. New
+            people are added to it.
+        '''
+        if people is None:
+            people = IdentityTable()
+        self.people = people
+        person = people.intern
+        ids: list[CommitId] = []
+        parent_ids: list[CommitId] = []
+        parent_counts: list[int] = []
+        author: list[int] = []
+        author_time: list[int] = []
+        author_tz: list[int] = []
+        committer: list[int] = []
+        committer_time: list[int] = []
+        committer_tz: list[int] = []
+
+        for record in records:
+            if not record:
+                continue
+            try:
+                id, parents, a, a_date, c, c_date = record.decode().split('\x1f')
+            except ValueError:
+                raise GitValueError(
+                    f'Invalid commit table row: {record[:100]!r}') from None
+            ids.append(CommitId(ObjectId(id)))
+            split = parents.split()
+            parent_ids.extend(CommitId(ObjectId(p)) for p in split)
+            parent_counts.append(len(split))
+            a_time, a_tz = a_date.split(' ')
+            c_time, c_tz = c_date.split(' ')
+            author.append(person(a))
+            author_time.append(int(a_time))
+            author_tz.append(tz_minutes(a_tz) * 60)
+            committer.append(person(c))
+            committer_time.append(int(c_time))
+            committer_tz.append(tz_minutes(c_tz) * 60)
+
+        self.ids = ids
+        self.author = np.array(author, dtype=np.int32)
+        self.author_time = np.array(author_time, dtype=np.int64)
+        self.author_tz = np.array(author_tz, dtype=np.int64)
+        self.committer = np.array(committer, dtype=np.int32)
+        self.committer_time = np.array(committer_time, dtype=np.int64)
+        self.committer_tz = np.array(committer_tz, dtype=np.int64)
+        self.parent_start = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(parent_counts, out=self.parent_start[1:])
+        rows = {id: row for row, id in enumerate(ids)}
+        self.parent_rows = np.array([rows.get(p, -1) for p in parent_ids],
+                                    dtype=np.int64)
+        self.parent_ids = parent_ids
+        self.__rows = rows
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row(self, id: CommitId|str, /) -> int:
+        '''
+        The row of a commit, by its id. Raises `KeyError` if not in the table.
+        '''
+        return self.__rows[CommitId(ObjectId(id))]
+
+    @property
+    def parent_count(self) -> 'np.ndarray':
+        '''
+        The number of parents of each commit.
+        '''
+        return np.diff(self.parent_start)
+
+    def parents(self, row: int, /) -> list[CommitId]:
+        '''
+        The ids of the parents of the commit in `row`.
+        '''
+        start, end = self.parent_start[row:row + 2]
+        return self.parent_ids[start:end]
+
+    def canonical(self, mailmap: Mailmap, /, *,
+                  role: Literal['author', 'committer'] = 'author',
+                  ) -> 'np.ndarray':
+        '''
+        The ids of the canonical identities of the authors, or committers,
+        under `mailmap`.
+        '''
+        ids = self.author if role == 'author' else self.committer
+        lookup = np.array(self.people.canonical_ids(mailmap), dtype=np.int32)
+        return lookup[ids]
+
+    def count_by_person(self, period: int = WEEK, /, *,
+                        role: Literal['author', 'committer'] = 'author',
+                        mailmap: Mailmap|None = None,
+                        ) -> PersonCounts:
+        '''
+        Count the commits of each person in each period of their local time.
+
+        PARAMETERS
+        ----------
+        period: int
+            The length of each period, in seconds. Periods of whole weeks
+            start on Mondays. Default: `WEEK`.
+        role: Literal['author', 'committer']
+            Whether to count by author, and author time, or committer.
+        mailmap: Mailmap|None
+            If given, count each person's commits under all their names.
+
+        RETURNS
+        -------
+        PersonCounts
+            The counts, in order of person, then period.
+        '''
+        if period <= 0:
+            raise GitValueError(f'Invalid period: {period}')
+        if role == 'author':
+            person, time, tz = self.author, self.author_time, self.author_tz
+        else:
+            person, time, tz = self.committer, self.committer_time, self.committer_tz
+        if mailmap is not None:
+            person = self.canonical(mailmap, role=role)
+        origin = MONDAY if period % WEEK == 0 else 0
+        start = (time + tz - origin) // period * period + origin
+        keys, count = np.unique(np.stack([person.astype(np.int64), start], axis=1),
+                                axis=0, return_counts=True)
+        return PersonCounts(keys[:, 0].astype(np.int32), keys[:, 1], count)
+
+    def to_csv(self, file: str|Path|IO[str], /):
+        '''
+        Write the table as CSV, one line per commit, with the parents
+        separated by spaces and times in seconds since the epoch.
+        '''
+        if isinstance(file, (str, Path)):
+            with open(file, 'w', newline='', encoding='utf-8') as f:
+                self.to_csv(f)
+            return
+        writer = csv.writer(file)
+        writer.writerow(('id', 'parents',
+                         'author_name', 'author_email', 'author_time', 'author_tz',
+                         'committer_name', 'committer_email',
+                         'committer_time', 'committer_tz'))
+        person = self.people.person
+        starts = self.parent_start.tolist()
+        columns = zip(self.author.tolist(), self.author_time.tolist(),
+                      self.author_tz.tolist(),
+                      self.committer.tolist(), self.committer_time.tolist(),
+                      self.committer_tz.tolist(), strict=True)
+        for row, (a, a_time, a_tz, c, c_time, c_tz) in enumerate(columns):
+            author, committer = person(a), person(c)
+            writer.writerow((self.ids[row],
+                             ' '.join(self.parent_ids[starts[row]:starts[row + 1]]),
+                             author.name, author.email, a_time, a_tz,
+                             committer.name, committer.email, c_time, c_tz))
+
+    def __repr__(self):
+        return f'{type(self).__name__}({len(self)} commits)'
@@ -33,7 +33,7 @@ from xonsh.lib.pretty import RepresentationPrinter
 from xonsh.events import events
 
 from xontrib.xgit.git_cmd import _GitCmd
-from xontrib.xgit.person import Person
+from xontrib.xgit.identities import IdentityTable
 from xontrib.xgit.types import (
     ObjectId, CommitId, GitObjectReference,
     GitNoRepositoryException, GitNoWorktreeException,
@@ -52,8 +52,12 @@ from xontrib.xgit.context_types import (
     GitWorktree
 )
 import xontrib.xgit.repository as rr
+from xontrib.xgit.repository import OBJECT_CACHE_SIZE
 import xontrib.xgit.worktree as wt
-from xontrib.xgit.utils import path_and_parents, relative_to_home, shorten_branch
+from xontrib.xgit.utils import (
+    path_and_parents, relative_to_home, shorten_branch, env_number,
+)
+from xontrib.xgit.object_store import _ObjectStore, _ObjectsView
 
 ROOT_REPO_PATH = PurePosixPath()
 
@@ -463,10 +467,17 @@ class _GitContext(_GitCmd, GitContext):
             events.on_xgit_commit_change.fire(old=self.__commit, new=commit)
             self.__commit = commit
 
-    __objects: dict[ObjectId, 'ot.GitObject']
+    __store: _ObjectStore
+    @property
+    def store(self) -> _ObjectStore:
+        '''
+        The objects in use (or recently used) by all our repositories.
+        '''
+        return self.__store
+
     @property
     def objects(self) -> Mapping[ObjectId, 'ot.GitObject']:
-        return MappingProxyType(self.__objects)
+        return _ObjectsView(self.__store)
 
     @property
     def root(self) -> GitEntryTree:
@@ -480,9 +491,9 @@ class _GitContext(_GitCmd, GitContext):
                                  path=PurePosixPath("."))
         return entry
 
-    __people: dict[str, Person]
+    __people: IdentityTable
     @property
-    def people(self) -> dict[str, Person]:
+    def people(self) -> IdentityTable:
         return self.__people
 
     __object_references: defaultdict[ObjectId, set[GitObjectReference]]
@@ -512,7 +523,8 @@ class _GitContext(_GitCmd, GitContext):
         self.__path = PurePosixPath()
         self.__repositories = {}
         self.__worktrees = {}
-        self.__objects = {}
+        self.__store = _ObjectStore(
+            int(env_number('XGIT_OBJECT_CACHE_SIZE', OBJECT_CACHE_SIZE)))
         self.__branch = None
         self.__commit = None
         if worktree is None:
@@ -531,7 +543,7 @@ class _GitContext(_GitCmd, GitContext):
         else:
             self.commit = None
         self.branch = branch
-        self.__people = dict()
+        self.__people = IdentityTable()
         self.__object_references = defaultdict(set)
 
 
@@ -15,7 +15,7 @@ classes are complex. It is very easy to end up with circular imports.
 
 from abc import abstractmethod
 from pathlib import Path, PurePosixPath
-from collections.abc import Mapping
+from collections.abc import Iterable, Iterator, Mapping, Sequence
 from typing import (
     Literal, Protocol, overload, runtime_checkable, Optional,
     TypeAlias, TYPE_CHECKING, cast,
@@ -26,14 +26,23 @@ from xonsh.built_ins import XonshSession
 from xontrib.xgit.types import (
     GitObjectReference, GitObjectType, GitException,
     ObjectId, GitRepositoryId, GitReferenceType,
+    PrefetchField,
 )
 from xontrib.xgit.views.json_types import Jsonable
-import xontrib.xgit.person as people
 import xontrib.xgit.git_cmd as gc
 import xontrib.xgit.object_types as ot
 import xontrib.xgit.ref_types as rt
 if TYPE_CHECKING:
     from xontrib.xgit.context_types import GitWorktree
+    import xontrib.xgit.entry_types as et
+    import xontrib.xgit.commit_graph as cg
+    import xontrib.xgit.ancestry as anc
+    import xontrib.xgit.object_store as ost
+    import xontrib.xgit.cache as cache
+    import xontrib.xgit.disk_cache as dc
+    import xontrib.xgit.text_info as ti
+    import xontrib.xgit.commit_table as ctab
+    import xontrib.xgit.identities as ident
 
 WorktreeMap: TypeAlias = dict[Path, 'GitWorktree']
 
@@ -149,6 +158,102 @@ class GitRepository(Jsonable, gc.GitCmd, Protocol):
         '''
         ...
 
+    @abstractmethod
+    def prefetch(self,
+                 objects: 'Iterable[ot.GitObject|et.GitEntry|ObjectId]',
+                 /, *,
+                 fields: Sequence[PrefetchField] = ('type', 'size'),
+                 ) -> Mapping[ObjectId, tuple[GitObjectType, int]]:
+        '''
+        Load the types and sizes of many objects at once, filling in
+        any sizes that have yet to be loaded.
+        '''
+        ...
+
+    @abstractmethod
+    def text_info(self, blobs: Iterable[ObjectId], /
+                  ) -> 'Mapping[ObjectId, ti.TextInfo]':
+        '''
+        Classify many blobs as text or binary at once, and guess the
+        encoding of the text, from the start of each. The results are kept.
+        '''
+        ...
+
+    @abstractmethod
+    def commits(self, revspec: str|Sequence[str] = 'HEAD', /, *,
+                limit: Optional[int] = None,
+                paths: Iterable[str|PurePosixPath] = (),
+                ) -> 'Iterator[ot.GitCommit]':
+        '''
+        Load many commits at once, as listed by `git rev-list`, newest
+        first, from a single `git rev-list --header` process.
+        '''
+        ...
+
+    @abstractmethod
+    def commit_table(self, revspec: str|Sequence[str] = 'HEAD', /, *,
+                     limit: Optional[int] = None,
+                     paths: Iterable[str|PurePosixPath] = (),
+                     ) -> 'ctab.CommitTable':
+        '''
+        The authors, committers, times, and parents of many commits, as
+        NumPy arrays, without loading the commits. Needs NumPy.
+        '''
+        ...
+
+    @property
+    @abstractmethod
+    def mailmap(self) -> 'ident.Mailmap':
+        '''
+        The repository's committed `.mailmap`, parsed once per context.
+        '''
+        ...
+
+    @abstractmethod
+    def commit_info(self, hash: str, /) -> 'cg.CommitInfo|None':
+        '''
+        Look up a commit's parents, tree, commit time, and generation number
+        in the commit-graph, without reading the commit itself.
+
+        Returns `None` if the repository has no commit-graph, or the commit
+        is not in it.
+        '''
+        ...
+
+    @property
+    @abstractmethod
+    def objects(self) -> 'ost._ObjectStore':
+        '''
+        The objects in use or recently used, shared by `get_object`
+        with the other repositories in the context.
+        '''
+        ...
+
+    @property
+    @abstractmethod
+    def ancestry(self) -> 'anc._Ancestry':
+        '''
+        History walking and queries for this repository.
+        '''
+        ...
+
+    @property
+    @abstractmethod
+    def blob_cache(self) -> 'cache._BlobCache[ObjectId]':
+        '''
+        The contents of recently read blobs.
+        '''
+        ...
+
+    @property
+    @abstractmethod
+    def disk_cache(self) -> 'dc._DiskCache|None':
+        '''
+        The persistent cache of object metadata, if enabled by
+        `$XGIT_DISK_CACHE_MB`.
+        '''
+        ...
+
     @abstractmethod
     def add_reference(self,
                       target: ObjectId,
@@ -271,6 +376,15 @@ class GitContext(Jsonable, Protocol):
         '''
         ...
 
+    @property
+    @abstractmethod
+    def store(self) -> 'ost._ObjectStore':
+        '''
+        The objects in use (or recently used) by all the repositories,
+        keyed by object id.
+        '''
+        ...
+
     @property
     @abstractmethod
     def session(self) -> XonshSession:
@@ -383,9 +497,10 @@ class GitContext(Jsonable, Protocol):
 
     @property
     @abstractmethod
-    def people(self) -> dict[str, 'people.Person']:
+    def people(self) -> 'ident.IdentityTable':
         '''
-        The people associated with the repository.
+        The people seen in the context's repositories, each with a small
+        integer id, and their canonical identities under a `.mailmap`.
         '''
         ...
 
@@ -0,0 +1,434 @@
+'''
+Comparison of git trees.
+
+`diff_trees` compares the compact contents of two trees, one directory at
+a time. Subtrees with the same id are identical, so they are never read:
+comparing two commits that touch a few files reads only the trees on the
+paths to those files, however large the repository.
+
+`find_renames` pairs up added and deleted files: first those with the
+same id, then those with similar contents (see `similarity.py`).
+
+`TreeChange.hunks` and `TreeChange.patch` compare the changed files line
+by line (see `line_diff.py`).
+'''
+
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+import os
+from pathlib import PurePosixPath
+from typing import NamedTuple, Optional, TypeAlias, cast
+
+from xontrib.xgit.types import DiffStatus, GitValueError, ObjectId
+from xontrib.xgit.similarity import (
+    CANDIDATES, SimilarityIndex, init_worker, match_many,
+)
+from xontrib.xgit.line_diff import CONTEXT, Hunk, diff_lines
+from xontrib.xgit.tree_parser import TreeEntries
+from xontrib.xgit.entry_types import GitEntry, GitEntryTree
+from xontrib.xgit.object_types import GitBlob, GitCommit, GitTagObject
+import xontrib.xgit.objects as xo
+
+Diffable: TypeAlias = 'xo._GitTree|GitCommit|GitTagObject|GitEntryTree'
+'''
+The things that can be compared with `diff_trees`: trees, and the
+commits, tags and tree entries that refer to them.
+'''
+
+RENAME_LIMIT = 20_000
+'''
+The default for the most added files, or sources, to search for
+renames by similarity. Git compares every pair, and its
+`diff.renameLimit` is 1000; the similarity index scores each added
+file against only a few sources, so the search can go much further.
+'''
+
+
+class TreeChange(NamedTuple):
+    '''
+    A change to one path between two trees.
+    '''
+    status: DiffStatus
+    path: PurePosixPath
+    old: Optional[GitEntry]
+    '''
+    The entry in the old tree, or `None` if the path was added.
+    '''
+    new: Optional[GitEntry]
+    '''
+    The entry in the new tree, or `None` if the path was deleted.
+    '''
+    score: Optional[int] = None
+    '''
+    For renames and copies, the percentage of the contents in common.
+    '''
+
+    def __str__(self):
+        if self.score is not None and self.old is not None:
+            return f'{self.status}{self.score:03d}\t{self.old.path}\t{self.path}'
+        return f'{self.status}\t{self.path}'
+
+    def hunks(self, *, context: int = CONTEXT) -> Iterator[Hunk]:
+        '''
+        The line-by-line changes to the file, as with `git diff --histogram`.
+        An added or deleted file is compared with an empty one. Nothing
+        is yielded for directories and submodules.
+        '''
+        def data(entry: Optional[GitEntry]) -> Optional[bytes]:
+            if entry is None:
+                return b''
+            if entry.type != 'blob':
+                return None
+            return cast('GitBlob', entry.object).data
+        if self.old is not None and self.new is not None \
+                and self.old.hash == self.new.hash:
+            return iter(())
+        old, new = data(self.old), data(self.new)
+        if old is None or new is None:
+            return iter(())
+        return diff_lines(old, new, context=context)
+
+    def patch(self, *, context: int = CONTEXT) -> str:
+        '''
+        The change as a unified diff, with `---` and `+++` lines naming
+        the old and new paths.
+        '''
+        old = f'a/{self.old.path}' if self.old is not None else '/dev/null'
+        new = f'b/{self.path}' if self.new is not None else '/dev/null'
+        hunks = list(self.hunks(context=context))
+        if not hunks:
+            return ''
+        if hunks[0].binary:
+            return f'Binary files {old} and {new} differ'
+        def tab(name: str) -> str:
+            # As git does, mark the end of names with spaces for `patch`.
+            return name + '\t' if ' ' in name else name
+        return '\n'.join((f'--- {tab(old)}', f'+++ {tab(new)}',
+                          *map(str, hunks)))
+
+
+def diff_trees(old: Optional[Diffable], new: Optional[Diffable], /, *,
+               recursive: bool = True,
+               renames: bool = False,
+               copies: bool = False,
+               threshold: float = 0.5,
+               limit: int = RENAME_LIMIT,
+               candidates: int = CANDIDATES,
+               workers: Optional[int] = None,
+               ) -> Iterator[TreeChange]:
+    '''
+    Compare two trees, like `git diff-tree`.
+
+    PARAMETERS
+    ----------
+    old: Optional[Diffable]
+        The tree to compare from, or a commit, tag or tree entry for it.
+        `None` is an empty tree, as for the parent of a root commit.
+    new: Optional[Diffable]
+        The tree to compare to.
+    recursive: bool
+        Report the changed files within changed subtrees, like
+        `git diff-tree -r`. Otherwise, only the entries of the top tree
+        are compared, and a subtree with changes is reported as modified.
+    renames: bool
+        Detect renamed files, like `git diff -M`. See `find_renames`.
+    copies: bool
+        Also detect files copied from modified or renamed files, like
+        `git diff -C`. This implies `renames`.
+    threshold, limit, candidates, workers:
+        How renames and copies are searched for; see `find_renames`.
+
+    RETURNS
+    -------
+    Iterator[TreeChange]
+        The changes, in path order. An entry that changes between a tree
+        and a file is reported as deleted and added, as git does.
+    '''
+    changes = _diff(_tree(old), _tree(new), PurePosixPath(), recursive)
+    if renames or copies:
+        return iter(find_renames(changes, copies=copies,
+                                 threshold=threshold, limit=limit,
+                                 candidates=candidates, workers=workers))
+    return changes
+
+
+def _tree(x: Optional[Diffable]) -> 'xo._GitTree|None':
+    match x:
+        case None:
+            return None
+        case xo._GitTree():
+            return x
+        case GitCommit():
+            return _tree(x.tree)
+        case GitTagObject():
+            return _tree(x.object)
+        case GitEntryTree():
+            return _tree(x.object)
+        case _:
+            raise GitValueError(f'Not a tree, commit or tag: {x!r}')
+
+
+def _key(name: str, kind: tuple[str, str]) -> str:
+    '''
+    The sort key for an entry. Git sorts trees as if their names ended
+    with a `/`.
+    '''
+    return name + '/' if kind[1] == 'tree' else name
+
+
+EMPTY = TreeEntries([], [], b'', 20)
+
+
+def _diff(old: 'xo._GitTree|None', new: 'xo._GitTree|None',
+          path: PurePosixPath,
+          recursive: bool,
+          ) -> Iterator[TreeChange]:
+    if old is not None and new is not None and old.hash == new.hash:
+        return
+    a = old._unpacked() if old is not None else EMPTY
+    b = new._unpacked() if new is not None else EMPTY
+    hs = (a if old is not None else b).hash_size
+    index: dict[str, int] = {}
+    pairs: Iterable[tuple[int, int]]
+    if a.names == b.names:
+        # Only contents or modes changed: entries pair up by position.
+        positions = set(_differ(memoryview(a.ids), memoryview(b.ids),
+                                hs, 0, len(a.names)))
+        if a.kinds != b.kinds:
+            kinds = zip(a.kinds, b.kinds, strict=True)
+            positions.update(i for i, (x, y) in enumerate(kinds) if x != y)
+        pairs = ((i, i) for i in sorted(positions))
+    else:
+        index = dict(zip(b.names, range(len(b.names)), strict=True))
+        pairs = ((i, index.pop(name, -1)) for i, name in enumerate(a.names))
+    # (sort key, status, position in old, position in new), -1 if absent.
+    changes: list[tuple[str, DiffStatus, int, int]] = []
+    for i, j in pairs:
+        name = a.names[i]
+        kind = a.kinds[i]
+        if j < 0:
+            changes.append((_key(name, kind), 'D', i, -1))
+            continue
+        other = b.kinds[j]
+        if (kind[1] == 'tree') != (other[1] == 'tree'):
+            changes.append((_key(name, kind), 'D', i, -1))
+            changes.append((_key(name, other), 'A', -1, j))
+        elif kind[0][:2] != other[0][:2]:
+            changes.append((_key(name, kind), 'T', i, j))
+        elif kind != other or a.ids[i * hs:(i + 1) * hs] != b.ids[j * hs:(j + 1) * hs]:
+            changes.append((_key(name, kind), 'M', i, j))
+    for name, j in index.items():
+        changes.append((_key(name, b.kinds[j]), 'A', -1, j))
+    changes.sort()
+
+    if recursive:
+        xo._GitTree._expand_all([
+            *(old._tree_at(i) for _, _, i, _ in changes
+              if i >= 0 and a.kinds[i][1] == 'tree'),
+            *(new._tree_at(j) for _, _, _, j in changes
+              if j >= 0 and b.kinds[j][1] == 'tree'),
+        ])
+    for _, status, i, j in changes:
+        if recursive:
+            if i >= 0 and a.kinds[i][1] == 'tree':
+                sub = path / a.names[i]
+                if j >= 0:
+                    yield from _diff(old._tree_at(i), new._tree_at(j), sub, True)
+                else:
+                    yield from _all(old._tree_at(i), sub, 'D')
+                continue
+            if j >= 0 and b.kinds[j][1] == 'tree':
+                yield from _all(new._tree_at(j), path / b.names[j], 'A')
+                continue
+        yield TreeChange(
+            status,
+            path / (a.names[i] if i >= 0 else b.names[j]),
+            old._entry_at(i, path) if i >= 0 else None,
+            new._entry_at(j, path) if j >= 0 else None,
+        )
+
+
+def _differ(a: memoryview, b: memoryview, hs: int, lo: int, hi: int,
+            ) -> Iterator[int]:
+    '''
+    The positions from `lo` to `hi` whose ids differ, found by comparing
+    halves of the range, so that a few changes in a large tree are found
+    with a few block comparisons.
+    '''
+    if a[lo * hs:hi * hs] == b[lo * hs:hi * hs]:
+        return
+    if hi - lo == 1:
+        yield lo
+        return
+    mid = (lo + hi) // 2
+    yield from _differ(a, b, hs, lo, mid)
+    yield from _differ(a, b, hs, mid, hi)
+
+
+def _all(tree: 'xo._GitTree',
+         path: PurePosixPath,
+         status: DiffStatus,
+         ) -> Iterator[TreeChange]:
+    '''
+    Report every file in an added or deleted tree.
+    '''
+    contents = tree._unpacked()
+    for i, name in enumerate(contents.names):
+        if contents.kinds[i][1] == 'tree':
+            yield from _all(tree._tree_at(i), path / name, status)
+        else:
+            entry = tree._entry_at(i, path)
+            yield TreeChange(status, path / name,
+                             entry if status == 'D' else None,
+                             entry if status == 'A' else None)
+
+
+POOL_TARGETS = 2_000
+'''
+The number of added files above which `find_renames` scores them in
+a process pool, if there is more than one CPU, unless told how many
+workers to use.
+'''
+
+
+def find_renames(changes: Iterable[TreeChange], /, *,
+                 copies: bool = False,
+                 threshold: float = 0.5,
+                 limit: int = RENAME_LIMIT,
+                 candidates: int = CANDIDATES,
+                 workers: Optional[int] = None,
+                 ) -> list[TreeChange]:
+    '''
+    Pair added files with deleted files they were renamed from, like
+    `git diff -M`, replacing each pair with a single `R` change.
+
+    Files with the same id are paired first. The remaining files are
+    paired by the similarity of their contents, best match first.
+
+    PARAMETERS
+    ----------
+    changes: Iterable[TreeChange]
+        The changes from `diff_trees`.
+    copies: bool
+        Also report added files similar to the old contents of modified
+        files, or to already-renamed files, as copies (`C`), like
+        `git diff -C`.
+    threshold: float
+        The lowest similarity, from 0.0 to 1.0, for a rename or copy.
+    limit: int
+        Skip the similarity search if there are more than this many
+        added files or candidate sources, like git's `diff.renameLimit`.
+        Files with the same id are still paired. Default: `RENAME_LIMIT`.
+    candidates: int
+        The most deleted files to compare each added file with, chosen by
+        the content they share. See `similarity.SimilarityIndex`.
+    workers: Optional[int]
+        The number of processes to score the candidates in. By default,
+        a process pool is used for searches of more than `POOL_TARGETS`
+        added files; `0` or `1` scores in this process.
+
+    RETURNS
+    -------
+    list[TreeChange]
+        The changes, with the renames and copies in place of their added
+        files, and without the deletions of renamed files.
+    '''
+    changes = list(changes)
+    deleted = [c.old for c in changes if c.status == 'D' and c.old.type == 'blob']
+    sources: list[GitEntry] = [*deleted]
+    if copies:
+        sources += [c.old for c in changes if c.status == 'M' and c.old.type == 'blob']
+    targets = [i for i, c in enumerate(changes)
+               if c.status == 'A' and c.new.type == 'blob']
+    if not sources or not targets:
+        return changes
+
+    found: dict[int, TreeChange] = {}
+    renamed: set[int] = set()
+
+    def pair(t: int, s: int, score: float) -> None:
+        old, new = sources[s], changes[t].new
+        if s < len(deleted) and s not in renamed:
+            renamed.add(s)
+            status: DiffStatus = 'R'
+        elif copies:
+            status = 'C'
+        else:
+            return
+        found[t] = TreeChange(status, changes[t].path, old, new, int(score * 100))
+
+    # Exact matches: the same contents, and the same kind of file.
+    by_id: dict[tuple[ObjectId, str], list[int]] = {}
+    for s, entry in enumerate(sources):
+        by_id.setdefault((entry.hash, entry.mode[:2]), []).append(s)
+    for t in targets:
+        new = changes[t].new
+        same = by_id.get((new.hash, new.mode[:2]))
+        if same:
+            unused = [s for s in same if s < len(deleted) and s not in renamed]
+            pair(t, unused[0] if unused else same[0], 1.0)
+
+    # Inexact matches, by similarity.
+    remaining = [t for t in targets if t not in found]
+    usable = [s for s in range(len(sources)) if copies or s not in renamed]
+    if remaining and usable and len(remaining) <= limit and len(usable) <= limit:
+        for score, t, s in _score(changes, sources, remaining, usable,
+                                  threshold, candidates, workers):
+            if t not in found and changes[t].new.mode[:2] == sources[s].mode[:2]:
+                pair(t, s, score)
+
+    gone = {id(sources[s]) for s in renamed}
+    return [
+        found.get(i, c)
+        for i, c in enumerate(changes)
+        if not (c.status == 'D' and id(c.old) in gone)
+    ]
+
+
+def _cpus() -> int:
+    '''
+    The number of CPUs this process may run on.
+    '''
+    with suppress(AttributeError):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _score(changes: Sequence[TreeChange],
+           sources: Sequence[GitEntry],
+           targets: Sequence[int],
+           usable: Sequence[int],
+           threshold: float,
+           candidates: int,
+           workers: Optional[int],
+           ) -> list[tuple[float, int, int]]:
+    '''
+    Score the target changes against the usable sources, returning
+    `(score, target, source)` for the pairs above the threshold, best first.
+    '''
+    source_data = [sources[s].object.data for s in usable]
+    target_data = [changes[t].new.object.data for t in targets]
+    if workers is None:
+        workers = _cpus() if len(targets) > POOL_TARGETS else 0
+    index = SimilarityIndex(source_data, candidates=candidates)
+    found: list[tuple[float, int, int]] = []
+    if workers <= 1:
+        for t, data in enumerate(target_data):
+            found += [(score, t, s) for score, s in index.matches(data, threshold)]
+    else:
+        # The index and contents go to each worker once, and the targets
+        # are shared out by position.
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=init_worker,
+                                 initargs=(index, target_data)) as pool:
+            batch = max(1, len(targets) // (workers * 4))
+            jobs = [
+                pool.submit(match_many, start,
+                            min(start + batch, len(targets)), threshold)
+                for start in range(0, len(targets), batch)
+            ]
+            for job in jobs:
+                found += job.result()
+    found.sort(key=lambda f: (-f[0], f[1], f[2]))
+    return [(score, targets[t], usable[s]) for score, t, s in found]
@@ -0,0 +1,432 @@
+'''
+A persistent cache of object metadata, in SQLite, kept between sessions.
+
+Git objects never change, so what is learned about an object can be kept
+with no need to invalidate it. For each object id, the cache keeps its
+type and size and, for commits, trees and tags, the raw contents, from
+which the commit headers and tree listings are decoded without asking
+git. Blob contents are not kept.
+
+Each repository has its own database, `$XDG_CACHE_HOME/xgit/<id>.sqlite`,
+named by the repository id, so clones of the same project share one.
+
+Lookups read the database directly. Additions are collected in memory,
+where they can be read at once, and written in batches by a background
+thread, which also records, to the hour, when entries are last used. When the database
+grows past its budget, the least recently used entries are deleted; the
+space they free is reused for new entries.
+
+Any error from SQLite (a full disk, a damaged file, ...) disables the
+cache for the rest of the session, and objects are read as usual.
+'''
+
+from collections.abc import Iterable
+from contextlib import closing, suppress
+import os
+from pathlib import Path
+import sqlite3
+from threading import Event, Lock, Thread
+import time
+from typing import NamedTuple
+import weakref
+
+from xontrib.xgit.cache import CacheStats
+from xontrib.xgit.types import GitObjectType, ObjectId
+
+FLUSH_SECONDS = 2.0
+'''
+How long additions wait in memory before they are written.
+'''
+
+FLUSH_BATCH = 2000
+'''
+How many additions are written at once, without waiting.
+'''
+
+QUERY_BATCH = 500
+'''
+How many ids are looked up in one query, within SQLite's limit on
+query parameters.
+'''
+
+USE_RESOLUTION = 60 * 60
+'''
+How precisely, in seconds, the last use of each entry is kept. An entry
+used again within this time is not written again.
+'''
+
+PRUNE_TO = 0.9
+'''
+The fraction of the budget to prune down to when it is exceeded.
+'''
+
+STORED_TYPES: frozenset[GitObjectType] = frozenset(('commit', 'tree', 'tag'))
+'''
+The types of objects whose contents are kept.
+'''
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS objects (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    data BLOB,
+    used INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS objects_used ON objects (used);
+'''
+
+
+def cache_dir() -> Path:
+    '''
+    The directory for the caches: `$XDG_CACHE_HOME/xgit`, by default
+    `~/.cache/xgit`.
+    '''
+    from xonsh.built_ins import XSH
+    env = XSH.env
+    base = env.get('XDG_CACHE_HOME') if env is not None else None
+    base = base or os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'xgit'
+
+
+class CachedObject(NamedTuple):
+    '''
+    What the cache knows about an object.
+    '''
+    type: GitObjectType
+    size: int
+    data: bytes|None
+    '''
+    The raw contents of a commit, tree or tag; `None` for a blob.
+    '''
+
+
+def _connect(path: Path, /) -> sqlite3.Connection:
+    '''
+    Open the database, creating it if need be.
+    '''
+    db = sqlite3.connect(path, timeout=5, isolation_level=None,
+                         check_same_thread=False)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    db.executescript(SCHEMA)
+    return db
+
+
+class _DiskCacheWriter:
+    '''
+    The additions and uses not yet written, and the thread that writes them.
+    '''
+    __path: Path
+    __budget: int
+    __lock: Lock
+    __wake: Event
+    __thread: Thread|None
+    __stopped: bool
+    pending: dict[str, CachedObject]
+    '''
+    The additions not yet written. Read by lookups, under `lock`.
+    '''
+    __used: set[str]
+    failed: bool
+
+    @property
+    def lock(self) -> Lock:
+        return self.__lock
+
+    def __init__(self, path: Path, budget: int, /):
+        self.__path = path
+        self.__budget = budget
+        self.__lock = Lock()
+        self.__wake = Event()
+        self.__thread = None
+        self.__stopped = False
+        self.pending = {}
+        self.__used = set()
+        self.failed = False
+
+    def add(self, id: str, entry: CachedObject, /):
+        '''
+        Queue an entry to be written. Must be called with the lock held.
+        '''
+        if self.__stopped or self.failed:
+            return
+        old = self.pending.get(id)
+        if old is not None and old.data is not None and entry.data is None:
+            return
+        self.pending[id] = entry
+        if len(self.pending) >= FLUSH_BATCH:
+            self.__wake.set()
+        self.__start()
+
+    def use(self, ids: Iterable[str], /):
+        '''
+        Note that entries were used. Must be called with the lock held.
+        '''
+        if self.__stopped or self.failed:
+            return
+        self.__used.update(ids)
+        self.__start()
+
+    def __start(self):
+        if self.__thread is None:
+            self.__thread = Thread(target=self.__run, name='xgit-disk-cache',
+                                   daemon=True)
+            self.__thread.start()
+
+    def __run(self):
+        try:
+            with closing(_connect(self.__path)) as db:
+                while not self.__stopped:
+                    self.__wake.wait(FLUSH_SECONDS)
+                    self.__wake.clear()
+                    self.__write(db)
+                self.__write(db)
+        except sqlite3.Error:
+            self.failed = True
+
+    def __write(self, db: sqlite3.Connection, /):
+        '''
+        Write what has been queued, then prune if over budget.
+        '''
+        with self.__lock:
+            pending = self.pending
+            used = self.__used
+            if not pending and not used:
+                return
+            # Lookups still see the entries until they are written.
+            self.pending = dict(pending)
+            self.__used = set()
+        now = int(time.time())
+        with db:
+            db.execute('BEGIN')
+            # An entry first seen by a type and size check gets its
+            # contents when they are read.
+            db.executemany(
+                'INSERT INTO objects (id, type, size, data, used) '
+                'VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (id) DO UPDATE SET '
+                'data = coalesce(excluded.data, data), used = excluded.used',
+                ((id, e.type, e.size, e.data, now) for id, e in pending.items()))
+            db.executemany('UPDATE objects SET used = ? WHERE id = ?',
+                           ((now, id) for id in used if id not in pending))
+        self.__prune(db)
+        with self.__lock:
+            for id in pending:
+                if self.pending.get(id) is pending[id]:
+                    del self.pending[id]
+
+    def __prune(self, db: sqlite3.Connection, /):
+        '''
+        Delete the least recently used entries, if the database is over
+        its budget. Freed pages are reused, so the file stays near the budget.
+        '''
+        pages = db.execute('PRAGMA page_count').fetchone()[0]
+        free = db.execute('PRAGMA freelist_count').fetchone()[0]
+        page_size = db.execute('PRAGMA page_size').fetchone()[0]
+        size = (pages - free) * page_size
+        if size <= self.__budget:
+            return
+        count = db.execute('SELECT count(*) FROM objects').fetchone()[0]
+        excess = 1 - self.__budget * PRUNE_TO / size
+        with db:
+            db.execute('BEGIN')
+            db.execute('DELETE FROM objects WHERE id IN '
+                       '(SELECT id FROM objects ORDER BY used LIMIT ?)',
+                       (max(1, int(count * excess)),))
+
+    def flush(self):
+        '''
+        Wait for everything queued so far to be written.
+        '''
+        thread = self.__thread
+        while thread is not None and thread.is_alive():
+            with self.__lock:
+                if not self.pending and not self.__used:
+                    return
+            self.__wake.set()
+            time.sleep(0.01)
+
+    def stop(self):
+        '''
+        Write everything queued, and stop the thread.
+        '''
+        self.__stopped = True
+        self.__wake.set()
+        thread = self.__thread
+        if thread is not None:
+            thread.join(timeout=10)
+
+
+class _DiskCache:
+    '''
+    The persistent cache of one repository's object metadata.
+    '''
+    __path: Path
+    __budget: int
+    __db: sqlite3.Connection|None
+    __writer: _DiskCacheWriter
+    __hits: int
+    __misses: int
+
+    @property
+    def path(self) -> Path:
+        '''
+        The database file.
+        '''
+        return self.__path
+
+    @property
+    def budget(self) -> int:
+        '''
+        The size the database is kept under, in bytes.
+        '''
+        return self.__budget
+
+    @property
+    def enabled(self) -> bool:
+        '''
+        Whether the cache is in use: false after an error.
+        '''
+        return self.__db is not None and not self.__writer.failed
+
+    @property
+    def stats(self) -> CacheStats:
+        entries = 0
+        if self.enabled:
+            with suppress(sqlite3.Error), self.__writer.lock:
+                entries = self.__query('SELECT count(*) FROM objects').fetchone()[0]
+        return CacheStats(self.__hits, self.__misses, entries,
+                          self.__path.stat().st_size if self.__path.exists() else 0,
+                          self.__budget)
+
+    def __init__(self, path: Path, budget: int, /):
+        '''
+        PARAMETERS
+        ----------
+        path: Path
+            The database file, created if need be.
+        budget: int
+            The size to keep the database under, in bytes.
+        '''
+        self.__path = path
+        self.__budget = budget
+        self.__hits = 0
+        self.__misses = 0
+        self.__writer = _DiskCacheWriter(path, budget)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.__db = _connect(path)
+        except (OSError, sqlite3.Error):
+            self.__db = None
+        weakref.finalize(self, self.__writer.stop)
+
+    def __query(self, sql: str, params: tuple = (), /) -> sqlite3.Cursor:
+        assert self.__db is not None
+        return self.__db.execute(sql, params)
+
+    def get(self, id: ObjectId|str, /) -> CachedObject|None:
+        '''
+        What is known about an object, or `None`.
+        '''
+        if not self.enabled:
+            return None
+        writer = self.__writer
+        with writer.lock:
+            found = writer.pending.get(id)
+            if found is None:
+                try:
+                    row = self.__query('SELECT type, size, data, used FROM objects '
+                                       'WHERE id = ?', (id,)).fetchone()
+                except sqlite3.Error:
+                    self.__disable()
+                    return None
+                if row is None:
+                    self.__misses += 1
+                    return None
+                type, size, data, used = row
+                found = CachedObject(type, size, data)
+                if used < time.time() - USE_RESOLUTION:
+                    writer.use((id,))
+        self.__hits += 1
+        return found
+
+    def get_many(self, ids: Iterable[ObjectId|str], /) -> dict[str, CachedObject]:
+        '''
+        What is known about each of many objects. Unknown ones are left out.
+        '''
+        if not self.enabled:
+            return {}
+        writer = self.__writer
+        result: dict[str, CachedObject] = {}
+        wanted: list[str] = []
+        asked = 0
+        old: list[str] = []
+        stale = time.time() - USE_RESOLUTION
+        with writer.lock:
+            pending = writer.pending
+            for id in ids:
+                asked += 1
+                entry = pending.get(id)
+                if entry is None:
+                    wanted.append(id)
+                else:
+                    result[id] = entry
+            try:
+                for start in range(0, len(wanted), QUERY_BATCH):
+                    batch = wanted[start:start + QUERY_BATCH]
+                    marks = ','.join('?' * len(batch))
+                    rows = self.__query(
+                        'SELECT id, type, size, data, used FROM objects '
+                        f'WHERE id IN ({marks})', tuple(batch))
+                    for id, type, size, data, used in rows:
+                        result[id] = CachedObject(type, size, data)
+                        if used < stale:
+                            old.append(id)
+            except sqlite3.Error:
+                self.__disable()
+                return result
+            writer.use(old)
+        self.__hits += len(result)
+        self.__misses += asked - len(result)
+        return result
+
+    def put(self, id: ObjectId|str, type: GitObjectType, size: int,
+            data: bytes|None = None, /):
+        '''
+        Remember an object's type and size, and its contents if a commit,
+        tree or tag. Written in the background. Contents added for an
+        object already known are kept; they are never removed.
+        '''
+        if not self.enabled:
+            return
+        if type not in STORED_TYPES:
+            data = None
+        with self.__writer.lock:
+            self.__writer.add(id, CachedObject(type, size, data))
+
+    def flush(self):
+        '''
+        Wait for everything added so far to be written.
+        '''
+        self.__writer.flush()
+
+    def close(self):
+        '''
+        Write everything added, and close the database.
+        '''
+        self.__writer.stop()
+        if self.__db is not None:
+            self.__db.close()
+            self.__db = None
+
+    def __disable(self):
+        db = self.__db
+        self.__db = None
+        if db is not None:
+            with suppress(sqlite3.Error):
+                db.close()
+
+    def __repr__(self):
+        state = '' if self.enabled else ', disabled'
+        return f'{type(self).__name__}({str(self.__path)!r}{state})'
@@ -17,16 +17,19 @@ classes are complex. It is very easy to end up with circular imports.
 
 from types import MappingProxyType
 from typing import Optional, TypeAlias, cast
-from collections.abc import ItemsView, ValuesView, Mapping
+from collections.abc import (
+    Callable, ItemsView, Iterator, ValuesView, Mapping, Sequence,
+)
 from pathlib import PurePosixPath
 
 
 from xonsh.lib.pretty import RepresentationPrinter
 from xontrib.xgit.context_types import GitRepository
 from xontrib.xgit.identity_set import IdentitySet
+from xontrib.xgit.line_diff import CONTEXT, Hunk
 import xontrib.xgit.objects as xo
 from xontrib.xgit.types import (
-    GitEntryMode, ObjectId,
+    GitEntryMode, GitObjectType, ObjectId, PrefetchField,
 )
 from xontrib.xgit.entry_types import (
     GitEntry, ParentObject, OBJ,
@@ -44,10 +47,23 @@ class _GitEntry(GitEntry[OBJ]):
     it was found in.
     """
 
+    __slots__ = (
+        '__mode',
+        '__name',
+        '__object',
+        '__parent',
+        '__parent_object',
+        '__path',
+        '__repository',
+    )
+
     __name: str
     __object: OBJ
     __mode: GitEntryMode
-    __path: PurePosixPath
+    __path: PurePosixPath|None
+    '''
+    The path, or `None` for just the name (built on first use).
+    '''
     __parent_object: Optional[ParentObject]
     __parent: Optional['GitEntryTree']
     __repository: GitRepository
@@ -126,6 +142,8 @@ class _GitEntry(GitEntry[OBJ]):
 
     @property
     def path(self) -> PurePosixPath:
+        if self.__path is None:
+            self.__path = PurePosixPath(self.__name)
         return self.__path
 
     def __init__(self,
@@ -133,7 +151,7 @@ class _GitEntry(GitEntry[OBJ]):
                  name: str,
                  mode: GitEntryMode,
                  repository: GitRepository,
-                 path: PurePosixPath,
+                 path: PurePosixPath|None,
                  parent_object: Optional['ParentObject|ObjectId']=None,
                  parent: Optional['GitEntryTree']=None,
             ):
@@ -149,7 +167,6 @@ class _GitEntry(GitEntry[OBJ]):
             po = parent.object
         self.__parent_object = po
         self.__parent = parent
-        self.__hashes = {}
 
     #def __hasattr__(self, name):
     #    return hasattr(self._object, name)
@@ -183,6 +200,18 @@ class _GitEntry(GitEntry[OBJ]):
 
 
 class _GitEntryTree(_GitEntry[ot.GitTree], GitEntryTree):
+    __slots__ = ('__paths',)
+
+    __paths: dict[str, GitEntry]|None
+    '''
+    The entries found below this one, by relative path, with their full
+    paths and parents. Created on the first lookup.
+    '''
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__paths = None
+
     @property
     def hashes(self) -> Mapping[ObjectId, IdentitySet[GitEntry, int]]:
         return MappingProxyType(self.object.hashes)
@@ -195,48 +224,74 @@ class _GitEntryTree(_GitEntry[ot.GitTree], GitEntryTree):
         return entry
 
     def get(self, name, default=None):
-
-        path = self.path
-        loc = self
-        if path is None:
-            path = PurePosixPath('.')
-
-        name = PurePosixPath(name)
-
-        last = len(name.parts) - 1
-        for i, part in enumerate(name.parts):
-            match part:
-                case '.' | '':
-                    continue
-                case '..':
-                    if (loc.parent is None) or (path.parent == path):
-                        return default
+        parts = [
+            p for p in (name.split('/') if isinstance(name, str)
+                        else PurePosixPath(name).parts)
+            if p not in ('', '.')
+        ]
+        if '..' in parts:
+            loc = self
+            for part in parts:
+                if part == '..':
                     loc = loc.parent
-                    path = path.parent
-                case _:
-                    if loc.type != "tree" and i != last:
-                        return default
-                    loc = cast(GitEntryTree, loc)
-
-                    loc = loc.object.get(part)
-                    if loc is None:
-                        return default
-                    elif i == last:
-                        return loc
-                    path = path / part
-                    obj = loc.object
-                    _, entry = obj._git_entry(obj.object,
-                                            loc.name, loc.mode, loc.type, loc.size,
-                                            repository=self.repository,
-                                            path=path,
-                                            parent_entry=loc,
-                                            parent=loc.parent)
-                    loc = entry
-        return loc
+                else:
+                    loc = loc.get(part) if loc.type == 'tree' else None
+                if loc is None:
+                    return default
+            return loc
+        if not parts:
+            return self
+        entry = self.__lookup(tuple(parts))
+        return default if entry is None else entry
+
+    def __lookup(self, parts: tuple[str, ...]) -> GitEntry|None:
+        '''
+        The entry at the path given by `parts`, creating it (and the entries
+        for the directories above it) on the first lookup.
+        '''
+        paths = self.__paths
+        if paths is None:
+            paths = self.__paths = {}
+        key = '/'.join(parts)
+        entry = paths.get(key)
+        if entry is None:
+            parent = self if len(parts) == 1 else self.__lookup(parts[:-1])
+            if parent is None or parent.type != 'tree':
+                return None
+            tree = parent.object
+            child = tree.get(parts[-1])
+            if child is None:
+                return None
+            _, entry = tree._git_entry(child.object, child.name, child.mode,
+                                       child.type, -1, self.repository,
+                                       parent=tree, parent_entry=parent,
+                                       path=parent.path)
+            paths[key] = entry
+        return entry
 
     def __contains__(self, name):
         return name in self.object
 
+    def walk(self, /, *,
+             topdown: bool = True,
+             filter: Optional[Callable[[PurePosixPath, GitObjectType], bool]] = None,
+             unique: bool = False,
+             ) -> Iterator[tuple[PurePosixPath, list[str], list[str]]]:
+        tree = cast('xo._GitTree', self.object)
+        seen = set() if unique else None
+        for path, _, dirs, files in tree._walk(self.path, topdown, filter, seen):
+            yield path, dirs, files
+
+    def rglob(self, pattern: str, /) -> Iterator[GitEntry]:
+        return cast('xo._GitTree', self.object)._rglob(self.path, pattern)
+
+    def prefetch(self, fields: Sequence[PrefetchField] = ('type', 'size')):
+        '''
+        Load the sizes of all the entries in one batch.
+        '''
+        self.object.prefetch(fields)
+        return self
+
     def items(self) -> ItemsView[str, EntryObject]:
         return cast(ItemsView[str,EntryObject], self.object.items())
 
@@ -261,6 +316,8 @@ class _GitEntryTree(_GitEntry[ot.GitTree], GitEntryTree):
 
 
 class _GitEntryCommit(_GitEntry[ot.GitCommit], GitEntryCommit):
+    __slots__ = ()
+
     @property
     def message(self):
         return self.object.message
@@ -286,14 +343,40 @@ class _GitEntryCommit(_GitEntry[ot.GitCommit], GitEntryCommit):
         return self.object.signature
 
 class _GitEntryBlob(_GitEntry[ot.GitBlob], GitEntryBlob):
+    __slots__ = ()
+
     @property
     def data(self):
         return self.object.data
 
+    @property
+    def buffer(self):
+        return self.object.buffer
+
+    @property
+    def is_binary(self):
+        return self.object.is_binary
+
+    @property
+    def encoding(self):
+        return self.object.encoding
+
     @property
     def lines(self):
         return self.object.lines
 
+    def line(self, n: int, /) -> str:
+        return self.object.line(n)
+
+    def reader(self):
+        return self.object.reader()
+
     @property
     def stream(self):
         return self.object.stream
+
+    def diff(self, other: 'ot.GitBlob|GitEntryBlob', /, *,
+             context: int = CONTEXT) -> Iterator[Hunk]:
+        if isinstance(other, GitEntry):
+            other = cast(ot.GitBlob, other.object)
+        return self.object.diff(other, context=context)
@@ -21,6 +21,7 @@ from typing import (
     TYPE_CHECKING,
 )
 from pathlib import PurePosixPath
+from collections.abc import Callable, Iterator
 
 from xontrib.xgit.types import GitEntryMode, GitObjectType, ObjectId
 
@@ -40,6 +41,7 @@ class GitEntry(Generic[OBJ], Protocol):
 
     It makes the fields of the referenced`GetObject available as properties.
     """
+    __slots__ = ()
     @property
     @abstractmethod
     def type(self) -> GitObjectType:
@@ -81,14 +83,36 @@ class GitEntry(Generic[OBJ], Protocol):
 
 @runtime_checkable
 class GitEntryTree(GitEntry, Protocol):
+    __slots__ = ()
+
     __path: Optional[PurePosixPath] = None
     @abstractmethod
     def __getitem__(self, key: str) -> 'GitEntry': ...
 
+    @abstractmethod
+    def walk(self, /, *,
+             topdown: bool = True,
+             filter: Optional[Callable[[PurePosixPath, GitObjectType], bool]] = None,
+             unique: bool = False,
+             ) -> Iterator[tuple[PurePosixPath, list[str], list[str]]]:
+        '''
+        Walk the tree below this entry, like `os.walk`, with paths
+        starting from this entry's path. See `GitTree.walk`.
+        '''
+        ...
+
+    @abstractmethod
+    def rglob(self, pattern: str, /) -> Iterator['GitEntry']:
+        '''
+        The entries anywhere below this one whose paths match `pattern`.
+        See `GitTree.rglob`.
+        '''
+        ...
+
 class GitEntryBlob(GitEntry):
-    ...
+    __slots__ = ()
 
 class GitEntryCommit(GitEntry):
-    ...
+    __slots__ = ()
 
 
@@ -13,13 +13,21 @@ from typing import (
     IO, cast,
     TYPE_CHECKING,
 )
-from collections.abc import Sequence, Iterator
+from collections.abc import Sequence, Iterator, Iterable
 
-from xontrib.xgit.types import ObjectId, CommitId, GitException
+from xontrib.xgit.types import (
+    ObjectId, CommitId, GitException, GitObjectType,
+)
+from xontrib.xgit.cat_file import _CatFileProcess
 
 if TYPE_CHECKING:
     import xontrib.xgit.context_types as ct
 
+READ_CHUNK = 64 * 1024
+'''
+How much output to read at a time when splitting it into records.
+'''
+
 @runtime_checkable
 class GitCmd(Protocol):
     '''
@@ -199,6 +207,33 @@ class GitCmd(Protocol):
         '''
         ...
 
+    @abstractmethod
+    def git_records(self, subcmd: str, *args,
+                    separator: bytes = b'\0',
+                    **kwargs) -> Iterator[bytes]:
+        '''
+        Run a git command and return the output as an iterator of records,
+        as they are read. If the iteration is abandoned, the command is
+        stopped.
+
+        PARAMETERS
+        ----------
+        subcmd: str
+            The git subcommand to run.
+        args: Any
+            The arguments to the command.
+        separator: bytes
+            What ends each record. Default: NUL.
+        kwargs: Any
+            Additional arguments to pass to `subprocess.Popen`.
+
+        RETURNS
+        -------
+        Iterator[bytes]
+            The records, without their separators.
+        '''
+        ...
+
     @abstractmethod
     def git_stream(self, subcmd: str, *args, **kwargs) -> IO[str]:
         '''
@@ -239,6 +274,88 @@ class GitCmd(Protocol):
             The output of the command. .read() returns a bytes object.
         '''
 
+    @abstractmethod
+    def cat_file(self, name: str, /) -> tuple[GitObjectType, bytes]:
+        '''
+        Read an object via a persistent `git cat-file --batch` coprocess.
+
+        Raises `ObjectNotFoundError` if the object does not exist.
+
+        PARAMETERS
+        ----------
+        name: str
+            The name of the object, normally a full hash.
+
+        RETURNS
+        -------
+        type: GitObjectType
+            The type of the object.
+        data: bytes
+            The contents of the object.
+        '''
+        ...
+
+    @abstractmethod
+    def cat_file_check(self, name: str, /) -> tuple[GitObjectType, int]:
+        '''
+        Get the type and size of an object via a persistent
+        `git cat-file --batch-check` coprocess.
+
+        Raises `ObjectNotFoundError` if the object does not exist.
+
+        PARAMETERS
+        ----------
+        name: str
+            The name of the object, normally a full hash.
+
+        RETURNS
+        -------
+        type: GitObjectType
+            The type of the object.
+        size: int
+            The size of the object in bytes.
+        '''
+        ...
+
+    @abstractmethod
+    def cat_file_many(self, names: Iterable[str], /
+                      ) -> Iterator[tuple[str, GitObjectType, bytes]]:
+        '''
+        Read many objects via the `git cat-file --batch` coprocess,
+        pipelining the requests. Missing objects are skipped.
+
+        PARAMETERS
+        ----------
+        names: Iterable[str]
+            The names of the objects, normally full hashes.
+
+        RETURNS
+        -------
+        Iterator[tuple[str, GitObjectType, bytes]]
+            The name, type, and contents of each object found.
+        '''
+        ...
+
+    @abstractmethod
+    def cat_file_check_many(self, names: Iterable[str], /
+                            ) -> Iterator[tuple[str, GitObjectType, int]]:
+        '''
+        Get the types and sizes of many objects via the
+        `git cat-file --batch-check` coprocess, pipelining the requests.
+        Missing objects are skipped.
+
+        PARAMETERS
+        ----------
+        names: Iterable[str]
+            The names of the objects, normally full hashes.
+
+        RETURNS
+        -------
+        Iterator[tuple[str, GitObjectType, int]]
+            The name, type, and size of each object found.
+        '''
+        ...
+
     @abstractmethod
     def rev_parse(self, param: str, /) -> ObjectId:
         '''
@@ -321,6 +438,15 @@ class _GitCmd:
     def context(self) -> 'ct.GitContext':
         return self.__context
 
+    __cat_file: _CatFileProcess|None
+    '''
+    The `git cat-file --batch` coprocess, started on first use.
+    '''
+    __cat_file_check: _CatFileProcess|None
+    '''
+    The `git cat-file --batch-check` coprocess, started on first use.
+    '''
+
     def __get_path(self, path: Path|str|None) -> Path:
         '''
         Get the working directory path for the command.
@@ -340,6 +466,8 @@ class _GitCmd:
         if git is None:
             raise ValueError("git command not found")
         self.__git = Path(git)
+        self.__cat_file = None
+        self.__cat_file_check = None
 
     def run(self, cmd: str|Path, *args,
             cwd: Optional[Path]=None,
@@ -402,6 +530,60 @@ class _GitCmd:
         if code := proc.returncode:
             raise GitException(f"Command failed: {cmd} {args} {code}")
 
+    def run_records(self, cmd: str|Path, *args,
+                    cwd: Optional[Path]=None,
+                    separator: bytes = b'\0',
+                    **kwargs) -> Iterator[bytes]:
+        '''
+        Run a command in the git worktree, repository, or current directory,
+        depending on which subclass this is run from, and split its output
+        into records as it is read.
+
+        If the iteration is abandoned, the command is killed.
+
+        PARAMETERS
+        ----------
+        cmd: str|Path
+            The command to run.
+        args: Any
+            The arguments to the command.
+        cwd: Optional[Path]
+            The directory to run the command in, relative to this context.
+        separator: bytes
+            What ends each record. A final record without one is included.
+        kwargs: Any
+            Additional arguments to pass to `subprocess.Popen`.
+
+        RETURNS
+        -------
+        Iterator[bytes]
+            The records, without their separators.
+        '''
+        proc = Popen([cmd, *(str(a) for a in args)],
+            stdout=PIPE,
+            cwd=self.__get_path(cwd),
+            **kwargs)
+        stream = proc.stdout
+        if stream is None:
+            raise ValueError("No stream")
+        finished = False
+        try:
+            rest = b''
+            while chunk := stream.read1(READ_CHUNK):
+                records = (rest + chunk).split(separator)
+                rest = records.pop()
+                yield from records
+            if rest:
+                yield rest
+            finished = True
+        finally:
+            if not finished:
+                proc.kill()
+            stream.close()
+            proc.wait()
+        if code := proc.returncode:
+            raise GitException(f"Command failed: {cmd} {args} {code}")
+
     def run_stream(self, cmd: str|Path, *args,
                 cwd: Optional[Path]=None,
                 stdout=PIPE,
@@ -508,6 +690,13 @@ class _GitCmd:
         return self.run_lines(str(self.__git), subcmd, *args,
                             **kwargs)
 
+    def git_records(self, subcmd: str, *args,
+                    separator: bytes = b'\0',
+                    **kwargs) -> Iterator[bytes]:
+        return self.run_records(str(self.__git), subcmd, *args,
+                                separator=separator,
+                                **kwargs)
+
     def git_stream(self, subcmd: str, *args,
                 stdout=PIPE,
                 text: bool=False,
@@ -526,6 +715,38 @@ class _GitCmd:
             text=text,
             **kwargs)
 
+    def __batch(self) -> _CatFileProcess:
+        if self.__cat_file is None:
+            self.__cat_file = _CatFileProcess(self.__git, self.__get_path(None),
+                                              mode='--batch')
+        return self.__cat_file
+
+    def __batch_check(self) -> _CatFileProcess:
+        if self.__cat_file_check is None:
+            self.__cat_file_check = _CatFileProcess(self.__git, self.__get_path(None),
+                                                    mode='--batch-check')
+        return self.__cat_file_check
+
+    def cat_file(self, name: str, /) -> tuple[GitObjectType, bytes]:
+        type, _, data = self.__batch().request(name)
+        assert data is not None
+        return type, data
+
+    def cat_file_check(self, name: str, /) -> tuple[GitObjectType, int]:
+        type, size, _ = self.__batch_check().request(name)
+        return type, size
+
+    def cat_file_many(self, names: Iterable[str], /
+                      ) -> Iterator[tuple[str, GitObjectType, bytes]]:
+        for name, type, _, data in self.__batch().request_many(names):
+            assert data is not None
+            yield name, type, data
+
+    def cat_file_check_many(self, names: Iterable[str], /
+                            ) -> Iterator[tuple[str, GitObjectType, int]]:
+        for name, type, size, _ in self.__batch_check().request_many(names):
+            yield name, type, size
+
     def rev_parse(self, param: str, /) -> CommitId:
         return CommitId(ObjectId(self.rev_parse_n(param)[0]))
 
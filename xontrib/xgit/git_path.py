@@ -74,9 +74,9 @@ class GitPath(PurePath):
         return str(self.__object)
 
     def __bytes__(self):
-        t = self.__object.type
         repo = self.__base.repository
-        return bytes(repo.git_binary('cat-file', t, self.__object.hash).read())
+        _, data = repo.cat_file(self.__object.hash)
+        return data
 
     def __eq__(self, other):
         if isinstance(other, GitPath):
@@ -0,0 +1,186 @@
+'''
+Interning of the people in a history, and mapping them to their canonical
+identities with a `.mailmap`.
+
+Every distinct `name <email>` line seen in a context is given a small
+integer id, in the order they are first seen, and one shared `Person`.
+Queries over many commits, like grouping them by author, can then work
+on the ids rather than on the strings.
+
+A `.mailmap` maps the names and emails people have committed under to
+the ones they prefer, one mapping per line:
+
+    Proper Name <commit@email>
+    <proper@email> <commit@email>
+    Proper Name <proper@email> <commit@email>
+    Proper Name <proper@email> Commit Name <commit@email>
+
+Names and emails are matched regardless of case. An entry with a commit
+name applies only to that name; otherwise, it applies to every name
+with the email. `#` begins a comment.
+
+Each `.mailmap` is parsed once, and kept by its blob id, so repositories
+with the same `.mailmap` share it.
+'''
+
+from collections.abc import Callable, Iterator, Mapping
+import re
+
+from xontrib.xgit.person import Person
+from xontrib.xgit.types import ObjectId
+
+RE_ENTRY = re.compile(r'\s*([^<#]*?)\s*<([^>]*)>(?:\s*([^<#]*?)\s*<([^>]*)>)?')
+'''
+A `.mailmap` line: a name and email, and optionally the name and email
+they replace.
+'''
+
+
+class Mailmap:
+    '''
+    A parsed `.mailmap`.
+    '''
+    id: ObjectId|None
+    '''
+    The blob the mailmap was read from, if any.
+    '''
+    __by_email: dict[str, tuple[str|None, str|None]]
+    __by_name_email: dict[tuple[str, str], tuple[str|None, str|None]]
+
+    def __init__(self, text: str = '', /, *, id: ObjectId|None = None):
+        '''
+        PARAMETERS
+        ----------
+        text: str
+            The contents of the `.mailmap`.
+        id: ObjectId|None
+            The blob the contents were read from.
+        '''
+        self.id = id
+        self.__by_email = {}
+        self.__by_name_email = {}
+        for line in text.splitlines():
+            match = RE_ENTRY.match(line)
+            if match is None:
+                continue
+            name, email, old_name, old_email = match.groups()
+            if old_email is None:
+                # `Proper Name <commit@email>`: the email is the one to match.
+                self.__add(self.__by_email, email.lower(), name or None, None)
+            elif old_name:
+                self.__add(self.__by_name_email,
+                           (old_name.lower(), old_email.lower()),
+                           name or None, email or None)
+            else:
+                self.__add(self.__by_email, old_email.lower(),
+                           name or None, email or None)
+
+    @staticmethod
+    def __add(entries: dict, key, name: str|None, email: str|None):
+        # Entries for the same key combine, later ones taking precedence.
+        old_name, old_email = entries.get(key, (None, None))
+        entries[key] = (name or old_name, email or old_email)
+
+    def map(self, name: str, email: str, /) -> tuple[str, str]:
+        '''
+        The canonical name and email for a name and email.
+        '''
+        key = email.lower()
+        entry = self.__by_name_email.get((name.lower(), key))
+        if entry is None:
+            entry = self.__by_email.get(key)
+            if entry is None:
+                return name, email
+        new_name, new_email = entry
+        return new_name or name, new_email or email
+
+    def __len__(self) -> int:
+        return len(self.__by_email) + len(self.__by_name_email)
+
+    def __repr__(self):
+        id = f', id={self.id!r}' if self.id else ''
+        return f'{type(self).__name__}({len(self)} entries{id})'
+
+
+class IdentityTable(Mapping[str, Person]):
+    '''
+    The people seen in a context, each with a small integer id.
+
+    As a mapping, the `Person` for each `name <email>` line seen so far.
+    '''
+    __ids: dict[str, int]
+    __people: list[Person]
+    __mailmaps: dict[ObjectId, Mailmap]
+    __canonical: dict['ObjectId|Mailmap', list[int]]
+
+    def __init__(self):
+        self.__ids = {}
+        self.__people = []
+        self.__mailmaps = {}
+        self.__canonical = {}
+
+    def intern(self, line: str, /) -> int:
+        '''
+        The id of a `name <email>` line, assigning the next one if new.
+        '''
+        id = self.__ids.get(line)
+        if id is None:
+            id = self.__ids[line] = len(self.__people)
+            self.__people.append(Person(line))
+        return id
+
+    def person(self, id: int, /) -> Person:
+        '''
+        The `Person` with an id.
+        '''
+        return self.__people[id]
+
+    def __getitem__(self, line: str) -> Person:
+        return self.__people[self.__ids[line]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__ids)
+
+    def __len__(self) -> int:
+        return len(self.__people)
+
+    def mailmap(self, id: ObjectId, text: Callable[[], str], /) -> Mailmap:
+        '''
+        The mailmap in the blob `id`, parsed from `text()` the first time
+        it is asked for.
+        '''
+        mailmap = self.__mailmaps.get(id)
+        if mailmap is None:
+            mailmap = self.__mailmaps[id] = Mailmap(text(), id=id)
+        return mailmap
+
+    def canonical_ids(self, mailmap: Mailmap, /) -> list[int]:
+        '''
+        The id of the canonical identity of each id, under `mailmap`.
+
+        The result is kept for the mailmap, and extended as more people
+        are seen, so it can be used to map whole columns of ids.
+        '''
+        if not mailmap:
+            return list(range(len(self.__people)))
+        key = mailmap if mailmap.id is None else mailmap.id
+        canonical = self.__canonical.setdefault(key, [])
+        people = self.__people
+        # Mapping can intern new identities, which are mapped in turn.
+        while len(canonical) < len(people):
+            person = people[len(canonical)]
+            name, email = mailmap.map(person.name, person.email)
+            if (name, email) == (person.name, person.email):
+                canonical.append(len(canonical))
+            else:
+                canonical.append(self.intern(f'{name} <{email}>'))
+        return canonical
+
+    def canonical(self, id: int, mailmap: Mailmap, /) -> int:
+        '''
+        The id of the canonical identity of `id`, under `mailmap`.
+        '''
+        return self.canonical_ids(mailmap)[id]
+
+    def __repr__(self):
+        return f'{type(self).__name__}({len(self)} people)'
@@ -0,0 +1,855 @@
+'''
+Line-by-line comparison of blobs, producing unified diff hunks.
+
+This follows git's histogram diff (`xdiff/xhistogram.c`), so the hunks
+match those of `git diff --histogram`:
+
+* The lines are numbered, once, so that equal lines have equal numbers
+  and are compared as integers.
+* The longest run of common lines that contains the rarest line
+  of the old blob (one that occurs at most 64 times) splits the
+  problem in two, and each side is compared in the same way. If every
+  common line is too common, the region is compared with Myers' algorithm,
+  as git would.
+* Groups of changed lines are slid up or down to line up with the
+  changes on the other side and, as with git's indent heuristic,
+  to begin and end at the most natural place in the surrounding code.
+
+Blobs with a NUL byte in the first 8000 bytes are binary, as git
+decides, and are not compared line by line.
+'''
+
+from collections import Counter
+from collections.abc import Iterator, Sequence
+from itertools import chain, count
+from typing import NamedTuple
+
+from xontrib.xgit.text_info import is_binary
+
+MAX_CHAIN = 64
+'''
+The most times a line can occur in the old side of a region and still
+be used to split it.
+'''
+
+CONTEXT = 3
+'''
+The default number of unchanged lines shown around each change.
+'''
+
+# The weights of the indent heuristic, from git's `xdiffi.c`.
+MAX_INDENT = 200
+MAX_BLANKS = 20
+START_OF_FILE_PENALTY = 1
+END_OF_FILE_PENALTY = 21
+TOTAL_BLANK_WEIGHT = -30
+POST_BLANK_WEIGHT = 6
+RELATIVE_INDENT_PENALTY = -4
+RELATIVE_INDENT_WITH_BLANK_PENALTY = 10
+RELATIVE_OUTDENT_PENALTY = 24
+RELATIVE_OUTDENT_WITH_BLANK_PENALTY = 17
+RELATIVE_DEDENT_PENALTY = 23
+RELATIVE_DEDENT_WITH_BLANK_PENALTY = 17
+INDENT_WEIGHT = 60
+INDENT_HEURISTIC_MAX_SLIDING = 100
+
+# The limits of the Myers diff, from git's `xdiffi.c` and `xprepare.c`.
+MAX_COST_MIN = 256
+HEUR_MIN_COST = 256
+SNAKE_CNT = 20
+K_HEUR = 4
+LINE_MAX = 2 ** 63 - 1
+MAX_EQLIMIT = 1024
+SIMSCAN_WINDOW = 100
+KPDIS_RUN = 4
+
+NO_NEWLINE = '\\ No newline at end of file'
+
+
+class Hunk(NamedTuple):
+    '''
+    A group of changes to a blob, with the unchanged lines around them.
+
+    For binary blobs, a single hunk with no lines marks the difference.
+    '''
+    old_start: int
+    '''
+    The first line of the hunk in the old blob, counting from 1, or
+    the line before the hunk if it has no old lines.
+    '''
+    old_count: int
+    new_start: int
+    new_count: int
+    lines: tuple[str, ...]
+    '''
+    The lines, without line endings, each prefixed by `' '` if unchanged,
+    `'-'` if deleted, or `'+'` if added. A line without a newline at the
+    end of the blob is followed by `'\\ No newline at end of file'`.
+    '''
+    heading: str = ''
+    '''
+    The nearest line above the hunk that starts with a letter, `_` or `$`,
+    such as the function the hunk is in, as git shows.
+    '''
+
+    @property
+    def binary(self) -> bool:
+        return not self.lines
+
+    @property
+    def header(self) -> str:
+        '''
+        The `@@ -old +new @@` line that begins the hunk.
+        '''
+        def span(start: int, count: int) -> str:
+            return str(start) if count == 1 else f'{start},{count}'
+        old = span(self.old_start, self.old_count)
+        new = span(self.new_start, self.new_count)
+        heading = f' {self.heading}' if self.heading else ''
+        return f'@@ -{old} +{new} @@{heading}'
+
+    def __str__(self):
+        if self.binary:
+            return 'Binary files differ'
+        return '\n'.join((self.header, *self.lines))
+
+
+def split_lines(data: bytes, /) -> list[bytes]:
+    '''
+    The lines of `data`, each with its newline, except perhaps the last.
+    Only `\\n` ends a line, as for git.
+    '''
+    if b'\r' not in data:
+        # No other line endings to split at.
+        return data.splitlines(keepends=True)
+    lines = data.split(b'\n')
+    last = lines.pop()
+    lines = [line + b'\n' for line in lines]
+    if last:
+        lines.append(last)
+    return lines
+
+
+def diff_lines(old: bytes, new: bytes, /, *,
+               context: int = CONTEXT,
+               indent_heuristic: bool = True,
+               ) -> Iterator[Hunk]:
+    '''
+    Compare two blobs line by line, like `git diff --histogram`.
+
+    PARAMETERS
+    ----------
+    old: bytes
+        The contents of the old blob.
+    new: bytes
+        The contents of the new blob.
+    context: int
+        The number of unchanged lines to show around each change.
+        Changes closer than twice this are shown in the same hunk.
+    indent_heuristic: bool
+        Slide groups of changes to where they best fit the indentation
+        of the surrounding lines, as git does by default.
+
+    RETURNS
+    -------
+    Iterator[Hunk]
+        The hunks, in order. Nothing if the blobs are the same.
+    '''
+    if old == new:
+        return
+    if is_binary(old) or is_binary(new):
+        yield Hunk(0, 0, 0, 0, ())
+        return
+    a = split_lines(old)
+    b = split_lines(new)
+    changed_a, changed_b = _changes(a, b)
+    _compact(a, changed_a, changed_b, indent_heuristic)
+    _compact(b, changed_b, changed_a, indent_heuristic)
+    yield from _hunks(a, b, changed_a, changed_b, context)
+
+
+def _changes(a: Sequence[bytes], b: Sequence[bytes]
+             ) -> tuple[bytearray, bytearray]:
+    '''
+    Mark the lines of `a` deleted and of `b` added.
+
+    Each result has an extra unchanged entry at the end, which is also
+    at index -1, so that groups of changes can be found without
+    checking for the ends.
+    '''
+    changed_a = bytearray(len(a) + 1)
+    changed_b = bytearray(len(b) + 1)
+    numbers = dict(zip(dict.fromkeys(chain(a, b)), count()))
+    ia = list(map(numbers.__getitem__, a))
+    ib = list(map(numbers.__getitem__, b))
+    _histogram(ia, ib, changed_a, changed_b)
+    return changed_a, changed_b
+
+
+def _histogram(a: list[int], b: list[int],
+               changed_a: bytearray, changed_b: bytearray):
+    '''
+    Mark the changes between the numbered lines `a` and `b`.
+    '''
+    regions = [(0, len(a), 0, len(b))]
+    while regions:
+        a0, a1, b0, b1 = regions.pop()
+        if a0 == a1 or b0 == b1:
+            changed_a[a0:a1] = b'\1' * (a1 - a0)
+            changed_b[b0:b1] = b'\1' * (b1 - b0)
+            continue
+        lcs = _find_lcs(a, b, a0, a1, b0, b1)
+        if lcs is None:
+            _classic(a, b, changed_a, changed_b, a0, a1, b0, b1)
+        elif lcs == ():
+            changed_a[a0:a1] = b'\1' * (a1 - a0)
+            changed_b[b0:b1] = b'\1' * (b1 - b0)
+        else:
+            as_, ae, bs, be = lcs
+            regions.append((ae, a1, be, b1))
+            regions.append((a0, as_, b0, bs))
+
+
+def _find_lcs(a: list[int], b: list[int], a0: int, a1: int, b0: int, b1: int
+              ) -> tuple[int, int, int, int]|tuple[()]|None:
+    '''
+    Find the longest run of common lines in the region that includes the
+    rarest line of `a`, as `(start_a, end_a, start_b, end_b)`.
+
+    Return `()` if there are no common lines, or `None` if every common
+    line occurs too often in `a` to be a good choice.
+    '''
+    region = a[a0:a1]
+    occurrences = Counter(region)
+    # Assigned last to first, so the first occurrence is kept.
+    first = dict(zip(reversed(region), range(a1 - 1, a0 - 1, -1), strict=True))
+    best = MAX_CHAIN + 1
+    best_length = 0
+    lcs: tuple[int, int, int, int]|tuple[()] = ()
+    has_common = False
+    bi = b0
+    while bi < b1:
+        b_next = bi + 1
+        line = b[bi]
+        occurs = occurrences.get(line)
+        if occurs is None:
+            bi = b_next
+            continue
+        has_common = True
+        if occurs > best:
+            bi = b_next
+            continue
+        as_ = first[line]
+        while True:
+            before = _run_back(a, as_, b, bi, min(as_ - a0, bi - b0))
+            after = _run(a, as_ + 1, b, bi + 1, min(a1 - as_, b1 - bi) - 1)
+            start_a, end_a = as_ - before, as_ + after
+            start_b, end_b = bi - before, bi + after
+            rarity = occurs
+            if rarity > 1:
+                rarity = min(rarity, *map(occurrences.__getitem__,
+                                          a[start_a:end_a + 1]))
+            if b_next <= end_b:
+                b_next = end_b + 1
+            if best_length < end_a - start_a or rarity < best:
+                lcs = (start_a, end_a + 1, start_b, end_b + 1)
+                best_length = end_a - start_a
+                best = rarity
+            if occurs == 1:
+                break
+            # Try the next occurrence that is not in this run.
+            try:
+                as_ = a.index(line, end_a + 1, a1)
+            except ValueError:
+                break
+        bi = b_next
+    if has_common and best > MAX_CHAIN:
+        return None
+    return lcs
+
+
+def _run(a: list[int], i: int, b: list[int], j: int, limit: int) -> int:
+    '''
+    The number of equal lines from `a[i]` and `b[j]` on, up to `limit`,
+    comparing ever larger slices.
+    '''
+    n = 0
+    step = 1
+    while n < limit:
+        step = min(step, limit - n)
+        if a[i + n:i + n + step] == b[j + n:j + n + step]:
+            n += step
+            step *= 2
+        elif step == 1:
+            break
+        else:
+            step //= 2
+    return n
+
+
+def _run_back(a: list[int], i: int, b: list[int], j: int, limit: int) -> int:
+    '''
+    The number of equal lines before `a[i]` and `b[j]`, up to `limit`.
+    '''
+    n = 0
+    step = 1
+    while n < limit:
+        step = min(step, limit - n)
+        if a[i - n - step:i - n] == b[j - n - step:j - n]:
+            n += step
+            step *= 2
+        elif step == 1:
+            break
+        else:
+            step //= 2
+    return n
+
+
+def _classic(a: list[int], b: list[int],
+             changed_a: bytearray, changed_b: bytearray,
+             a0: int, a1: int, b0: int, b1: int):
+    '''
+    Mark the changes in a region as git's Myers diff does (`xdl_do_diff`),
+    for regions where every common line is too common for the histogram
+    diff.
+
+    Lines found only on one side, and runs of lines found many times on
+    the other side among them, are marked first. The rest are compared
+    by finding the middle of the shortest edit path and comparing each
+    half, giving up on the shortest path where it is too costly to find.
+    '''
+    a, b = a[a0:a1], b[b0:b1]
+    n, m = len(a), len(b)
+    start = 0
+    while start < n and start < m and a[start] == b[start]:
+        start += 1
+    end = 0
+    while (end < min(n, m) - start
+           and a[n - 1 - end] == b[m - 1 - end]):
+        end += 1
+    index_a = _discard(a, start, n - end, Counter(b), changed_a, a0)
+    index_b = _discard(b, start, m - end, Counter(a), changed_b, b0)
+    ha = [a[i] for i in index_a]
+    hb = [b[i] for i in index_b]
+    na, nb = len(ha), len(hb)
+    diagonals = na + nb + 3
+    max_cost = max(_bogosqrt(diagonals), MAX_COST_MIN)
+    # The furthest forward and backward paths, by diagonal.
+    forward = [0] * diagonals
+    backward = [0] * diagonals
+    zero = nb + 1
+
+    regions = [(0, na, 0, nb, False)]
+    while regions:
+        off1, lim1, off2, lim2, need_min = regions.pop()
+        while off1 < lim1 and off2 < lim2 and ha[off1] == hb[off2]:
+            off1 += 1
+            off2 += 1
+        while off1 < lim1 and off2 < lim2 and ha[lim1 - 1] == hb[lim2 - 1]:
+            lim1 -= 1
+            lim2 -= 1
+        if off1 == lim1:
+            for i in range(off2, lim2):
+                changed_b[b0 + index_b[i]] = 1
+        elif off2 == lim2:
+            for i in range(off1, lim1):
+                changed_a[a0 + index_a[i]] = 1
+        else:
+            i1, i2, min_lo, min_hi = _split(
+                ha, off1, lim1, hb, off2, lim2, forward, backward, zero,
+                need_min, max_cost)
+            regions.append((i1, lim1, i2, lim2, min_hi))
+            regions.append((off1, i1, off2, i2, min_lo))
+
+
+def _bogosqrt(n: int) -> int:
+    '''
+    git's rough square root.
+    '''
+    i = 1
+    while n > 0:
+        n >>= 2
+        i <<= 1
+    return i
+
+
+def _discard(lines: list[int], start: int, end: int,
+             other: Counter[int], changed: bytearray, offset: int,
+             ) -> list[int]:
+    '''
+    Mark the lines from `start` to `end` that are not in `other`, and the
+    lines found many times in `other` that are mostly among them.
+    Return the positions of the other lines, which are still to compare.
+    This is git's `xdl_cleanup_records`.
+    '''
+    limit = min(_bogosqrt(len(lines)), MAX_EQLIMIT)
+    discard = bytearray(len(lines) + 1)
+    for i in range(start, end):
+        found = other[lines[i]]
+        discard[i] = 0 if found == 0 else 2 if found >= limit else 1
+    kept: list[int] = []
+    for i in range(start, end):
+        if (discard[i] == 1
+                or (discard[i] == 2
+                    and not _mostly_discarded(discard, i, start, end - 1))):
+            kept.append(i)
+        else:
+            changed[offset + i] = 1
+    return kept
+
+
+def _mostly_discarded(discard: bytearray, i: int, s: int, e: int) -> bool:
+    '''
+    Whether the common line `i` is in a run of lines mostly found only on
+    this side. This is git's `xdl_clean_mmatch`.
+    '''
+    s = max(s, i - SIMSCAN_WINDOW)
+    e = min(e, i + SIMSCAN_WINDOW)
+    unmatched_before, common_before = 0, 1
+    r = 1
+    while i - r >= s:
+        d = discard[i - r]
+        if d == 0:
+            unmatched_before += 1
+        elif d == 2:
+            common_before += 1
+        else:
+            break
+        r += 1
+    if unmatched_before == 0:
+        return False
+    unmatched_after, common_after = 0, 1
+    r = 1
+    while i + r <= e:
+        d = discard[i + r]
+        if d == 0:
+            unmatched_after += 1
+        elif d == 2:
+            common_after += 1
+        else:
+            break
+        r += 1
+    if unmatched_after == 0:
+        return False
+    unmatched = unmatched_before + unmatched_after
+    common = common_before + common_after
+    return common * KPDIS_RUN < common + unmatched
+
+
+def _split(ha: list[int], off1: int, lim1: int,
+           hb: list[int], off2: int, lim2: int,
+           kvdf: list[int], kvdb: list[int], zero: int,
+           need_min: bool, max_cost: int,
+           ) -> tuple[int, int, bool, bool]:
+    '''
+    Find where to split a region, as `(i1, i2, min_lo, min_hi)`: the middle
+    of the shortest edit path, or a good enough place if that is too
+    costly to find. `min_lo` and `min_hi` say whether each half needs
+    the shortest path. This is git's `xdl_split`; the diagonal `d` of
+    `kvdf` and `kvdb` is at `zero + d`.
+    '''
+    dmin, dmax = off1 - lim2, lim1 - off2
+    fmid, bmid = off1 - off2, lim1 - lim2
+    odd = (fmid - bmid) & 1
+    fmin = fmax = fmid
+    bmin = bmax = bmid
+    kvdf[zero + fmid] = off1
+    kvdb[zero + bmid] = lim1
+    ec = 0
+    while True:
+        ec += 1
+        got_snake = False
+        if fmin > dmin:
+            fmin -= 1
+            kvdf[zero + fmin - 1] = -1
+        else:
+            fmin += 1
+        if fmax < dmax:
+            fmax += 1
+            kvdf[zero + fmax + 1] = -1
+        else:
+            fmax -= 1
+        for d in range(fmax, fmin - 1, -2):
+            if kvdf[zero + d - 1] >= kvdf[zero + d + 1]:
+                i1 = kvdf[zero + d - 1] + 1
+            else:
+                i1 = kvdf[zero + d + 1]
+            prev1 = i1
+            i2 = i1 - d
+            while i1 < lim1 and i2 < lim2 and ha[i1] == hb[i2]:
+                i1 += 1
+                i2 += 1
+            if i1 - prev1 > SNAKE_CNT:
+                got_snake = True
+            kvdf[zero + d] = i1
+            if odd and bmin <= d <= bmax and kvdb[zero + d] <= i1:
+                return i1, i2, True, True
+
+        if bmin > dmin:
+            bmin -= 1
+            kvdb[zero + bmin - 1] = LINE_MAX
+        else:
+            bmin += 1
+        if bmax < dmax:
+            bmax += 1
+            kvdb[zero + bmax + 1] = LINE_MAX
+        else:
+            bmax -= 1
+        for d in range(bmax, bmin - 1, -2):
+            if kvdb[zero + d - 1] < kvdb[zero + d + 1]:
+                i1 = kvdb[zero + d - 1]
+            else:
+                i1 = kvdb[zero + d + 1] - 1
+            prev1 = i1
+            i2 = i1 - d
+            while i1 > off1 and i2 > off2 and ha[i1 - 1] == hb[i2 - 1]:
+                i1 -= 1
+                i2 -= 1
+            if prev1 - i1 > SNAKE_CNT:
+                got_snake = True
+            kvdb[zero + d] = i1
+            if not odd and fmin <= d <= fmax and i1 <= kvdf[zero + d]:
+                return i1, i2, True, True
+
+        if need_min:
+            continue
+
+        if got_snake and ec > HEUR_MIN_COST:
+            # Take a path well along its diagonal that ends in a snake.
+            best = 0
+            for d in range(fmax, fmin - 1, -2):
+                dd = abs(d - fmid)
+                i1 = kvdf[zero + d]
+                i2 = i1 - d
+                v = (i1 - off1) + (i2 - off2) - dd
+                if (v > K_HEUR * ec and v > best
+                        and off1 + SNAKE_CNT <= i1 < lim1
+                        and off2 + SNAKE_CNT <= i2 < lim2):
+                    k = 1
+                    while ha[i1 - k] == hb[i2 - k]:
+                        if k == SNAKE_CNT:
+                            best = v
+                            split = i1, i2
+                            break
+                        k += 1
+            if best > 0:
+                return *split, True, False
+            best = 0
+            for d in range(bmax, bmin - 1, -2):
+                dd = abs(d - bmid)
+                i1 = kvdb[zero + d]
+                i2 = i1 - d
+                v = (lim1 - i1) + (lim2 - i2) - dd
+                if (v > K_HEUR * ec and v > best
+                        and off1 < i1 <= lim1 - SNAKE_CNT
+                        and off2 < i2 <= lim2 - SNAKE_CNT):
+                    k = 0
+                    while ha[i1 + k] == hb[i2 + k]:
+                        if k == SNAKE_CNT - 1:
+                            best = v
+                            split = i1, i2
+                            break
+                        k += 1
+            if best > 0:
+                return *split, False, True
+
+        if ec >= max_cost:
+            # Too costly: take the path that has come furthest.
+            fbest = fbest1 = -1
+            for d in range(fmax, fmin - 1, -2):
+                i1 = min(kvdf[zero + d], lim1)
+                i2 = i1 - d
+                if lim2 < i2:
+                    i1 = lim2 + d
+                    i2 = lim2
+                if fbest < i1 + i2:
+                    fbest = i1 + i2
+                    fbest1 = i1
+            bbest = bbest1 = LINE_MAX
+            for d in range(bmax, bmin - 1, -2):
+                i1 = max(off1, kvdb[zero + d])
+                i2 = i1 - d
+                if i2 < off2:
+                    i1 = off2 + d
+                    i2 = off2
+                if i1 + i2 < bbest:
+                    bbest = i1 + i2
+                    bbest1 = i1
+            if (lim1 + lim2) - bbest < fbest - (off1 + off2):
+                return fbest1, fbest - fbest1, True, False
+            return bbest1, bbest - bbest1, False, True
+
+
+def _compact(lines: Sequence[bytes], changed: bytearray,
+             other: bytearray, indent_heuristic: bool):
+    '''
+    Slide each group of changed lines up or down, where the lines it
+    passes over are the same, to line up with the groups of changes on
+    the other side, or else to fit the indentation of the surrounding
+    lines. This is git's `xdl_change_compact`.
+    '''
+    n = len(lines)
+    start = end = 0
+    while changed[end]:
+        end += 1
+    o_start = o_end = 0
+    while other[o_end]:
+        o_end += 1
+
+    def skip_other(count: int):
+        '''
+        Pass over `count` unchanged lines on the other side.
+        '''
+        nonlocal o_start, o_end
+        while True:
+            run = other.find(1, o_end)
+            if run < 0:
+                run = len(other) - 1
+            if o_end + count <= run:
+                o_start = o_end = o_end + count
+                while other[o_end]:
+                    o_end += 1
+                return
+            count -= run - o_end
+            o_start = o_end = run
+            while other[o_end]:
+                o_end += 1
+
+    def next_other():
+        nonlocal o_start, o_end
+        o_start = o_end + 1
+        o_end = o_start
+        while other[o_end]:
+            o_end += 1
+
+    def previous_other():
+        nonlocal o_start, o_end
+        o_end = o_start - 1
+        o_start = o_end
+        while other[o_start - 1]:
+            o_start -= 1
+
+    def slide_up() -> bool:
+        nonlocal start, end
+        if start > 0 and lines[start - 1] == lines[end - 1]:
+            start -= 1
+            end -= 1
+            changed[start] = 1
+            changed[end] = 0
+            while changed[start - 1]:
+                start -= 1
+            previous_other()
+            return True
+        return False
+
+    def slide_down() -> bool:
+        nonlocal start, end
+        if end < n and lines[start] == lines[end]:
+            changed[start] = 0
+            changed[end] = 1
+            start += 1
+            end += 1
+            while changed[end]:
+                end += 1
+            next_other()
+            return True
+        return False
+
+    while True:
+        if end != start:
+            while True:
+                size = end - start
+                end_matching_other = -1
+                while slide_up():
+                    pass
+                earliest_end = end
+                if o_end > o_start:
+                    end_matching_other = end
+                while slide_down():
+                    if o_end > o_start:
+                        end_matching_other = end
+                if size == end - start:
+                    break
+            if end == earliest_end:
+                pass
+            elif end_matching_other != -1:
+                while o_end == o_start:
+                    slide_up()
+            elif indent_heuristic:
+                lowest = max(earliest_end, end - size - 1,
+                             end - INDENT_HEURISTIC_MAX_SLIDING)
+                best_shift = -1
+                best_score = (0, 0)
+                for shift in range(lowest, end + 1):
+                    score = _split_score(lines, shift, _split_score(
+                        lines, shift - size))
+                    if best_shift == -1 or _score_cmp(score, best_score) <= 0:
+                        best_score = score
+                        best_shift = shift
+                while end > best_shift:
+                    slide_up()
+        # Pass over the unchanged lines to the next group of changes, and
+        # as many on the other side.
+        following = changed.find(1, end)
+        if following < 0:
+            break
+        skip_other(following - end)
+        start = end = following
+        while changed[end]:
+            end += 1
+
+
+def _indent(line: bytes) -> int:
+    '''
+    The indentation of a line, with tabs to multiples of 8, or -1 if it
+    is blank.
+    '''
+    indent = 0
+    for c in line:
+        if c == 32:
+            indent += 1
+        elif c == 9:
+            indent += 8 - indent % 8
+        elif c not in b'\n\r\v\f':
+            return indent
+        if indent >= MAX_INDENT:
+            return MAX_INDENT
+    return -1
+
+
+def _split_score(lines: Sequence[bytes], split: int,
+                 score: tuple[int, int] = (0, 0)) -> tuple[int, int]:
+    '''
+    Add to `score`, as `(effective indent, penalty)`, how unnatural it is
+    for a group of changes to begin or end before line `split`.
+    '''
+    n = len(lines)
+    end_of_file = split >= n
+    indent = -1 if end_of_file else _indent(lines[split])
+    pre_blank, pre_indent = 0, -1
+    for i in range(split - 1, -1, -1):
+        pre_indent = _indent(lines[i])
+        if pre_indent != -1:
+            break
+        pre_blank += 1
+        if pre_blank == MAX_BLANKS:
+            pre_indent = 0
+            break
+    post_blank, post_indent = 0, -1
+    for i in range(split + 1, n):
+        post_indent = _indent(lines[i])
+        if post_indent != -1:
+            break
+        post_blank += 1
+        if post_blank == MAX_BLANKS:
+            post_indent = 0
+            break
+
+    effective, penalty = score
+    if pre_indent == -1 and pre_blank == 0:
+        penalty += START_OF_FILE_PENALTY
+    if end_of_file:
+        penalty += END_OF_FILE_PENALTY
+    post_blank = 1 + post_blank if indent == -1 else 0
+    total_blank = pre_blank + post_blank
+    penalty += TOTAL_BLANK_WEIGHT * total_blank
+    penalty += POST_BLANK_WEIGHT * post_blank
+    if indent == -1:
+        indent = post_indent
+    any_blanks = total_blank != 0
+    effective += indent
+    if indent == -1 or pre_indent == -1 or indent == pre_indent:
+        pass
+    elif indent > pre_indent:
+        penalty += (RELATIVE_INDENT_WITH_BLANK_PENALTY if any_blanks
+                    else RELATIVE_INDENT_PENALTY)
+    elif post_indent != -1 and post_indent > indent:
+        penalty += (RELATIVE_OUTDENT_WITH_BLANK_PENALTY if any_blanks
+                    else RELATIVE_OUTDENT_PENALTY)
+    else:
+        penalty += (RELATIVE_DEDENT_WITH_BLANK_PENALTY if any_blanks
+                    else RELATIVE_DEDENT_PENALTY)
+    return effective, penalty
+
+
+def _score_cmp(s1: tuple[int, int], s2: tuple[int, int]) -> int:
+    cmp_indents = (s1[0] > s2[0]) - (s1[0] < s2[0])
+    return INDENT_WEIGHT * cmp_indents + (s1[1] - s2[1])
+
+
+def _hunks(a: Sequence[bytes], b: Sequence[bytes],
+           changed_a: bytearray, changed_b: bytearray,
+           context: int) -> Iterator[Hunk]:
+    '''
+    Group the changes into hunks, with `context` unchanged lines around
+    them.
+    '''
+    n, m = len(a), len(b)
+    # Each change is (start_a, end_a, start_b, end_b).
+    changes: list[tuple[int, int, int, int]] = []
+    i = j = 0
+    while True:
+        # Pass over the unchanged lines, which pair up.
+        next_a, next_b = changed_a.find(1, i), changed_b.find(1, j)
+        if next_a < 0 and next_b < 0:
+            break
+        skip = min(next_a - i if next_a >= 0 else n - i,
+                   next_b - j if next_b >= 0 else m - j)
+        i += skip
+        j += skip
+        si, sj = i, j
+        while changed_a[i]:
+            i += 1
+        while changed_b[j]:
+            j += 1
+        changes.append((si, i, sj, j))
+    heading = b''
+    searched = -1
+    first = 0
+    while first < len(changes):
+        last = first
+        while (last + 1 < len(changes)
+               and changes[last + 1][0] - changes[last][1] <= 2 * context):
+            last += 1
+        sa, _, sb, _ = changes[first]
+        _, ea, _, eb = changes[last]
+        before = min(context, sa)
+        start_a, start_b = sa - before, sb - before
+        after = min(context, n - ea, m - eb)
+        end_a, end_b = ea + after, eb + after
+        for k in range(start_a - 1, searched, -1):
+            if _is_heading(a[k]):
+                heading = a[k][:80].rstrip()
+                break
+        searched = start_a - 1
+        lines: list[str] = []
+        i, j = start_a, start_b
+        for ca, cea, cb, ceb in changes[first:last + 1]:
+            _append(lines, ' ', a, i, ca)
+            _append(lines, '-', a, ca, cea)
+            _append(lines, '+', b, cb, ceb)
+            i, j = cea, ceb
+        _append(lines, ' ', a, i, end_a)
+        yield Hunk(start_a + 1 if end_a > start_a else start_a,
+                   end_a - start_a,
+                   start_b + 1 if end_b > start_b else start_b,
+                   end_b - start_b,
+                   tuple(lines),
+                   heading.decode(errors='replace'))
+        first = last + 1
+
+
+def _is_heading(line: bytes) -> bool:
+    c = line[:1]
+    return c.isalpha() or c == b'_' or c == b'$'
+
+
+def _append(out: list[str], prefix: str, lines: Sequence[bytes],
+            start: int, end: int):
+    for k in range(start, end):
+        line = lines[k]
+        if line.endswith(b'\n'):
+            out.append(prefix + line[:-1].decode(errors='replace'))
+        else:
+            out.append(prefix + line.decode(errors='replace'))
+            out.append(NO_NEWLINE)
@@ -0,0 +1,316 @@
+'''
+In-process access to the git object database.
+
+Reading an object through `git cat-file` costs at least a pipe round trip,
+and starting the process costs a fork/exec. We can do better by reading the
+object database directly:
+
+- Loose objects, in `.git/objects/xx/yyyy…`: inflate the file with `zlib`,
+  and check the `<type> <size>\\0` header.
+- Packed objects, in `.git/objects/pack/`: see `xontrib.xgit.packs`.
+
+Either way, we return the same payload that `git cat-file` would.
+
+Anything we can't handle (abbreviated or symbolic names, missing objects,
+replacement refs) is left to the caller, which falls back to `git cat-file`.
+
+The backend is selected with `$XGIT_OBJECT_BACKEND`:
+
+- `native`: read objects in-process where possible (the default).
+- `git`: always use the `git cat-file` coprocess.
+'''
+
+from collections.abc import Iterable, Iterator, MutableMapping
+from pathlib import Path
+import re
+import zlib
+
+from xonsh.built_ins import XSH
+
+from xontrib.xgit.types import GitObjectType, ObjectId
+from xontrib.xgit.packs import _PackStore, PackError, DeltaBaseCache
+
+RE_OBJECT_ID = re.compile(r'^(?:[0-9a-f]{40}|[0-9a-f]{64})$')
+'''
+A full object id. Anything else needs `git` to resolve it.
+'''
+
+OBJECT_TYPES: dict[bytes, GitObjectType] = {
+    b'blob': 'blob',
+    b'tree': 'tree',
+    b'commit': 'commit',
+    b'tag': 'tag',
+}
+
+HEADER_MAX = 32
+'''
+The maximum length of a loose object header, `<type> <size>\\0`.
+'''
+
+
+def object_backend() -> str:
+    '''
+    The object backend selected by `$XGIT_OBJECT_BACKEND`.
+    '''
+    env = XSH.env
+    if not isinstance(env, MutableMapping):
+        return 'native'
+    return str(env.get('XGIT_OBJECT_BACKEND', 'native')).lower()
+
+
+def parse_header(header: bytes) -> tuple[GitObjectType, int]|None:
+    '''
+    Parse a `<type> <size>` object header. Returns `None` if it is not valid.
+    '''
+    type, _, size = header.partition(b' ')
+    t = OBJECT_TYPES.get(type)
+    if t is None or not size.isdigit():
+        return None
+    return t, int(size)
+
+
+def object_dirs(objects: Path, /) -> list[Path]:
+    '''
+    An object directory, followed by its alternates (from
+    `info/alternates`), recursively.
+    '''
+    result: list[Path] = []
+    pending = [objects]
+    while pending:
+        dir = pending.pop(0)
+        if dir in result:
+            continue
+        result.append(dir)
+        path = dir / 'info' / 'alternates'
+        if not path.is_file():
+            continue
+        for line in path.read_text().splitlines():
+            line = line.strip()
+            if line and not line.startswith('#'):
+                pending.append((dir / line).resolve())
+    return result
+
+
+def hash_size(repository: Path, /) -> int:
+    '''
+    The size in bytes of object ids in a repository:
+    32 if `extensions.objectFormat` is `sha256`, otherwise 20.
+    '''
+    config = repository / 'config'
+    if config.is_file():
+        text = config.read_text(errors='replace')
+        if re.search(r'(?im)^\s*objectformat\s*=\s*sha256\s*$', text):
+            return 32
+    return 20
+
+
+class _LooseObjects:
+    '''
+    Reader for loose objects in one or more object directories.
+    '''
+    __dirs: list[Path]
+
+    @property
+    def dirs(self) -> list[Path]:
+        '''
+        The object directories searched.
+        '''
+        return self.__dirs
+
+    def __init__(self, dirs: list[Path], /):
+        self.__dirs = dirs
+
+    def __find(self, hash: ObjectId) -> bytes|None:
+        '''
+        Find and read the compressed file for an object.
+        '''
+        for dir in self.__dirs:
+            try:
+                return (dir / hash[:2] / hash[2:]).read_bytes()
+            except OSError:
+                continue
+        return None
+
+    def read(self, hash: ObjectId, /) -> tuple[GitObjectType, bytes]|None:
+        '''
+        Read a loose object. Returns `None` if not found or unreadable.
+        '''
+        compressed = self.__find(hash)
+        if compressed is None:
+            return None
+        try:
+            raw = zlib.decompress(compressed)
+        except zlib.error:
+            return None
+        header, nul, data = raw.partition(b'\0')
+        info = parse_header(header)
+        if not nul or info is None or info[1] != len(data):
+            return None
+        return info[0], data
+
+    def read_prefix(self, hash: ObjectId, limit: int, /
+                    ) -> tuple[GitObjectType, int, bytes]|None:
+        '''
+        Read the type, size, and first `limit` bytes of a loose object,
+        inflating no more than that. Returns `None` if not found or
+        unreadable.
+        '''
+        compressed = self.__find(hash)
+        if compressed is None:
+            return None
+        try:
+            raw = zlib.decompressobj().decompress(compressed, HEADER_MAX + limit)
+        except zlib.error:
+            return None
+        header, nul, data = raw.partition(b'\0')
+        info = parse_header(header)
+        if not nul or info is None:
+            return None
+        return info[0], info[1], data[:limit]
+
+    def info(self, hash: ObjectId, /) -> tuple[GitObjectType, int]|None:
+        '''
+        Get the type and size of a loose object, inflating only the header.
+        '''
+        compressed = self.__find(hash)
+        if compressed is None:
+            return None
+        try:
+            header = zlib.decompressobj().decompress(compressed, HEADER_MAX)
+        except zlib.error:
+            return None
+        header, nul, _ = header.partition(b'\0')
+        if not nul:
+            return None
+        return parse_header(header)
+
+
+def has_replacements(repository: Path, /) -> bool:
+    '''
+    Whether the repository has any replacement refs (`refs/replace/`).
+    `git cat-file` honors these, so we must not bypass it when present.
+    '''
+    replace = repository / 'refs' / 'replace'
+    if replace.is_dir() and any(replace.iterdir()):
+        return True
+    packed = repository / 'packed-refs'
+    if packed.is_file():
+        with packed.open('rb') as f:
+            return any(b' refs/replace/' in line for line in f)
+    return False
+
+
+class _NativeObjects:
+    '''
+    In-process object database access for one repository.
+
+    Every method returns `None` (or skips the object) when it cannot answer
+    the request itself, so the caller can fall back to `git cat-file`.
+    '''
+    __loose: _LooseObjects
+    __packs: _PackStore
+    __enabled: bool
+
+    @property
+    def enabled(self) -> bool:
+        '''
+        Whether native access is possible for this repository.
+        '''
+        return self.__enabled
+
+    @property
+    def delta_cache(self) -> DeltaBaseCache:
+        '''
+        The delta-base cache for packed objects, with its hit/miss counters.
+        '''
+        return self.__packs.cache
+
+    def __init__(self, repository: Path, /):
+        dirs = object_dirs(repository / 'objects')
+        self.__loose = _LooseObjects(dirs)
+        self.__packs = _PackStore(dirs, hash_size=hash_size(repository))
+        self.__enabled = not has_replacements(repository)
+
+    def read(self, name: str, /) -> tuple[GitObjectType, bytes]|None:
+        '''
+        Read an object, or return `None` to fall back to `git`.
+        '''
+        if not self.__enabled or not RE_OBJECT_ID.match(name):
+            return None
+        try:
+            found = self.__packs.read(bytes.fromhex(name))
+        except PackError:
+            return None
+        if found is not None:
+            return found
+        return self.__loose.read(ObjectId(name))
+
+    def read_prefix(self, name: str, limit: int, /
+                    ) -> tuple[GitObjectType, int, bytes]|None:
+        '''
+        Read an object's type, size, and at least its first `limit` bytes
+        (all of it, if it is no larger, or is stored as a delta), or
+        return `None` to fall back to `git`.
+        '''
+        if not self.__enabled or not RE_OBJECT_ID.match(name):
+            return None
+        try:
+            found = self.__packs.read_prefix(bytes.fromhex(name), limit)
+        except PackError:
+            return None
+        if found is not None:
+            return found
+        return self.__loose.read_prefix(ObjectId(name), limit)
+
+    def info(self, name: str, /) -> tuple[GitObjectType, int]|None:
+        '''
+        Get an object's type and size, or return `None` to fall back to `git`.
+        '''
+        if not self.__enabled or not RE_OBJECT_ID.match(name):
+            return None
+        try:
+            found = self.__packs.info(bytes.fromhex(name))
+        except PackError:
+            return None
+        if found is not None:
+            return found
+        return self.__loose.info(ObjectId(name))
+
+    def read_many(self, names: Iterable[str], missing: list[str], /
+                  ) -> Iterator[tuple[str, GitObjectType, bytes]]:
+        '''
+        Read the objects we can; append the names of the others to `missing`.
+        '''
+        for name in names:
+            found = self.read(name)
+            if found is None:
+                missing.append(name)
+            else:
+                yield name, *found
+
+    def read_prefix_many(self, names: Iterable[str], limit: int,
+                         missing: list[str], /
+                         ) -> Iterator[tuple[str, GitObjectType, int, bytes]]:
+        '''
+        Read the starts of the objects we can; append the names of the
+        others to `missing`.
+        '''
+        for name in names:
+            found = self.read_prefix(name, limit)
+            if found is None:
+                missing.append(name)
+            else:
+                yield name, *found
+
+    def info_many(self, names: Iterable[str], missing: list[str], /
+                  ) -> Iterator[tuple[str, GitObjectType, int]]:
+        '''
+        Get the types and sizes we can; append the names of the others
+        to `missing`.
+        '''
+        for name in names:
+            found = self.info(name)
+            if found is None:
+                missing.append(name)
+            else:
+                yield name, *found
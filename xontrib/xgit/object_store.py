@@ -0,0 +1,114 @@
+'''
+The object store shared by all repositories in a `GitContext`.
+
+Objects are content-addressed: an object id names the same content in any
+repository. So clones and worktrees of the same project can share one set
+of parsed commits and trees. Each object reads its content through the
+repository it was first loaded from. Every repository that asks for the
+object is recorded as a possible loader, to fall back on if the first one
+can no longer supply it.
+'''
+
+from collections.abc import Iterator, Mapping
+from threading import Lock
+from typing import TYPE_CHECKING
+
+from xontrib.xgit.cache import _InternTable
+from xontrib.xgit.types import ObjectId
+
+if TYPE_CHECKING:
+    import xontrib.xgit.context_types as ct
+    import xontrib.xgit.object_types as ot
+
+
+class _ObjectStore(_InternTable[ObjectId, 'ot.GitObject']):
+    '''
+    A content-addressed table of live (and recently used) objects,
+    shared by the repositories in a context.
+    '''
+    __loaders: dict[ObjectId, tuple['ct.GitRepository', ...]]
+    '''
+    The repositories known to hold each object. Most objects come from a
+    single repository, so those share one tuple per repository.
+    '''
+    __singles: dict[int, tuple['ct.GitRepository']]
+    __loaders_lock: Lock
+
+    def __init__(self, capacity: int, /):
+        super().__init__(capacity)
+        self.__loaders = {}
+        self.__singles = {}
+        self.__loaders_lock = Lock()
+
+    def intern(self, key: ObjectId, value: 'ot.GitObject', /, *,
+               loader: 'ct.GitRepository|None' = None) -> 'ot.GitObject':
+        '''
+        Add `value` unless there is already a live object with this id,
+        and record `loader` as a repository that holds it.
+        Returns the object now in the store.
+        '''
+        existing = super().intern(key, value)
+        if loader is not None:
+            self.add_loader(existing, loader)
+        return existing
+
+    def add_loader(self, object: 'ot.GitObject', loader: 'ct.GitRepository', /):
+        '''
+        Record that `loader` can supply `object`.
+        '''
+        key = object.hash
+        loaders = self.__loaders.get(key)
+        if loaders is not None and any(r is loader for r in loaders):
+            return
+        with self.__loaders_lock:
+            loaders = self.__loaders.get(key)
+            if loaders is None:
+                single = self.__singles.get(id(loader))
+                if single is None:
+                    single = self.__singles[id(loader)] = (loader,)
+                self.__loaders[key] = single
+                self.__prune()
+            elif all(r is not loader for r in loaders):
+                self.__loaders[key] = (*loaders, loader)
+
+    def __prune(self):
+        '''
+        Forget the loaders of objects that are no longer live, once they
+        outnumber the live objects. Must be called with the lock held.
+        '''
+        loaders = self.__loaders
+        if len(loaders) <= 2 * len(self) + 1024:
+            return
+        for key in [k for k in loaders if k not in self]:
+            del loaders[key]
+
+    def loaders(self, key: ObjectId, /) -> list['ct.GitRepository']:
+        '''
+        The repositories known to hold the object with this id.
+        '''
+        return list(self.__loaders.get(key, ()))
+
+
+class _ObjectsView(Mapping[ObjectId, 'ot.GitObject']):
+    '''
+    A read-only mapping view of the live objects in a store.
+    '''
+    __store: _ObjectStore
+
+    def __init__(self, store: _ObjectStore, /):
+        self.__store = store
+
+    def __getitem__(self, key: ObjectId) -> 'ot.GitObject':
+        value = self.__store.peek(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[ObjectId]:
+        return iter(self.__store.keys())
+
+    def __len__(self) -> int:
+        return len(self.__store)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.__store
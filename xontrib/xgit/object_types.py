@@ -14,15 +14,17 @@ from abc import abstractmethod
 from pathlib import PurePosixPath
 from typing import (
     Optional, Protocol, overload, runtime_checkable, Any, Literal,
-    TypeAlias, IO,
+    TypeAlias, IO, Callable,
 )
 from collections.abc import Iterator, Sequence, Mapping\
 
 from xontrib.xgit.types import (
     ObjectId, GitObjectType, GitEntryMode,
-    CommitId, TreeId, TagId, BlobId,
+    CommitId, TreeId, TagId, BlobId, PrefetchField, WalkOrder,
 )
+from xontrib.xgit.blob_reader import BlobLines, BlobReader
 from xontrib.xgit.identity_set import IdentitySet
+from xontrib.xgit.line_diff import CONTEXT, Hunk
 import xontrib.xgit.person as xp
 import xontrib.xgit.object_types as ot
 import xontrib.xgit.context_types as ct
@@ -62,6 +64,7 @@ class GitId(Protocol):
     """
     Anything that has a hash in a git repository.
     """
+    __slots__ = ()
     @abstractmethod
     def __init__(self, hash: ObjectId):
         ...
@@ -75,6 +78,7 @@ class GitObject(GitId, Protocol):
     """
     A git object.
     """
+    __slots__ = ()
     @property
     @abstractmethod
     def type(self) -> GitObjectType:
@@ -109,6 +113,7 @@ class GitTree(GitObject, dict[str, 'et.GitEntry[EntryObject]']):
     """
     A git tree object.
     """
+    __slots__ = ()
     @property
     def type(self) -> Literal['tree']:
         return 'tree'
@@ -142,6 +147,34 @@ class GitTree(GitObject, dict[str, 'et.GitEntry[EntryObject]']):
     @abstractmethod
     def __bool__(self) -> bool: ...
 
+    @abstractmethod
+    def prefetch(self,
+                 fields: 'Sequence[PrefetchField]' = ('type', 'size'),
+                 ) -> 'GitTree':
+        '''
+        Load the sizes of all the entries in one batch.
+        '''
+        ...
+
+    @abstractmethod
+    def walk(self, /, *,
+             topdown: bool = True,
+             filter: Optional[Callable[[PurePosixPath, GitObjectType], bool]] = None,
+             unique: bool = False,
+             ) -> Iterator[tuple[PurePosixPath, list[str], list[str]]]:
+        '''
+        Walk the tree and all its subtrees, like `os.walk`, yielding
+        `(path, dirs, files)` for each directory.
+        '''
+        ...
+
+    @abstractmethod
+    def rglob(self, pattern: str, /) -> Iterator['et.GitEntry[EntryObject]']:
+        '''
+        The entries anywhere in the tree whose paths match `pattern`.
+        '''
+        ...
+
     @overload
     def _git_entry(
         self,
@@ -221,6 +254,7 @@ class GitBlob(GitObject, Protocol):
     """
     A git blob object.
     """
+    __slots__ = ()
     @property
     def type(self) -> Literal['blob']:
         return 'blob'
@@ -235,19 +269,77 @@ class GitBlob(GitObject, Protocol):
         ...
     @property
     @abstractmethod
-    def lines(self) -> Iterator[str]:
+    def buffer(self) -> memoryview:
+        ...
+    @property
+    @abstractmethod
+    def is_binary(self) -> bool:
+        '''
+        Whether the contents are binary rather than text, judged from
+        the first 8000 bytes.
+        '''
+        ...
+    @property
+    @abstractmethod
+    def encoding(self) -> str|None:
+        '''
+        The codec to decode the text with, or `None` if binary.
+        '''
+        ...
+    @property
+    @abstractmethod
+    def lines(self) -> BlobLines:
+        '''
+        The lines of the text, without their line endings. Looking up a
+        line, or a slice of lines, decodes only those lines.
+        '''
+        ...
+    @abstractmethod
+    def line(self, n: int, /) -> str:
+        '''
+        Line `n` of the text, numbered from 1 as git numbers them.
+        '''
+        ...
+    @abstractmethod
+    def reader(self) -> BlobReader:
+        '''
+        A seekable binary file over the contents, to be closed when done.
+        '''
         ...
     @property
     @abstractmethod
     def stream(self) -> IO[str]:
         ...
 
+    @abstractmethod
+    def diff(self, other: 'GitBlob', /, *,
+             context: int = CONTEXT) -> Iterator[Hunk]:
+        '''
+        Compare this blob with `other`, line by line, as with
+        `git diff --histogram`.
+
+        PARAMETERS
+        ----------
+        other: GitBlob
+            The blob to compare to; this blob is the old version.
+        context: int
+            The number of unchanged lines to show around each change.
+
+        RETURNS
+        -------
+        Iterator[Hunk]
+            The hunks of the unified diff, or a single hunk with no lines
+            if either blob is binary.
+        '''
+        ...
+
 
 @runtime_checkable
 class GitCommit(GitObject, Protocol):
     """
     A git commit object.
     """
+    __slots__ = ()
     @property
     def type(self) -> Literal['commit']:
         return 'commit'
@@ -275,15 +367,66 @@ class GitCommit(GitObject, Protocol):
     @abstractmethod
     def parents(self) -> 'Sequence[GitCommit]': ...
 
+    @property
+    @abstractmethod
+    def commit_time(self) -> int: ...
+
+    @property
+    @abstractmethod
+    def generation(self) -> int|None: ...
+
     @property
     @abstractmethod
     def signature(self) -> str: ...
 
+    @abstractmethod
+    def ancestors(self, /, *,
+                  first_parent: bool=False,
+                  since: Optional[int]=None,
+                  until: Optional[int]=None,
+                  order: WalkOrder='date',
+                  limit: Optional[int]=None,
+                  ) -> 'Iterator[GitCommit]':
+        '''
+        Walk the history of this commit, starting with the commit itself.
+
+        PARAMETERS
+        ----------
+        first_parent: bool
+            Follow only the first parent of merges.
+        since: Optional[int]
+            Stop at commits older than this timestamp.
+        until: Optional[int]
+            Skip commits newer than this timestamp.
+        order: 'date'|'topo'
+            Newest first, or parents never before their children, each
+            line of history as far as it goes before the next.
+        limit: Optional[int]
+            The maximum number of commits to return.
+        '''
+        ...
+
+    @abstractmethod
+    def merge_base(self, *others: 'Commitish') -> 'GitCommit|None':
+        '''
+        The best common ancestor of this commit and `others`, like
+        `git merge-base`, or `None` if they have no common history.
+        '''
+        ...
+
+    @abstractmethod
+    def is_ancestor(self, other: 'Commitish') -> bool:
+        '''
+        Whether this commit is an ancestor of (or the same as) `other`.
+        '''
+        ...
+
 @runtime_checkable
 class GitTagObject(GitObject, Protocol):
     """
     A git tag object.
     """
+    __slots__ = ()
     @property
     def type(self) -> Literal['tag']:
         return 'tag'
@@ -27,20 +27,30 @@ repositories deeply.
 
 from typing import (
     Optional, Literal, Any, cast, TypeAlias,
-    Callable, overload
+    Callable, overload, TYPE_CHECKING,
+)
+from collections.abc import (
+    MutableMapping, Sequence, Iterable, Iterator, Mapping,
+    ItemsView, KeysView, ValuesView,
 )
-from collections.abc import MutableMapping, Sequence, Iterable, Iterator, Mapping
 from types import MappingProxyType
 from pathlib import PurePosixPath
 from collections import defaultdict
+from contextlib import suppress
+from fnmatch import fnmatchcase
+import io
 
 from xonsh.built_ins import XSH
 from xonsh.lib.pretty import RepresentationPrinter
 
+from xontrib.xgit.blob_reader import BlobLines, BlobReader, LineIndex, line_index
 from xontrib.xgit.identity_set import IdentitySet
+from xontrib.xgit.commit_parser import CommitFields, parse_commit
+from xontrib.xgit.line_diff import CONTEXT, Hunk, diff_lines
+from xontrib.xgit.text_info import TextInfo, classify
 from xontrib.xgit.person import CommittedBy
+from xontrib.xgit.tree_parser import TreeEntries, unpack_tree
 from xontrib.xgit.types import (
-    GitLoader,
     ObjectId,
     TagId,
     TreeId,
@@ -48,9 +58,13 @@ from xontrib.xgit.types import (
     BlobId,
     GitEntryMode,
     GitObjectType,
-    InitFn,
+    GitValueError,
+    ObjectNotFoundError,
+    PrefetchField,
+    WalkOrder,
 )
 from xontrib.xgit.object_types import (
+    Commitish,
     GitId,
     GitCommit,
     GitObject,
@@ -60,18 +74,63 @@ from xontrib.xgit.object_types import (
     Objectish,
 )
 from xontrib.xgit.context_types import GitContext, GitRepository
+if TYPE_CHECKING:
+    from xontrib.xgit.commit_graph import CommitInfo
 from xontrib.xgit.entry_types import (
     OBJ, ParentObject, EntryObject, GitEntry, GitEntryTree, GitEntryBlob, GitEntryCommit
 )
 import xontrib.xgit.entries as xe
 import xontrib.xgit.git_cmd as gc
+from xontrib.xgit.ancestry import commit_id
 
 GitContextFn: TypeAlias = Callable[[], GitContext]
 
+def _text_lines(data: bytes) -> Iterator[str]:
+    '''
+    Split the contents of an object into lines, as `git_lines` would
+    if reading the same content from a `git cat-file` subprocess.
+    '''
+    for line in io.StringIO(data.decode(), newline=None):
+        yield line.rstrip()
+
+def _read_object(repository: 'gc.GitCmd',
+                 hash: ObjectId,
+                 type: GitObjectType) -> bytes:
+    '''
+    Read the contents of an object via the repository's `git cat-file`
+    coprocess, checking that it is of the expected type.
+
+    If the repository no longer has the object, try the other repositories
+    in the context known to hold it.
+    '''
+    try:
+        actual, data = repository.cat_file(hash)
+    except ObjectNotFoundError:
+        context = getattr(repository, 'context', None)
+        if context is None:
+            raise
+        for other in context.store.loaders(hash):
+            if other is repository:
+                continue
+            with suppress(ObjectNotFoundError):
+                actual, data = other.cat_file(hash)
+                break
+        else:
+            raise
+    if actual != type:
+        raise GitValueError(f"Expected a {type}, got a {actual}: {hash}")
+    return data
+
 class _GitId(GitId):
     """
     Anything that has a hash in a git repository.
+
+    The classes here use `__slots__`, as there can be very many of them.
+    The concrete classes declare the `_hash` and `_size` slots, as
+    `_GitTree` must also be a `dict`, and only one base class can have
+    a non-empty layout.
     """
+    __slots__ = ()
 
     _hash: ObjectId
     @property
@@ -104,21 +163,32 @@ class _GitId(GitId):
         return self.hash.format(fmt)
 
 
+OBJECT_SLOTS = ('_hash', '_size', '__weakref__')
+'''
+The slots every concrete `_GitObject` class declares.
+'''
+
+
 class _GitObject(_GitId, GitObject):
     """
     Any object stored in a git repository. Holds the hash and type of the object.
     """
-    _size: int|InitFn['_GitObject', int]
+    __slots__ = ()
+
+    _size: int
+    '''
+    The size of the object, or -1 if not yet known.
+    '''
     @property
     def size(self) -> int:
-        if callable(self._size):
-            self._size = self._size(self)
+        if self._size < 0:
+            self._size = self._load_size()
         return self._size
 
     def __init__(
         self,
         hash: ObjectId,
-        size: int|InitFn['_GitObject',int]=-1,
+        size: int=-1,
         /,
     ):
         self._size = size
@@ -127,15 +197,11 @@ class _GitObject(_GitId, GitObject):
             hash
         )
 
-    def _size_loader(self, repository: 'gc.GitCmd') -> InitFn['_GitObject',int]:
+    def _load_size(self) -> int:
         '''
-        Subclasses can call this when they don't know the size of the object.
-        It returns a function that lazily loads the size from the repository.
+        Subclasses implement this to look up the size when it is not known.
         '''
-        def loader(self: _GitObject):
-            size = repository.git_string("cat-file", "-s", self.hash)
-            return int(size)
-        return loader
+        raise NotImplementedError("Must be implemented in a subclass")
 
     @property
     def type(self):
@@ -156,9 +222,32 @@ class _GitTree(_GitObject, GitTree, dict[str, GitEntry[EntryObject]]):
     a git object.
 
     Updates would make no sense, as this would invalidate the hash.
+
+    The entries are kept as parallel lists of names, modes and ids, and
+    the `GitEntry` objects are created only as they are accessed.
     """
 
-    __lazy_loader: InitFn['_GitTree',Iterable[tuple[str,GitEntry]]] | None
+    __slots__ = (*OBJECT_SLOTS, '__repository', '__contents', '__entries',
+                 '__index', '__hashes', '__paths')
+
+    __repository: GitRepository
+    __contents: TreeEntries|None
+    '''
+    The names, modes and ids of the entries, or `None` until expanded.
+    '''
+    __entries: list[GitEntry|None]
+    '''
+    The entry objects created so far, by position.
+    '''
+    __index: dict[str, int]|None
+    '''
+    The position of each name, built on the first lookup by name.
+    '''
+    __paths: dict[str, GitEntry]|None
+    '''
+    The entries found by `get` for paths of more than one name. As trees
+    are shared, this is shared by every commit that has this tree.
+    '''
 
     @property
     def hash(self) -> TreeId:
@@ -168,7 +257,7 @@ class _GitTree(_GitObject, GitTree, dict[str, GitEntry[EntryObject]]):
         return TreeId(super().hash)
 
 
-    __hashes: defaultdict[ObjectId, IdentitySet[GitEntry,int]]
+    __hashes: defaultdict[ObjectId, IdentitySet[GitEntry,int]]|None
     @property
     def hashes(self) -> Mapping[ObjectId, IdentitySet[GitEntry,int]]:
         '''
@@ -177,8 +266,13 @@ class _GitTree(_GitObject, GitTree, dict[str, GitEntry[EntryObject]]):
         multiple entries to have the same hash. These will have different
         names, even different modes, but the same hash and content.
         '''
-        if self.__lazy_loader is not None:
-            self._expand()
+        self._expand()
+        if self.__hashes is None:
+            hashes = defaultdict(lambda: IdentitySet(key=id))
+            for i in range(len(self.__entries)):
+                entry = self.__entry(i)
+                hashes[entry.hash].add(entry)
+            self.__hashes = hashes
         return MappingProxyType(self.__hashes)
 
 
@@ -189,37 +283,229 @@ class _GitTree(_GitObject, GitTree, dict[str, GitEntry[EntryObject]]):
         *,
         repository: GitRepository,
     ):
-        def _lazy_loader(self: '_GitTree'):
-            self.__hashes = defaultdict(lambda: IdentitySet(key=id))
-            for line in repository.git_lines("ls-tree", "--long", tree):
-                if line:
-                    name, entry = self._parse_git_entry(line, repository, tree)
-                    self.__hashes[entry.hash].add(entry)
-                    yield name, entry
-            self.__lazy_loader = None
-            self._size = dict.__len__(self)
-            for entry in self.values():
-                repository.add_reference(entry.hash, entry)
-        self.__lazy_loader = _lazy_loader
+        self.__repository = repository
+        self.__contents = None
+        self.__entries = []
+        self.__index = None
+        self.__hashes = None
+        self.__paths = None
         dict.__init__(self)
-        _GitObject.__init__(
-            self,
-            tree,
-            lambda _: len(self._expand()),
-        )
-        ent = xe._GitEntryTree(self, '.', "040000", repository, PurePosixPath())
-        dict.__setitem__(self, '.', ent)
-
-    def _expand(self):
-        if self.__lazy_loader is not None:
-            i = self.__lazy_loader(self)
-            dict.update(self, i)
+        _GitObject.__init__(self, tree)
+
+    def _expand(self, data: bytes|None = None):
+        if self.__contents is None:
+            if data is None:
+                data = _read_object(self.__repository, self.hash, 'tree')
+            self.__contents = unpack_tree(data, hash_size=len(self.hash) // 2)
+            self.__entries = [None] * len(self.__contents.names)
+            self._size = len(self.__entries) + 1
         return self
 
+    def _load_size(self) -> int:
+        return len(self._expand())
+
+    def __entry(self, i: int) -> GitEntry[EntryObject]:
+        '''
+        The entry at position `i`, created on first use.
+        '''
+        entry = self.__entries[i]
+        if entry is None:
+            contents = self.__contents
+            mode, type = contents.kinds[i]
+            _, entry = self._git_entry(contents.id(i), contents.names[i],
+                                       mode, type, -1, self.__repository, self)
+            self.__entries[i] = entry
+        return entry
+
+    def __child(self, name: str) -> GitEntry[EntryObject]|None:
+        '''
+        The entry with this name, or `None`. `.` is this tree.
+        '''
+        if name == '.':
+            # Created on demand, as it makes a reference cycle.
+            entry = dict.get(self, '.')
+            if entry is None:
+                entry = xe._GitEntryTree(self, '.', "040000", self.__repository,
+                                         PurePosixPath())
+                dict.__setitem__(self, '.', entry)
+            return entry
+        self._expand()
+        index = self.__index
+        if index is None:
+            names = self.__contents.names
+            index = self.__index = dict(zip(names, range(len(names)), strict=True))
+        i = index.get(name)
+        if i is None:
+            return None
+        return self.__entry(i)
+
     @property
     def type(self) -> Literal["tree"]:
         return "tree"
 
+    def prefetch(self, fields: Sequence[PrefetchField] = ('type', 'size')):
+        '''
+        Load the sizes of all the entries in one batch, rather than
+        one `git cat-file` per entry.
+
+        Entries not yet accessed are looked up by id, so that their objects
+        get their sizes when they are created.
+        '''
+        self._expand()
+        contents = self.__contents
+        objects = self.__repository.objects
+        pending: list[GitObject|GitEntry|ObjectId] = []
+        for i, entry in enumerate(self.__entries):
+            if contents.kinds[i][1] != 'blob':
+                continue
+            if entry is not None:
+                pending.append(entry)
+            else:
+                hash = contents.id(i)
+                # Not `or`: the truth of a blob is its size, which would
+                # be looked up one at a time.
+                found = objects.peek(hash)
+                pending.append(hash if found is None else found)
+        self.__repository.prefetch(pending, fields=fields)
+        return self
+
+    def walk(self, /, *,
+             topdown: bool = True,
+             filter: Optional[Callable[[PurePosixPath, GitObjectType], bool]] = None,
+             unique: bool = False,
+             ) -> Iterator[tuple[PurePosixPath, list[str], list[str]]]:
+        '''
+        Walk the tree and all its subtrees, like `os.walk`.
+
+        PARAMETERS
+        ----------
+        topdown: bool
+            Yield each directory before its subdirectories. The `dirs` list
+            may then be changed in place to prune the walk.
+        filter: Optional[Callable[[PurePosixPath, GitObjectType], bool]]
+            Called with the path and type of each entry; entries for which
+            it returns false are left out, and excluded trees are not walked.
+        unique: bool
+            Walk each distinct subtree only once. A repeated subtree is
+            still listed in its parent's `dirs`.
+
+        RETURNS
+        -------
+        Iterator[tuple[PurePosixPath, list[str], list[str]]]
+            The path of each directory, the names of its subtrees, and the
+            names of its other entries (files, links and submodules).
+        '''
+        seen = set() if unique else None
+        for path, _, dirs, files in self._walk(PurePosixPath(), topdown, filter, seen):
+            yield path, dirs, files
+
+    def _walk(self,
+              path: PurePosixPath,
+              topdown: bool,
+              filter: Optional[Callable[[PurePosixPath, GitObjectType], bool]],
+              seen: Optional[set[ObjectId]],
+              ) -> Iterator[tuple[PurePosixPath, '_GitTree', list[str], list[str]]]:
+        '''
+        The walk behind `walk` and `rglob`, which also yields each tree.
+
+        The subtrees of each directory are read in one batch. Trees are
+        shared objects, so a subtree that appears in many places, or in
+        many commits, is only read and decoded once.
+        '''
+        contents = self._expand().__contents
+        dirs: list[str] = []
+        files: list[str] = []
+        positions: dict[str, int] = {}
+        listing = zip(contents.names, contents.kinds, strict=True)
+        for i, (name, (_, type)) in enumerate(listing):
+            if filter is not None and not filter(path / name, type):
+                continue
+            if type == 'tree':
+                dirs.append(name)
+                positions[name] = i
+            else:
+                files.append(name)
+        if topdown:
+            yield path, self, dirs, files
+        subtrees: list[tuple[str, _GitTree]] = []
+        for name in dirs:
+            i = positions.get(name)
+            if i is None:
+                continue
+            hash = contents.id(i)
+            if seen is not None:
+                if hash in seen:
+                    continue
+                seen.add(hash)
+            subtrees.append((name, self._tree_at(i)))
+        _GitTree._expand_all(t for _, t in subtrees)
+        for name, subtree in subtrees:
+            yield from subtree._walk(path / name, topdown, filter, seen)
+        if not topdown:
+            yield path, self, dirs, files
+
+    @staticmethod
+    def _expand_all(trees: Iterable['_GitTree']):
+        '''
+        Read the trees not yet expanded, in one batch per repository.
+        '''
+        pending: dict[int, tuple[GitRepository, dict[TreeId, _GitTree]]] = {}
+        for tree in trees:
+            if tree.__contents is None:
+                repository = tree.__repository
+                _, batch = pending.setdefault(id(repository), (repository, {}))
+                batch[tree.hash] = tree
+        for repository, batch in pending.values():
+            if len(batch) < 2:
+                continue
+            for hash, type, data in repository.cat_file_many(batch):
+                if type == 'tree':
+                    batch[TreeId(hash)]._expand(data)
+
+    def _unpacked(self) -> TreeEntries:
+        '''
+        The names, modes and ids of the entries, reading the tree if need be.
+        '''
+        return self._expand().__contents
+
+    def _tree_at(self, i: int) -> '_GitTree':
+        '''
+        The subtree at position `i`.
+        '''
+        tree = self.__repository.get_object(TreeId(self.__contents.id(i)), 'tree')
+        return cast(_GitTree, tree)
+
+    def _entry_at(self, i: int, path: PurePosixPath) -> GitEntry[EntryObject]:
+        '''
+        A new entry for position `i`, in the directory at `path`. Unlike the
+        tree's own entries, this has its full path.
+        '''
+        contents = self.__contents
+        mode, type = contents.kinds[i]
+        _, entry = self._git_entry(contents.id(i), contents.names[i], mode, type,
+                                   -1, self.__repository, self, path=path)
+        return entry
+
+    def rglob(self, pattern: str, /) -> Iterator[GitEntry[EntryObject]]:
+        '''
+        The entries anywhere in the tree whose paths match `pattern`,
+        as for `PurePosixPath.match`. A pattern with no `/`, such as
+        `*.py`, is matched against the names alone.
+        '''
+        return self._rglob(PurePosixPath(), pattern)
+
+    def _rglob(self, top: PurePosixPath, pattern: str, /
+               ) -> Iterator[GitEntry[EntryObject]]:
+        by_name = '/' not in pattern
+        for path, tree, _, _ in self._walk(top, True, None, None):
+            for i, name in enumerate(tree.__contents.names):
+                if by_name:
+                    if not fnmatchcase(name, pattern):
+                        continue
+                elif not (path / name).match(pattern):
+                    continue
+                yield tree._entry_at(i, path)
+
     def __hash__(self): # type: ignore
         return _GitObject.__hash__(self._expand())
 
@@ -230,10 +516,10 @@ class _GitTree(_GitObject, GitTree, dict[str, GitEntry[EntryObject]]):
         return f"GitTree(hash={self.hash})"
 
     def __len__(self):
-        return dict.__len__(self._expand())
+        return len(self._expand().__entries) + 1
 
     def __contains__(self, key):
-        return dict.__contains__(self._expand(), key)
+        return isinstance(key, str) and self.__child(key) is not None
 
 
     def __getitem__(self, key: str) -> GitEntry[EntryObject]:
@@ -249,48 +535,73 @@ class _GitTree(_GitObject, GitTree, dict[str, GitEntry[EntryObject]]):
         raise NotImplementedError("Cannot delete items in a GitTree")
 
     def __iter__(self) -> Iterator[str]:
-        return dict.__iter__(self._expand())
+        yield '.'
+        yield from self._expand().__contents.names
 
     def __bool__(self):
         return len(self._expand()) > 0
 
     def __reversed__(self) -> Iterator[str]:
-        self._expand()
-        return super().__reversed__()
+        yield from reversed(self._expand().__contents.names)
+        yield '.'
 
     def items(self):
-        return dict.items(self._expand())
+        return ItemsView(self)
 
     def keys(self):
-        return dict.keys(self._expand())
+        return KeysView(self)
 
     def values(self):
-        return dict.values(self._expand())
+        return ValuesView(self)
 
     def get(self,
             key: str|PurePosixPath,
             default: Any = None,
             ) -> 'GitEntry[xe.EntryObject]':
-        self._expand()
-        ex = next(iter(dict.values(self)))
-        repository = ex.repository
-        _, loc = self._git_entry(self.hash, '.', "040000", "tree", -1,
-                              repository=repository)
-
-        key_path = PurePosixPath(key)
-        path = PurePosixPath()
-        for p in key_path.parts:
-            if p in ('', '.'):
-                continue
-            if p == '..':
-                raise ValueError("Cannot use '..' in a path")
-            loc.object._expand()
-            try:
-                loc = dict.__getitem__(loc.object, p)
-            except KeyError:
+        if isinstance(key, str) and '/' not in key:
+            entry = self.__child(key)
+            if entry is not None:
+                return entry
+            if key not in ('', '..'):
                 return default
-            path = path / p
-        return loc
+        parts = [
+            p for p in (key.split('/') if isinstance(key, str) else key.parts)
+            if p not in ('', '.')
+        ]
+        if '..' in parts:
+            raise ValueError("Cannot use '..' in a path")
+        if not parts:
+            return self.__child('.')
+        entry = self.__lookup(tuple(parts))
+        return default if entry is None else entry
+
+    def __lookup(self, parts: tuple[str, ...]) -> GitEntry[EntryObject]|None:
+        '''
+        The entry at the path given by `parts`, creating it (and the entries
+        for the directories above it) on the first lookup. Each has its full
+        path from this tree, and the entry of its directory as its parent.
+        '''
+        if len(parts) == 1:
+            return self.__child(parts[0])
+        paths = self.__paths
+        if paths is None:
+            paths = self.__paths = {}
+        key = '/'.join(parts)
+        entry = paths.get(key)
+        if entry is None:
+            parent = self.__lookup(parts[:-1])
+            if parent is None or parent.type != 'tree':
+                return None
+            tree = cast(_GitTree, parent.object)
+            child = tree.__child(parts[-1])
+            if child is None:
+                return None
+            _, entry = tree._git_entry(child.object, child.name, child.mode,
+                                       child.type, -1, self.__repository,
+                                       parent=tree, parent_entry=parent,
+                                       path=parent.path)
+            paths[key] = entry
+        return entry
 
 
     def __str__(self):
@@ -310,6 +621,7 @@ class _GitTree(_GitObject, GitTree, dict[str, GitEntry[EntryObject]]):
         - 'd' to format the directory as itself
         """
         if "l" in fmt and "d" not in fmt:
+            self.prefetch()
             return "\n".join(
                 e.__format__(f"d{fmt}") for e in self._expand().values()
             )
@@ -321,6 +633,7 @@ class _GitTree(_GitObject, GitTree, dict[str, GitEntry[EntryObject]]):
             p.text(f"GitTree({self.hash})")
         else:
             tree_len = len(self._expand())
+            self.prefetch()
             with p.group(4, f"GitTree({self.hash!r}, len={tree_len}, '''", "\n''')"):
                 for e in self.values():
                     p.break_()
@@ -340,24 +653,6 @@ class _GitTree(_GitObject, GitTree, dict[str, GitEntry[EntryObject]]):
                     p.text(tree_len)
 
 
-    def _parse_git_entry(
-        self,
-        line: str,
-        repository: GitRepository,
-        parent_hash: ObjectId | None = None
-    ) -> tuple[str, GitEntry]:
-        """
-        Parse a line from `git ls-tree --long` and return a `GitObject`.
-        """
-        mode, type, hash, size, name = line.split()
-        mode = cast(GitEntryMode, mode)
-        type = cast(GitObjectType, type)
-        parent = repository.get_object(parent_hash) if parent_hash is not None else None
-        size_ = -1 if size == '-' else int(size)
-        return self._git_entry(ObjectId(hash), name, mode, type, size_,
-                               repository, parent)
-
-
     @overload
     def _git_entry(
         self,
@@ -430,7 +725,7 @@ class _GitTree(_GitObject, GitTree, dict[str, GitEntry[EntryObject]]):
         """
         Obtain or create a `GitObject` from a parsed entry line or equivalent.
 
-        This is a helper function for `_parse_git_entry` and `_expand`.
+        This is a helper function for `_expand`.
 
         PARAMETERS
         ----------
@@ -471,7 +766,7 @@ class _GitTree(_GitObject, GitTree, dict[str, GitEntry[EntryObject]]):
             )
             msg = f"git_entry({args})"
             print(msg)
-        this_path = path / name if path is not None else PurePosixPath() / name
+        this_path = path / name if path is not None else None
         match type:
             case 'tree':
                 entry = xe._GitEntryTree(cast(GitTree, obj), name, mode,
@@ -501,6 +796,8 @@ class _GitBlob(_GitObject, GitBlob):
     A file ("blob") stored in a git repository.
     """
 
+    __slots__ = (*OBJECT_SLOTS, '__repository', '__line_index')
+
     __repository: GitRepository
     '''
     A repository that contains the blob. Any repository with the blob will do,
@@ -523,19 +820,22 @@ class _GitBlob(_GitObject, GitBlob):
     def __init__(
         self,
         hash: BlobId,
-        size: int|InitFn[_GitObject,int]=-1,
+        size: int=-1,
         /,
         *,
         repository: GitRepository,
     ):
-        if isinstance(size, int) and size < 0:
-            size = self._size_loader(repository)
         _GitObject.__init__(
             self,
             hash,
             size,
         )
         self.__repository = repository
+        self.__line_index = None
+
+    def _load_size(self) -> int:
+        _, size = self.__repository.cat_file_check(self.hash)
+        return size
 
 
     def __str__(self):
@@ -579,34 +879,99 @@ class _GitBlob(_GitObject, GitBlob):
         """
         Return the contents of the file.
         """
-        return self.__repository.git_binary("cat-file", "blob", self.hash).read()
+        buffer = self.buffer
+        data = buffer.obj
+        return data if isinstance(data, bytes) else buffer.tobytes()
+
+
+    @property
+    def buffer(self) -> memoryview:
+        """
+        Return the contents of the file without copying them, from the
+        repository's blob cache.
+        """
+        cache = self.__repository.blob_cache
+        buffer = cache.get(self.hash)
+        if buffer is None:
+            buffer = cache.put(self.hash,
+                               _read_object(self.__repository, self.hash, 'blob'))
+        return buffer
+
+
+    def __text_info(self) -> TextInfo:
+        info = self.__repository.text_info((self.hash,)).get(self.hash)
+        if info is None:
+            # Not in this repository; read it from one that has it.
+            info = classify(self.buffer)
+        return info
+
+
+    @property
+    def is_binary(self) -> bool:
+        return self.__text_info().binary
+
+
+    @property
+    def encoding(self) -> str|None:
+        return self.__text_info().encoding
+
+
+    def reader(self) -> BlobReader:
+        """
+        Return a seekable binary file over the contents of the file.
+        """
+        return BlobReader(self.buffer)
 
 
     @property
     def stream(self):
         """
-        Return the contents of the file.
+        Return the contents of the file, as text, decoded as it is read.
         """
-        return self.__repository.git_stream("cat-file", "blob", self.hash)
+        return io.TextIOWrapper(io.BufferedReader(self.reader()),
+                                encoding='utf-8', newline='\n')
 
 
+    __line_index: LineIndex|None
+    '''
+    The start of each line, kept for as long as the blob, once the
+    lines have been looked up by number.
+    '''
     @property
-    def lines(self):
-        return self.__repository.git_lines("cat-file", "blob", self.hash)
+    def lines(self) -> BlobLines:
+        if self.__line_index is None:
+            self.__line_index = line_index()
+        return BlobLines(self.buffer, self.__line_index)
+
+
+    def line(self, n: int, /) -> str:
+        if n < 1:
+            raise IndexError(f'Lines are numbered from 1: {n}')
+        return self.lines[n - 1]
 
 
     @property
     def text(self):
-        return self.__repository.git_stream("cat-file", "blob", self.hash,
-                                            text=True,
-                                            ).read()
+        return str(self.buffer, 'utf-8')
+
+
+    def diff(self, other: GitBlob, /, *,
+             context: int = CONTEXT) -> Iterator[Hunk]:
+        if other.hash == self.hash:
+            return iter(())
+        return diff_lines(self.data, other.data, context=context)
 
 
 class _GitCommit(_GitObject, GitCommit):
     """
     A commit in a git repository.
+
+    The commit is read when a field is first needed that the commit-graph
+    does not supply. Until then, `__message` is `None`.
     """
-    __loader: GitLoader|None
+    __slots__ = (*OBJECT_SLOTS, '__repository', '__info', '__tree', '__parents',
+                 '__message', '__author', '__committer', '__signature')
+
     @property
     def type(self) -> Literal["commit"]:
         return "commit"
@@ -619,32 +984,92 @@ class _GitCommit(_GitObject, GitCommit):
         return CommitId(super().hash)
 
 
-    __tree: GitTree|InitFn[GitCommit, GitTree]
-    @property
-    def tree(self) -> GitTree:
-        if self.__loader:
-            self.__loader()
-        if callable(self.__tree):
-            self.__tree = self.__tree(self)
-        return self.__tree
+    __repository: GitRepository
+    __info: 'CommitInfo|Literal[False]|None'
+    '''
+    The commit-graph entry, looked up on first use. `False` if not found.
+    '''
+    def __graph_info(self) -> 'CommitInfo|None':
+        if self.__info is None:
+            self.__info = self.__repository.commit_info(self.hash) or False
+        return self.__info or None
 
 
-    __parents: Sequence[GitCommit]
+    __tree: GitTree|TreeId|None
+    '''
+    The tree, or its id until first accessed.
+    '''
+    @property
+    def tree(self) -> GitTree:
+        tree = self.__tree
+        if tree is None:
+            info = self.__graph_info()
+            if info is not None:
+                tree = info.tree
+            else:
+                self.__load()
+                tree = self.__tree
+        if isinstance(tree, str):
+            tree = self.__tree = self.__repository.get_object(tree, 'tree')
+        assert tree is not None
+        return tree
+
+
+    __parents: list[GitCommit]|tuple[CommitId, ...]|None
+    '''
+    The parent commits, or their ids until first accessed.
+    '''
     @property
     def parents(self) -> Sequence[GitCommit]:
         '''
         The parent commits of this commit.
         '''
-        if self.__loader:
-            self.__loader()
-        return self.__parents
+        parents = self.__parents
+        if parents is None:
+            info = self.__graph_info()
+            if info is not None:
+                parents = info.parents
+            else:
+                self.__load()
+                parents = self.__parents
+        if isinstance(parents, tuple):
+            repository = self.__repository
+            parents = self.__parents = [
+                repository.get_object(p, 'commit')
+                for p in parents
+            ]
+        assert parents is not None
+        return parents
+
+    @property
+    def commit_time(self) -> int:
+        '''
+        The committer timestamp, in seconds since the epoch.
+        '''
+        info = self.__graph_info()
+        if info is not None:
+            return info.commit_time
+        return self.committer.timestamp
+
+    @property
+    def generation(self) -> int|None:
+        '''
+        The generation number from the commit-graph, or `None` if the
+        commit is not in it. If `a` is an ancestor of `b`, then
+        `a.generation < b.generation`.
+        '''
+        info = self.__graph_info()
+        if info is not None:
+            return info.generation
+        return None
 
 
-    __message: str
+    __message: str|None
     @property
     def message(self) -> str:
-        if self.__loader:
-            self.__loader()
+        if self.__message is None:
+            self.__load()
+        assert self.__message is not None
         return self.__message
 
     __author: CommittedBy
@@ -655,8 +1080,8 @@ class _GitCommit(_GitObject, GitCommit):
         '''
         The person who authored the commit and the date.
         '''
-        if self.__loader:
-            self.__loader()
+        if self.__message is None:
+            self.__load()
         return self.__author
 
     @property
@@ -664,8 +1089,8 @@ class _GitCommit(_GitObject, GitCommit):
         '''
         The person who committed the commit and the date.
         '''
-        if self.__loader:
-            self.__loader()
+        if self.__message is None:
+            self.__load()
         return self.__committer
 
 
@@ -675,51 +1100,77 @@ class _GitCommit(_GitObject, GitCommit):
         '''
         The GPG signature of the commit, if any.
         '''
-        if self.__loader:
-            self.__loader()
+        if self.__message is None:
+            self.__load()
         return self.__signature
 
 
     def __init__(self, hash: str, /, *, repository: GitRepository):
-        def loader():
-            lines = repository.git_lines("cat-file", "commit", hash)
-            tree = TreeId(ObjectId(next(lines).split()[1]))
-            def load_tree(_):
-                return repository.get_object(tree, 'tree')
-            self.__tree = load_tree
-            self.__parents = []
-            in_sig = False
-            msg_lines = []
-            sig_lines = []
-            for line in lines:
-                if line.startswith("parent"):
-                    id = ObjectId(line.split()[1])
-                    self.__parents.append(repository.get_object(CommitId(id), 'commit'))
-                elif line.startswith("author"):
-                    author_line = line.split(maxsplit=1)[1]
-                    self.__author = CommittedBy(author_line,
-                                                repository=repository)
-                elif line.startswith("committer"):
-                    committer_line = line.split(maxsplit=1)[1]
-                    self.__committer = CommittedBy(committer_line,
-                                                   repository=repository)
-                elif line == 'gpgsig -----BEGIN PGP SIGNATURE-----':
-                    in_sig = True
-                    sig_lines.append(line)
-                elif in_sig:
-                    sig_lines.append(line)
-                    if line.strip() == "-----END PGP SIGNATURE-----":
-                        in_sig = False
-                elif line == "":
-                    break
-                else:
-                    raise ValueError(f"Unexpected line: {line}")
-            msg_lines.extend(lines)
-            self.__message = "\n".join(msg_lines)
-            self.__signature = "\n".join(sig_lines)
-            self._size = 0
-        self.__loader = loader
-        _GitObject.__init__(self, ObjectId(hash), self._size_loader(repository))
+        self.__repository = repository
+        self.__info = None
+        self.__tree = None
+        self.__parents = None
+        self.__message = None
+        _GitObject.__init__(self, ObjectId(hash))
+
+    def _load_size(self) -> int:
+        _, size = self.__repository.cat_file_check(self.hash)
+        return size
+
+    def __load(self):
+        '''
+        Read and parse the commit.
+        '''
+        data = _read_object(self.__repository, self.hash, 'commit')
+        self._set_fields(parse_commit(data))
+        self._size = len(data)
+
+    def _set_fields(self, fields: CommitFields, /):
+        '''
+        Fill in the commit from its parsed contents, as read by `__load`,
+        or for many commits at once by `GitRepository.commits`.
+        A commit already read is left as it is.
+        '''
+        if self.__message is not None:
+            return
+        repository = self.__repository
+        if self.__tree is None:
+            self.__tree = fields.tree
+        if self.__parents is None:
+            self.__parents = fields.parents
+        self.__author = CommittedBy(fields.author, repository=repository)
+        self.__committer = CommittedBy(fields.committer, repository=repository)
+        self.__signature = fields.signature
+        self.__message = fields.message
+
+    def ancestors(self, /, *,
+                  first_parent: bool=False,
+                  since: Optional[int]=None,
+                  until: Optional[int]=None,
+                  order: WalkOrder='date',
+                  limit: Optional[int]=None,
+                  ) -> Iterator[GitCommit]:
+        repository = self.__repository
+        for hash in repository.ancestry.walk((self.hash,),
+                                             first_parent=first_parent,
+                                             since=since,
+                                             until=until,
+                                             order=order,
+                                             limit=limit):
+            yield repository.get_object(hash, 'commit')
+
+    def merge_base(self, *others: Commitish) -> GitCommit|None:
+        repository = self.__repository
+        ids = [commit_id(o, repository=repository) for o in others]
+        bases = repository.ancestry.merge_bases(self.hash, *ids)
+        if not bases:
+            return None
+        return repository.get_object(bases[0], 'commit')
+
+    def is_ancestor(self, other: Commitish) -> bool:
+        repository = self.__repository
+        return repository.ancestry.is_ancestor(
+            self.hash, commit_id(other, repository=repository))
 
     def __str__(self):
         return f"commit {self.hash}"
@@ -767,9 +1218,12 @@ class _GitTagObject(_GitObject, GitTagObject):
     """
     A tag in a git repository.
     This is an actual signed tag object, not just a reference.
-    """
 
-    __loader: GitLoader|None
+    The tag is read when a field is first needed. Until then,
+    `__message` is `None`.
+    """
+    __slots__ = (*OBJECT_SLOTS, '__repository', '__object', '__tagger',
+                 '__tag_type', '__tag_name', '__message', '__signature')
 
     @property
     def type(self) -> Literal["tag"]:
@@ -785,13 +1239,18 @@ class _GitTagObject(_GitObject, GitTagObject):
         '''
         return TagId(super().hash)
 
-    __object: GitObject|InitFn[GitTagObject, GitObject]
+    __repository: GitRepository
+
+    __object: GitObject|ObjectId
+    '''
+    The tagged object, or its id until first accessed.
+    '''
     @property
     def object(self) -> GitObject:
-        if self.__loader:
-            self.__loader() # type: ignore
-        if callable(self.__object):
-            self.__object = self.__object(self)
+        if self.__message is None:
+            self.__load()
+        if isinstance(self.__object, str):
+            self.__object = self.__repository.get_object(self.__object)
         return self.__object
 
 
@@ -801,32 +1260,33 @@ class _GitTagObject(_GitObject, GitTagObject):
         '''
         The person who created the tag and the date.
         '''
-        if self.__loader:
-            self.__loader()
+        if self.__message is None:
+            self.__load()
         return self.__tagger
 
 
     __tag_type: GitObjectType
     @property
     def tag_type(self) -> GitObjectType:
-        if self.__loader:
-            self.__loader()
+        if self.__message is None:
+            self.__load()
         return self.__tag_type
 
 
     __tag_name: str
     @property
     def tag_name(self) -> str:
-        if self.__loader:
-            self.__loader()
+        if self.__message is None:
+            self.__load()
         return self.__tag_name
 
 
-    __message: str
+    __message: str|None
     @property
     def message(self) -> str:
-        if self.__loader:
-            self.__loader()
+        if self.__message is None:
+            self.__load()
+        assert self.__message is not None
         return self.__message
 
 
@@ -836,8 +1296,8 @@ class _GitTagObject(_GitObject, GitTagObject):
         '''
         The GPG signature of the tag, if any.
         '''
-        if self.__loader:
-            self.__loader()
+        if self.__message is None:
+            self.__load()
         return self.__signature
 
 
@@ -849,48 +1309,50 @@ class _GitTagObject(_GitObject, GitTagObject):
         This will load the tag object from the repository lazily, i.e.
         when one of the properties is accessed.
         '''
-        def loader():
-            '''
-            Load the tag object from the repository in response to a property access.
-            '''
-            lines = repository.git_lines("cat-file", "tag", hash)
-            for line in lines:
-                if line.startswith("object"):
-                    # Bind the loop variable so it gets its own closure
-                    # sell each iteration.
-                    def obj_loader(line):
-                        def load_object(_):
-                            id = ObjectId(line.split()[1])
-                            return repository.get_object(TagId(id))
-                        return load_object
-                    self.__object = obj_loader(line)
-                elif line.startswith("type"):
-                    tag_type = line.split()[1]
-                    assert tag_type in ("commit", "tree", "blob", "tag")
-                    self.__tag_type = tag_type
-                elif line.startswith("tag"):
-                    self.__tag_name = line.split(maxsplit=1)[1]
-                elif line.startswith("tagger"):
-                    tagger_line = line.split(maxsplit=1)[1]
-                    self.__tagger = CommittedBy(tagger_line,
-                                                repository=repository)
-                elif line == "":
-                    break
-                else:
-                    raise ValueError(f"Unexpected line: {line}")
-            msg_lines: list[str] = []
-            sig_lines: list[str] = []
-            for line in lines:
-                if line == "-----BEGIN PGP SIGNATURE-----":
-                    sig_lines.append(line)
-                    break
-                msg_lines.append(line)
-            self.__message = "\n".join(msg_lines)
-            for line in lines:
+        self.__repository = repository
+        self.__message = None
+        _GitObject.__init__(self, ObjectId(hash))
+
+    def _load_size(self) -> int:
+        _, size = self.__repository.cat_file_check(self.hash)
+        return size
+
+    def __load(self):
+        '''
+        Load the tag object from the repository in response to a property access.
+        '''
+        repository = self.__repository
+        data = _read_object(repository, self.hash, 'tag')
+        lines = _text_lines(data)
+        for line in lines:
+            if line.startswith("object "):
+                self.__object = ObjectId(line.split()[1])
+            elif line.startswith("type "):
+                tag_type = line.split()[1]
+                assert tag_type in ("commit", "tree", "blob", "tag")
+                self.__tag_type = tag_type
+            elif line.startswith("tag "):
+                self.__tag_name = line.split(maxsplit=1)[1]
+            elif line.startswith("tagger "):
+                tagger_line = line.split(maxsplit=1)[1]
+                self.__tagger = CommittedBy(tagger_line,
+                                            repository=repository)
+            elif line == "":
+                break
+            else:
+                raise ValueError(f"Unexpected line: {line}")
+        msg_lines: list[str] = []
+        sig_lines: list[str] = []
+        for line in lines:
+            if line == "-----BEGIN PGP SIGNATURE-----":
                 sig_lines.append(line)
-            self.__signature = "\n".join(sig_lines)
-        self.__loader = loader
-        _GitObject.__init__(self, ObjectId(hash), self._size_loader(repository))
+                break
+            msg_lines.append(line)
+        for line in lines:
+            sig_lines.append(line)
+        self.__signature = "\n".join(sig_lines)
+        self._size = len(data)
+        self.__message = "\n".join(msg_lines)
 
     def __str__(self):
         return f"tag {self.hash}"
@@ -0,0 +1,616 @@
+'''
+Memory-mapped access to git packfiles.
+
+A pack is a pair of files in `objects/pack/`:
+
+- `pack-<id>.idx`: a sorted table of object ids, with a 256-entry fanout
+  table indexed by the first byte of the id, and the offset of each object
+  in the pack.
+- `pack-<id>.pack`: the objects themselves, each a small header followed by
+  zlib-compressed data. An object may be stored as a delta against another
+  object, identified either by its offset in the same pack (`OFS_DELTA`) or
+  by its id (`REF_DELTA`).
+
+Both files are mapped with `mmap`, so only the pages we touch are read, and
+the OS shares them between processes. Only version 2 indexes are supported;
+that has been the default since git 1.5.2.
+'''
+
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+import mmap
+from pathlib import Path
+import struct
+from threading import Lock
+import zlib
+
+from xontrib.xgit.types import GitObjectType, GitException
+from xontrib.xgit.cache import _ByteLRU
+from xontrib.xgit.utils import env_number
+
+IDX_MAGIC = b'\377tOc'
+
+OBJ_COMMIT = 1
+OBJ_TREE = 2
+OBJ_BLOB = 3
+OBJ_TAG = 4
+OBJ_OFS_DELTA = 6
+OBJ_REF_DELTA = 7
+
+PACK_TYPES: dict[int, GitObjectType] = {
+    OBJ_COMMIT: 'commit',
+    OBJ_TREE: 'tree',
+    OBJ_BLOB: 'blob',
+    OBJ_TAG: 'tag',
+}
+
+INFLATE_CHUNK = 64 * 1024
+'''
+How much compressed data to feed `zlib` at a time. Objects are not
+delimited in the pack, so we feed it until the stream ends.
+'''
+
+DELTA_HEADER_MAX = 32
+'''
+Enough inflated bytes of a delta to hold its two size headers.
+'''
+
+DELTA_CACHE_MB = 96
+'''
+The default budget for the delta-base cache, in megabytes, overridden by
+`$XGIT_DELTA_CACHE_MB`. This is the same as git's `core.deltaBaseCacheLimit`.
+'''
+
+DeltaBaseCache = _ByteLRU[tuple[Path, int], tuple[GitObjectType, bytes]]
+'''
+Delta bases that have been reconstructed, keyed by pack and offset.
+'''
+
+
+def delta_base_cache() -> DeltaBaseCache:
+    '''
+    Create a delta-base cache, sized by `$XGIT_DELTA_CACHE_MB`.
+    '''
+    budget = env_number('XGIT_DELTA_CACHE_MB', DELTA_CACHE_MB)
+    return _ByteLRU(int(budget * 1024 * 1024), sizeof=lambda v: len(v[1]))
+
+
+BaseResolver = Callable[[bytes], tuple[GitObjectType, bytes]|None]
+'''
+Looks up a `REF_DELTA` base that is not in the same pack, by binary id.
+'''
+
+
+class PackError(GitException):
+    '''
+    A pack or index file is malformed or unsupported.
+    '''
+
+
+@contextmanager
+def _reading(pack: '_Pack'):
+    '''
+    Report a failure to read `pack` as a `PackError`, so the caller can
+    fall back to `git`: a corrupt zlib stream, or the pack being closed
+    while it is read (`ValueError` from the closed map, or `BufferError`
+    from closing it under a view).
+    '''
+    try:
+        yield
+    except (ValueError, BufferError, zlib.error) as e:
+        raise PackError(f'Cannot read {pack.path.name}: {e}') from e
+
+
+def _map(path: Path) -> mmap.mmap:
+    '''
+    Map a file read-only.
+    '''
+    with path.open('rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _varint(data, pos: int) -> tuple[int, int]:
+    '''
+    Decode a little-endian base-128 size, as used in delta headers.
+    Returns the value and the position after it.
+    '''
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def delta_sizes(delta) -> tuple[int, int, int]:
+    '''
+    Decode the header of a delta.
+
+    RETURNS
+    -------
+    base_size: int
+        The expected size of the base object.
+    result_size: int
+        The size of the result of applying the delta.
+    pos: int
+        The offset of the first instruction.
+    '''
+    base_size, pos = _varint(delta, 0)
+    result_size, pos = _varint(delta, pos)
+    return base_size, result_size, pos
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    '''
+    Apply a git delta to a base object.
+
+    A delta is a sequence of instructions: copy a range from the base, or
+    insert literal bytes from the delta.
+    '''
+    base_size, result_size, pos = delta_sizes(delta)
+    if base_size != len(base):
+        raise PackError(f'Delta base size mismatch: {base_size} != {len(base)}')
+    result = bytearray()
+    end = len(delta)
+    while pos < end:
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            offset = size = 0
+            for i in range(4):
+                if op & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (0x10 << i):
+                    size |= delta[pos] << (8 * i)
+                    pos += 1
+            if size == 0:
+                size = 0x10000
+            result += base[offset:offset + size]
+        elif op:
+            result += delta[pos:pos + op]
+            pos += op
+        else:
+            raise PackError('Invalid delta instruction 0')
+    if len(result) != result_size:
+        raise PackError(f'Delta result size mismatch: {len(result)} != {result_size}')
+    return bytes(result)
+
+
+class _PackIndex:
+    '''
+    A memory-mapped version 2 pack index.
+    '''
+    __map: mmap.mmap
+    __hash_size: int
+    __count: int
+    __names: int
+    __offsets: int
+    __large: int
+
+    @property
+    def count(self) -> int:
+        '''
+        The number of objects in the pack.
+        '''
+        return self.__count
+
+    def __init__(self, path: Path, /, *, hash_size: int = 20):
+        self.__map = m = _map(path)
+        if m[:4] != IDX_MAGIC or struct.unpack_from('>I', m, 4)[0] != 2:
+            m.close()
+            raise PackError(f'Unsupported pack index: {path}')
+        self.__hash_size = hash_size
+        self.__count = count = struct.unpack_from('>I', m, 8 + 255 * 4)[0]
+        self.__names = 8 + 256 * 4
+        # Skip the CRC32 table that follows the names.
+        self.__offsets = self.__names + count * hash_size + count * 4
+        self.__large = self.__offsets + count * 4
+
+    def __fanout(self, byte: int) -> int:
+        return struct.unpack_from('>I', self.__map, 8 + byte * 4)[0]
+
+    def __name(self, i: int) -> bytes:
+        start = self.__names + i * self.__hash_size
+        return self.__map[start:start + self.__hash_size]
+
+    def offset(self, i: int) -> int:
+        '''
+        The pack offset of the `i`th object in the index.
+        '''
+        offset = struct.unpack_from('>I', self.__map, self.__offsets + i * 4)[0]
+        if offset & 0x80000000:
+            large = self.__large + (offset & 0x7fffffff) * 8
+            offset = struct.unpack_from('>Q', self.__map, large)[0]
+        return offset
+
+    def find(self, oid: bytes, /) -> int|None:
+        '''
+        Find the pack offset of an object by binary id, or `None`.
+        '''
+        first = oid[0]
+        lo = self.__fanout(first - 1) if first else 0
+        hi = self.__fanout(first)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            name = self.__name(mid)
+            if name < oid:
+                lo = mid + 1
+            elif name > oid:
+                hi = mid
+            else:
+                return self.offset(mid)
+        return None
+
+    def ids(self) -> Iterator[bytes]:
+        '''
+        The binary ids of all objects in the pack, in sorted order.
+        '''
+        for i in range(self.__count):
+            yield self.__name(i)
+
+    def close(self):
+        self.__map.close()
+
+
+class _Pack:
+    '''
+    A memory-mapped packfile and its index.
+    '''
+    __path: Path
+    __index: _PackIndex
+    __map: mmap.mmap
+    __hash_size: int
+    __resolve: BaseResolver
+    __cache: DeltaBaseCache|None
+
+    @property
+    def path(self) -> Path:
+        '''
+        The path to the `.pack` file.
+        '''
+        return self.__path
+
+    @property
+    def index(self) -> _PackIndex:
+        return self.__index
+
+    def __init__(self, path: Path, /, *,
+                 hash_size: int = 20,
+                 resolve: BaseResolver = lambda oid: None,
+                 cache: DeltaBaseCache|None = None):
+        self.__path = path
+        self.__cache = cache
+        self.__index = _PackIndex(path.with_suffix('.idx'), hash_size=hash_size)
+        self.__map = _map(path)
+        self.__hash_size = hash_size
+        self.__resolve = resolve
+
+    def __header(self, offset: int) -> tuple[int, int, int]:
+        '''
+        Decode an entry header.
+
+        RETURNS
+        -------
+        type: int
+            The pack object type code.
+        size: int
+            The inflated size of the entry's data.
+        pos: int
+            The offset just past the header.
+        '''
+        m = self.__map
+        byte = m[offset]
+        type = (byte >> 4) & 7
+        size = byte & 0x0f
+        shift = 4
+        pos = offset + 1
+        while byte & 0x80:
+            byte = m[pos]
+            pos += 1
+            size |= (byte & 0x7f) << shift
+            shift += 7
+        return type, size, pos
+
+    def __delta_base(self, type: int, offset: int, pos: int
+                     ) -> tuple[int|bytes, int]:
+        '''
+        Decode the base reference of a delta entry.
+
+        RETURNS
+        -------
+        base: int|bytes
+            The offset of the base in this pack, or its binary id.
+        pos: int
+            The offset of the compressed delta data.
+        '''
+        m = self.__map
+        if type == OBJ_REF_DELTA:
+            end = pos + self.__hash_size
+            return m[pos:end], end
+        byte = m[pos]
+        pos += 1
+        base = byte & 0x7f
+        while byte & 0x80:
+            byte = m[pos]
+            pos += 1
+            base = ((base + 1) << 7) | (byte & 0x7f)
+        return offset - base, pos
+
+    def __inflate(self, pos: int, size: int, limit: int = 0) -> bytes:
+        '''
+        Inflate the zlib stream starting at `pos`.
+        If `limit` is given, stop once that many bytes are available.
+        '''
+        view = memoryview(self.__map)
+        try:
+            d = zlib.decompressobj()
+            out = bytearray()
+            end = len(view)
+            while not d.eof and pos < end:
+                chunk = view[pos:pos + INFLATE_CHUNK]
+                if limit:
+                    out += d.decompress(chunk, limit - len(out))
+                    if len(out) >= limit:
+                        return bytes(out)
+                else:
+                    out += d.decompress(chunk)
+                pos += INFLATE_CHUNK
+        finally:
+            view.release()
+        if len(out) != size:
+            raise PackError(f'Inflated size mismatch in {self.__path.name}: '
+                            f'{len(out)} != {size}')
+        return bytes(out)
+
+    def __locate(self, base: int|bytes) -> tuple['_Pack', int]|None:
+        '''
+        Find a delta base in this pack.
+        '''
+        if isinstance(base, int):
+            return self, base
+        offset = self.__index.find(base)
+        if offset is None:
+            return None
+        return self, offset
+
+    def read_at(self, offset: int, /) -> tuple[GitObjectType, bytes]:
+        '''
+        Read the object at `offset`, resolving any delta chain.
+
+        The chain is followed until we reach a full object, or a base that
+        is in the delta-base cache. The deltas are then applied in reverse,
+        and each intermediate result is cached, as it is likely to be the
+        base of the next object read (e.g. the previous version of a file).
+        '''
+        cache = self.__cache
+        path = self.__path
+        deltas: list[tuple[int, bytes]] = []
+        target = offset
+        while True:
+            if cache is not None and deltas:
+                cached = cache.get((path, offset))
+                if cached is not None:
+                    result_type, data = cached
+                    break
+            type, size, pos = self.__header(offset)
+            if type in PACK_TYPES:
+                data = self.__inflate(pos, size)
+                result_type = PACK_TYPES[type]
+                if cache is not None and deltas:
+                    cache.put((path, offset), (result_type, data))
+                break
+            if type not in (OBJ_OFS_DELTA, OBJ_REF_DELTA):
+                raise PackError(f'Bad object type {type} at {offset} '
+                                f'in {path.name}')
+            base, pos = self.__delta_base(type, offset, pos)
+            deltas.append((offset, self.__inflate(pos, size)))
+            found = self.__locate(base)
+            if found is None:
+                assert isinstance(base, bytes)
+                external = self.__resolve(base)
+                if external is None:
+                    raise PackError(f'Missing delta base {base.hex()} '
+                                    f'in {path.name}')
+                result_type, data = external
+                break
+            offset = found[1]
+        for delta_offset, delta in reversed(deltas):
+            data = apply_delta(data, delta)
+            if cache is not None and delta_offset != target:
+                cache.put((path, delta_offset), (result_type, data))
+        return result_type, data
+
+    def read_prefix_at(self, offset: int, limit: int, /
+                       ) -> tuple[GitObjectType, int, bytes]:
+        '''
+        Read the type, size, and at least the first `limit` bytes of the
+        object at `offset`.
+
+        A whole object is inflated only as far as `limit`. A delta has
+        to be applied in full, so all of it is returned.
+        '''
+        type, size, pos = self.__header(offset)
+        if type in PACK_TYPES:
+            return PACK_TYPES[type], size, self.__inflate(pos, size, limit)
+        result_type, data = self.read_at(offset)
+        return result_type, len(data), data
+
+    def info_at(self, offset: int, /) -> tuple[GitObjectType, int]|None:
+        '''
+        Get the type and size of the object at `offset`.
+
+        For a delta, the size comes from the delta's own header, and the type
+        from the base at the end of the chain; nothing else is inflated.
+        Returns `None` if the chain leaves the pack.
+        '''
+        size = -1
+        while True:
+            type, entry_size, pos = self.__header(offset)
+            if type in PACK_TYPES:
+                return PACK_TYPES[type], entry_size if size < 0 else size
+            if type not in (OBJ_OFS_DELTA, OBJ_REF_DELTA):
+                raise PackError(f'Bad object type {type} at {offset} '
+                                f'in {self.__path.name}')
+            base, pos = self.__delta_base(type, offset, pos)
+            if size < 0:
+                header = self.__inflate(pos, entry_size, DELTA_HEADER_MAX)
+                _, size, _ = delta_sizes(header)
+            found = self.__locate(base)
+            if found is None:
+                return None
+            offset = found[1]
+
+    def close(self):
+        self.__index.close()
+        self.__map.close()
+
+    def __repr__(self):
+        name = self.__path.name
+        return f'{type(self).__name__}({name!r}, count={self.__index.count})'
+
+
+class _PackStore:
+    '''
+    All the packs in a set of object directories.
+
+    The pack directories are rescanned when an object is not found, as
+    `git gc` or `git fetch` may have added (or replaced) packs.
+    '''
+    __dirs: list[Path]
+    __hash_size: int
+    __packs: dict[Path, _Pack]
+    __stamp: tuple[int, ...]
+    __lock: Lock
+    __cache: DeltaBaseCache
+
+    @property
+    def cache(self) -> DeltaBaseCache:
+        '''
+        The delta-base cache shared by all the packs.
+        '''
+        return self.__cache
+
+    def __init__(self, dirs: list[Path], /, *, hash_size: int = 20):
+        self.__dirs = [d / 'pack' for d in dirs]
+        self.__hash_size = hash_size
+        self.__cache = delta_base_cache()
+        self.__packs = {}
+        self.__stamp = ()
+        self.__lock = Lock()
+        self.rescan()
+
+    @property
+    def packs(self) -> list[_Pack]:
+        return list(self.__packs.values())
+
+    def __scan_stamp(self) -> tuple[int, ...]:
+        stamp = []
+        for d in self.__dirs:
+            try:
+                stamp.append(d.stat().st_mtime_ns)
+            except OSError:
+                stamp.append(0)
+        return tuple(stamp)
+
+    def rescan(self) -> bool:
+        '''
+        Reopen the packs if the pack directories have changed.
+        Returns `True` if anything was rescanned.
+
+        Packs that have gone are dropped, not closed, as other threads may
+        still be reading them; their maps are closed once nothing refers
+        to them. On POSIX, a deleted file stays readable while it is mapped.
+        '''
+        with self.__lock:
+            stamp = self.__scan_stamp()
+            if stamp == self.__stamp:
+                return False
+            self.__stamp = stamp
+            found: dict[Path, _Pack] = {}
+            for d in self.__dirs:
+                if not d.is_dir():
+                    continue
+                for path in sorted(d.glob('pack-*.pack')):
+                    pack = self.__packs.pop(path, None)
+                    if pack is None:
+                        if not path.with_suffix('.idx').is_file():
+                            continue
+                        try:
+                            pack = _Pack(path,
+                                         hash_size=self.__hash_size,
+                                         resolve=self.__resolve,
+                                         cache=self.__cache)
+                        except (OSError, ValueError, PackError):
+                            continue
+                    found[path] = pack
+            self.__packs = found
+            self.__cache.clear()
+            return True
+
+    def __locate(self, oid: bytes) -> tuple[_Pack, int]|None:
+        for pack in list(self.__packs.values()):
+            offset = pack.index.find(oid)
+            if offset is not None:
+                return pack, offset
+        return None
+
+    def __find(self, oid: bytes) -> tuple[_Pack, int]|None:
+        found = self.__locate(oid)
+        if found is None and self.rescan():
+            found = self.__locate(oid)
+        return found
+
+    def __resolve(self, oid: bytes) -> tuple[GitObjectType, bytes]|None:
+        found = self.__locate(oid)
+        if found is None:
+            return None
+        pack, offset = found
+        return pack.read_at(offset)
+
+    def read(self, oid: bytes, /) -> tuple[GitObjectType, bytes]|None:
+        '''
+        Read an object by binary id, or return `None` if not in any pack.
+        '''
+        found = self.__find(oid)
+        if found is None:
+            return None
+        pack, offset = found
+        with _reading(pack):
+            return pack.read_at(offset)
+
+    def read_prefix(self, oid: bytes, limit: int, /
+                    ) -> tuple[GitObjectType, int, bytes]|None:
+        '''
+        Read the type, size, and at least the first `limit` bytes of an
+        object by binary id, or return `None` if not in any pack.
+        '''
+        found = self.__find(oid)
+        if found is None:
+            return None
+        pack, offset = found
+        with _reading(pack):
+            return pack.read_prefix_at(offset, limit)
+
+    def info(self, oid: bytes, /) -> tuple[GitObjectType, int]|None:
+        '''
+        Get the type and size of an object by binary id,
+        or `None` if not in any pack.
+        '''
+        found = self.__find(oid)
+        if found is None:
+            return None
+        pack, offset = found
+        with _reading(pack):
+            return pack.info_at(offset)
+
+    def close(self):
+        with self.__lock:
+            for pack in self.__packs.values():
+                pack.close()
+            self.__packs = {}
+            self.__stamp = ()
+            self.__cache.clear()
@@ -4,12 +4,10 @@ Represent a person with name and email, for either author or committer.
 Also pair with a date, as CommittedBy referencing a date and person.
 '''
 
-from datetime import datetime
-import re
+from datetime import datetime, timedelta, timezone
 
 from xonsh.lib.pretty import RepresentationPrinter
 
-from xontrib.xgit.types import GitLoader, InitFn
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -18,19 +16,23 @@ if TYPE_CHECKING:
 class Person:
     '''
     A person with a name and email.
+
+    The name and email are split out of the full name on first use.
     '''
-    __loader: GitLoader|None
-    __name: str
+    __slots__ = ('__email', '__full_name', '__name')
+
+    __name: str|None
     @property
     def name(self) -> str:
-        if self.__loader:
-            self.__loader()
+        if self.__name is None:
+            self.__split()
+        assert self.__name is not None
         return self.__name
     __email: str
     @property
     def email(self) -> str:
-        if self.__loader:
-            self.__loader()
+        if self.__name is None:
+            self.__split()
         return self.__email
     __full_name: str
     @property
@@ -40,11 +42,12 @@ class Person:
 
     def __init__(self, line: str):
         self.__full_name = line
-        def loader():
-            self.__name, self.__email = line.split(' <', 1)
-            self.__email = self.__email.rstrip('>')
-            self.__loader = None
-        self.__loader = loader
+        self.__name = None
+
+    def __split(self):
+        name, email = self.__full_name.split(' <', 1)
+        self.__email = email.rstrip('>')
+        self.__name = name
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Person):
@@ -70,60 +73,134 @@ class Person:
         p.breakable()
         p.text(f'{self.email!r})')
 
-RE_SPLIT = re.compile(r'^(.*?) (\d+ [-+]\d{4})$')
+_TZ_MINUTES: dict[str, int] = {}
+_TIMEZONES: dict[int, timezone] = {}
+
+
+def tz_minutes(tz: str, /) -> int:
+    '''
+    Convert a git timezone, `+HHMM` or `-HHMM`, to minutes east of UTC.
+
+    The offsets are cached for the process, as few timezones appear in
+    any history.
+    '''
+    minutes = _TZ_MINUTES.get(tz)
+    if minutes is None:
+        if len(tz) != 5 or tz[0] not in '+-' or not tz[1:].isdigit():
+            raise ValueError(f"Invalid timezone: {tz!r}")
+        minutes = int(tz[1:3]) * 60 + int(tz[3:5])
+        if tz[0] == '-':
+            minutes = -minutes
+        _TZ_MINUTES[tz] = minutes
+    return minutes
+
+
+def tzinfo(minutes: int, /) -> timezone:
+    '''
+    The `timezone` for an offset in minutes east of UTC, shared by every
+    date with that offset.
+    '''
+    tz = _TIMEZONES.get(minutes)
+    if tz is None:
+        tz = _TIMEZONES[minutes] = timezone(timedelta(minutes=minutes))
+    return tz
+
 
 class CommittedBy:
     '''
     A person and a date.
+
+    The line is split into the person, timestamp, and timezone on first
+    use; until then, `__person` holds the whole line. Comparisons and
+    sorting use the timestamp; the `datetime` is only made when `date`
+    is asked for.
     '''
-    __loader: GitLoader|None
-    __person: Person
+    __slots__ = ('__date', '__offset', '__person', '__repository', '__timestamp')
+
+    __person: Person|str
     @property
     def person(self) -> Person:
-        if self.__loader:
-            self.__loader()
-        return self.__person
-    __date: datetime|InitFn['CommittedBy', datetime]
+        person = self.__person
+        if isinstance(person, str):
+            person = self.__split(person)
+        return person
+    __timestamp: int
+    @property
+    def timestamp(self) -> int:
+        '''
+        The time, in seconds since the epoch.
+        '''
+        if isinstance(self.__person, str):
+            self.__split(self.__person)
+        return self.__timestamp
+    __offset: int
+    @property
+    def tz_offset(self) -> int:
+        '''
+        The timezone, in minutes east of UTC.
+        '''
+        if isinstance(self.__person, str):
+            self.__split(self.__person)
+        return self.__offset
+    __date: datetime|None
     @property
     def date(self) -> datetime:
-        if self.__loader:
-            self.__loader()
-        if callable(self.__date):
-            self.__date = self.__date(self)
-        return self.__date
+        date = self.__date
+        if date is None:
+            date = self.__date = datetime.fromtimestamp(self.timestamp,
+                                                        tz=tzinfo(self.__offset))
+        return date
 
+    __repository: 'ct.GitRepository'
 
     def __init__(self, line: str, *,
                  repository: 'ct.GitRepository'):
-        def loader():
-            match = RE_SPLIT.match(line)
-            if not match:
-                raise ValueError(f"Invalid CommittedBy line: {line!r}")
-            person, date = match.groups()
-            person_ = repository.context.people.get(person)
-            if person_ is None:
-                person_ = Person(person)
-                repository.context.people[person] = person_
-            self.__person = person_
-            def date_loader(self):
-                timestamp, _tz = date.split(' ')
-                tz = datetime.strptime(_tz, "%z").tzinfo
-                dt = datetime.fromtimestamp(int(timestamp), tz=tz)
-                return dt
-            self.__date = date_loader
-            self.__loader = None
-        self.__loader = loader
+        self.__person = line
+        self.__date = None
+        self.__repository = repository
+
+    def __split(self, line: str) -> Person:
+        parts = line.rsplit(' ', 2)
+        if len(parts) != 3 or not parts[1].isdigit():
+            raise ValueError(f"Invalid CommittedBy line: {line!r}")
+        person, timestamp, tz = parts
+        self.__offset = tz_minutes(tz)
+        self.__timestamp = int(timestamp)
+        people = self.__repository.context.people
+        person_ = people.person(people.intern(person))
+        self.__person = person_
+        return person_
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, CommittedBy):
             return False
-        return self.person == other.person and self.date == other.date
+        return self.person == other.person and self.timestamp == other.timestamp
 
     def __ne__(self, other: object) -> bool:
         return not self.__eq__(other)
 
+    def __lt__(self, other: object) -> bool:
+        if not isinstance(other, CommittedBy):
+            return NotImplemented
+        return self.timestamp < other.timestamp
+
+    def __le__(self, other: object) -> bool:
+        if not isinstance(other, CommittedBy):
+            return NotImplemented
+        return self.timestamp <= other.timestamp
+
+    def __gt__(self, other: object) -> bool:
+        if not isinstance(other, CommittedBy):
+            return NotImplemented
+        return self.timestamp > other.timestamp
+
+    def __ge__(self, other: object) -> bool:
+        if not isinstance(other, CommittedBy):
+            return NotImplemented
+        return self.timestamp >= other.timestamp
+
     def __hash__(self) -> int:
-        return hash((self.person, self.date))
+        return hash((self.person, self.timestamp))
 
     def __repr__(self) -> str:
         return f"CommittedBy({self.person!r}, {self.date!r})"
@@ -11,6 +11,7 @@ from xontrib.xgit.context_types import GitRepository
 from xontrib.xgit.views import JsonDescriber, JsonData
 import xontrib.xgit.object_types as ot
 import xontrib.xgit.ref_types as rt
+from xontrib.xgit.ancestry import commit_id
 
 SYMBOLIC_REFS = frozenset(('HEAD', 'MERGE_HEAD', 'ORIG_HEAD', 'FETCH_HEAD'))
 '''
@@ -22,7 +23,12 @@ They can refer to a ref (typically a branch or tag), or commit.
 class _GitRef(rt.GitRef):
     '''
     Any ref, usually a branch or tag, usually pointing to a commit.
+
+    The subclasses add no slots, as a ref's class is chosen after
+    creation, from its name.
     '''
+    __slots__ = ('__name', '__repository', '__target', '__validate', '_replaced')
+
     __name: str
     @property
     def name(self) -> str:
@@ -52,7 +58,7 @@ class _GitRef(rt.GitRef):
     refs obtained from symbolic references.
     '''
 
-    __target: 'ot.GitObject|None' = None
+    __target: 'ot.GitObject|None'
     @property
     def target(self) -> 'ot.GitObject':
         # Fetching the name will trigger validation if needed.
@@ -82,6 +88,8 @@ class _GitRef(rt.GitRef):
         '''
         self.__name = name
         self.__repository = repository
+        self.__target = None
+        self.__validate = None
         def validate():
             nonlocal name
             self.__validate = None
@@ -131,6 +139,12 @@ class _GitRef(rt.GitRef):
         else:
             validate()
 
+    def ahead_behind(self, other: 'rt.GitRef|ot.Commitish') -> tuple[int, int]:
+        repository = self.__repository
+        ancestry = repository.ancestry
+        return ancestry.ahead_behind(commit_id(self, repository=repository),
+                                     commit_id(other, repository=repository))
+
     def __repr__(self):
         return f"{self.__class__.__name__}({self.name!r}, {self.target!r})"
 
@@ -175,20 +189,28 @@ class _GitRef(rt.GitRef):
 
 
 class _Branch(rt.Branch, _GitRef):
+    __slots__ = ()
+
     def branch_name(self) -> str:
         return self.name[11:]
 
 
 class _RemoteBranch(rt.RemoteBranch, _GitRef):
+    __slots__ = ()
+
     def remote_branch_name(self) -> str:
         return self.name[13:]
 
 
 class _Tag(rt.Tag, _GitRef):
+    __slots__ = ()
+
     def tag_name(self) -> str:
         return self.name[10:]
 
 class _Replacement(rt.Replacement, _GitRef):
+    __slots__ = ()
+
     _replaced: 'ot.GitObject'
     @property
     def replaced(self) -> 'ot.GitObject':
@@ -196,7 +218,7 @@ class _Replacement(rt.Replacement, _GitRef):
         The object being replaced.
         '''
         if self._replaced is None:
-            repo = self.__repository
+            repo = self.repository
             target = ObjectId(repo.git_string('show-ref', '--hash', self.name))
             if not target:
                 raise ValueError(f"Ref not found: {self.name!r}")
@@ -211,6 +233,8 @@ class _Replacement(rt.Replacement, _GitRef):
         return ObjectId(super().name[13:])
 
 class _Note(rt.Note, _GitRef):
+    __slots__ = ('__attached_to',)
+
     __attached_to: Optional['ot.GitObject']
     @property
     def note_name(self) -> ObjectId:
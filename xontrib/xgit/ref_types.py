@@ -26,6 +26,7 @@ class GitRef(Protocol):
     """
     Any ref, usually a branch or tag, usually pointing to a commit.
     """
+    __slots__ = ()
     @property
     @abstractmethod
     def name(self) -> str: ...
@@ -36,12 +37,21 @@ class GitRef(Protocol):
     @abstractmethod
     def repository(self) -> 'ct.GitRepository': ...
 
+    @abstractmethod
+    def ahead_behind(self, other: 'GitRef|ot.Commitish') -> tuple[int, int]:
+        '''
+        The number of commits reachable from this ref but not `other`
+        (ahead), and from `other` but not this ref (behind).
+        '''
+        ...
+
 @runtime_checkable
 class Branch(GitRef, Protocol):
     """
     A branch ref. These are simply refs that live in the refs/heads namespace.
     They should always refer to a commit.
     """
+    __slots__ = ()
     @abstractmethod
     def branch_name(self) -> str:
         '''
@@ -56,6 +66,7 @@ class RemoteBranch(GitRef, Protocol):
     on a remote branch. They are updated by `git fetch` (and `git pull`, which
     does a `git fetch`), and by `git push`.
     """
+    __slots__ = ()
     @abstractmethod
     def remote_branch_name(self) -> str:
         '''
@@ -67,6 +78,7 @@ class Tag(GitRef, Protocol):
     """
     A tag ref. These are simply refs that live in the refs/tags namespace.
     """
+    __slots__ = ()
     @abstractmethod
     def tag_name(self) -> str:
         '''
@@ -80,6 +92,7 @@ class Replacement(GitRef, Protocol):
     Their name will be the hash of the object they replace, and their target
     is the replacement object
     """
+    __slots__ = ()
     @property
     @abstractmethod
     def replacement_name(self) -> ObjectId:
@@ -100,6 +113,7 @@ class Note(GitRef, Protocol):
     '''
     A note ref. These are refs that live in the refs/notes namespace.
     '''
+    __slots__ = ()
     @property
     @abstractmethod
     def note_name(self) -> str:
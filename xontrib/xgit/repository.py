@@ -5,27 +5,45 @@ Implementation of the `GitRepository` class.
 from contextlib import suppress
 from pathlib import Path, PurePosixPath
 import re
-from typing import Literal, Optional, cast, overload
-from collections.abc import Mapping, Sequence
+from typing import Literal, Optional, TYPE_CHECKING, cast, overload
+from collections.abc import Iterable, Iterator, Mapping, Sequence
 from types import MappingProxyType
 from operator import xor
 from functools import reduce
+from itertools import islice
 
 from xonsh.lib.pretty import RepresentationPrinter
 
 from xontrib.xgit.types import (
     InitFn, GitObjectType, ObjectId, GitRepositoryId,
-    TreeId, BlobId, TagId, CommitId,
+    TreeId, BlobId, TagId, CommitId, GitValueError,
+    PrefetchField,
 )
 import xontrib.xgit.ref_types as rt
 import xontrib.xgit.object_types as ot
 import xontrib.xgit.context_types as ct
 import xontrib.xgit.worktree as wtree
 import xontrib.xgit.objects as obj
+import xontrib.xgit.entries as xe
+import xontrib.xgit.entry_types as et
 from xontrib.xgit.ref import _GitRef
 from xontrib.xgit.git_cmd import _GitCmd
+from xontrib.xgit.native import _NativeObjects, object_backend
+from xontrib.xgit.commit_graph import _CommitGraph, CommitInfo, graph_usable
+from xontrib.xgit.ancestry import _Ancestry
+from xontrib.xgit.cache import _BlobCache, _ByteLRU
+from xontrib.xgit.disk_cache import (
+    QUERY_BATCH, STORED_TYPES, CachedObject, _DiskCache, cache_dir,
+)
+from xontrib.xgit.commit_parser import parse_rev_list_record
+from xontrib.xgit.text_info import FIRST_FEW_BYTES, TextInfo, classify
+from xontrib.xgit.identities import Mailmap
 from xontrib.xgit.views.json_types import JsonDescriber
-from xontrib.xgit.utils import shorten_branch, relative_to_home
+from xontrib.xgit.utils import env_number, shorten_branch, relative_to_home
+
+if TYPE_CHECKING:
+    from xontrib.xgit.object_store import _ObjectStore
+    from xontrib.xgit.commit_table import CommitTable
 
 
 DEFAULT_BRANCH=(
@@ -39,7 +57,50 @@ The intent is to identify a default branch by examining the repository and/or wo
 '''
 
 
+OBJECT_CACHE_SIZE = 4096
+'''
+The default number of recently used objects to keep in a context's object
+store, overridden by `$XGIT_OBJECT_CACHE_SIZE`.
+'''
+
+OBJECT_INFO_SIZE = 65_536
+'''
+The default number of object types and sizes found by `prefetch`, and of
+blobs classified by `text_info`, to keep for each repository, overridden
+by `$XGIT_OBJECT_INFO_SIZE`.
+'''
+
+BLOB_CACHE_MB = 64
+'''
+The default budget for the contents of blobs held in memory, in megabytes,
+overridden by `$XGIT_BLOB_CACHE_MB`.
+'''
+
+BLOB_CACHE_LIMIT_MB = 8
+'''
+The default size of the largest blob held in memory, in megabytes,
+overridden by `$XGIT_BLOB_CACHE_LIMIT_MB`.
+'''
+
+BLOB_SPILL_MB = 512
+'''
+The default budget for larger blobs kept in temporary files, in megabytes,
+overridden by `$XGIT_BLOB_SPILL_MB`. Without it, each line, reader or
+stream of a large blob would read the whole blob again.
+'''
+
+DISK_CACHE_MB = 0
+'''
+The default budget for each repository's persistent cache of object
+metadata, in megabytes, overridden by `$XGIT_DISK_CACHE_MB`. By default,
+there is none.
+'''
+
 RE_HEX = re.compile(r'^[0-9a-f]{6,}$')
+RE_FULL_HEX = re.compile(r'^(?:[0-9a-f]{40}|[0-9a-f]{64})$')
+'''
+A full SHA-1 or SHA-256 object id. These need no `git rev-parse`.
+'''
 
 class _GitRepository(_GitCmd, ct.GitRepository):
     """
@@ -152,8 +213,6 @@ class _GitRepository(_GitCmd, ct.GitRepository):
         self.__worktrees[self.path.parent] = worktree
         return cast('ct.GitWorktree', worktree)
 
-    __objects: dict[ObjectId, 'ot.GitObject']
-
 
     def get_ref(self, ref: 'rt.RefSpec|None' = None) -> 'rt.GitRef|None':
         '''
@@ -210,16 +269,15 @@ class _GitRepository(_GitCmd, ct.GitRepository):
                    type: Optional[GitObjectType]=None,
                    size: int=-1
                    ) -> 'ot.GitObject':
+        # Check for an id first: the Protocol checks are much slower.
         match hash:
-            case ot.GitObject():
-                return hash
-            case rt.GitRef():
-                hash = self.rev_parse(hash.name)
             case str(h):
                 h = h.strip()
                 if not h:
                     raise ValueError(f"Invalid hash: {h!r}")
-                if RE_HEX.match(h):
+                if RE_FULL_HEX.match(h):
+                    hash = ObjectId(h)
+                elif RE_HEX.match(h):
                     try:
                         hash = self.rev_parse(hash)
                     except ValueError:
@@ -228,20 +286,469 @@ class _GitRepository(_GitCmd, ct.GitRepository):
                     if not h.startswith('refs/'):
                         h = f'refs/heads/{hash}'
                     hash = self.rev_parse(h)
+            case ot.GitObject():
+                return hash
+            case rt.GitRef():
+                hash = self.rev_parse(hash.name)
             case _:
                 raise ValueError(f"Invalid hash: {hash!r}")
+        hash = ObjectId(hash)
+        objects = self.objects
+        found = objects.get(hash)
+        if found is not None:
+            if type is not None and found.type != type:
+                raise GitValueError(f"Expected a {type}, got a {found.type}: {hash}")
+            if size >= 0 and isinstance(found, obj._GitBlob) and found._size < 0:
+                found._size = size
+            objects.add_loader(found, self)
+            return found
+        if type is None:
+            info = self.__object_info.get(hash)
+            if info is None:
+                info = self.cat_file_check(hash)
+            type, _ = info
         match type:
             case 'commit':
-                return obj._GitCommit(hash, repository=self)
+                o = obj._GitCommit(hash, repository=self)
             case 'tree':
-                return obj._GitTree(TreeId(hash), repository=self)
+                o = obj._GitTree(TreeId(hash), repository=self)
             case 'blob':
-                return obj._GitBlob(BlobId(hash), size, repository=self)
+                if size < 0 and (info := self.__object_info.get(hash)):
+                    _, size = info
+                o = obj._GitBlob(BlobId(hash), size, repository=self)
             case 'tag':
-                return obj._GitTagObject(TagId(hash), repository=self)
-            case None:
-                type = cast(GitObjectType, self.git_string('cat-file', '-t', hash))
-        return self.get_object(hash, type, size)
+                o = obj._GitTagObject(TagId(hash), repository=self)
+            case _:
+                raise GitValueError(f"Invalid object type: {type!r}")
+        return objects.intern(hash, o, loader=self)
+
+    @property
+    def objects(self) -> '_ObjectStore':
+        '''
+        The table of objects in use, with its hit/miss statistics.
+        This is shared by all the repositories in the context, as the same
+        object id names the same content in any repository.
+        '''
+        return self.context.store
+
+    __object_info: _ByteLRU[ObjectId, tuple[GitObjectType, int]]
+    '''
+    Types and sizes of the objects most recently found by `prefetch`,
+    counted by entries, not bytes.
+    '''
+
+    def prefetch(self,
+                 objects: 'Iterable[ot.GitObject|et.GitEntry|ObjectId]',
+                 /, *,
+                 fields: Sequence[PrefetchField] = ('type', 'size'),
+                 ) -> Mapping[ObjectId, tuple[GitObjectType, int]]:
+        '''
+        Load the types and sizes of many objects at once, via a single
+        pipelined `git cat-file --batch-check` exchange.
+
+        Objects (or the objects referenced by entries) that have yet to load
+        their size get it filled in. Trees are skipped, as their size is the
+        number of entries, which requires expanding the tree. Bare ids are
+        remembered, so later `get_object` calls do not need to look up their
+        type or size.
+
+        With `'text'`, blobs are also classified as text or binary, in one
+        batch, as by `text_info`.
+
+        PARAMETERS
+        ----------
+        objects: Iterable[GitObject|GitEntry|ObjectId]
+            The objects, entries, or ids to prefetch.
+        fields: Sequence['type'|'size'|'text']
+            The fields to fill in. Default: type and size.
+
+        RETURNS
+        -------
+        Mapping[ObjectId, tuple[GitObjectType, int]]
+            The type and size of each object that was looked up.
+        '''
+        pending: dict[ObjectId, list[obj._GitObject]] = {}
+        text: list[ObjectId] = []
+        for o in objects:
+            if isinstance(o, xe._GitEntry):
+                o = o.object
+            match o:
+                case obj._GitObject():
+                    if 'text' in fields and o.type == 'blob':
+                        text.append(o.hash)
+                    if (
+                        'size' in fields
+                        and o.type != 'tree'
+                        and o._size < 0
+                    ):
+                        pending.setdefault(o.hash, []).append(o)
+                case str():
+                    hash = ObjectId(o)
+                    if hash not in self.__object_info:
+                        pending.setdefault(hash, [])
+                    if 'text' in fields:
+                        text.append(hash)
+                case _:
+                    raise GitValueError(f"Cannot prefetch: {o!r}")
+        result: dict[ObjectId, tuple[GitObjectType, int]] = {}
+        if pending:
+            for hash, type, size in self.cat_file_check_many(pending):
+                hash = ObjectId(hash)
+                result[hash] = (type, size)
+                self.__object_info.put(hash, (type, size))
+                if 'size' in fields:
+                    for o in pending[hash]:
+                        o._size = size
+        if text:
+            info = self.__object_info
+            self.text_info(h for h in text
+                           if (info.get(h) or ('blob', 0))[0] == 'blob')
+        return result
+
+    __text_info: _ByteLRU[ObjectId, TextInfo]
+    '''
+    Whether each blob most recently classified by `text_info` is binary,
+    and its encoding, counted by entries.
+    '''
+
+    def text_info(self, blobs: Iterable[ObjectId], /
+                  ) -> Mapping[ObjectId, TextInfo]:
+        '''
+        Classify many blobs as text or binary, and guess the encoding of
+        the text, from the first 8000 bytes of each.
+
+        Blobs already classified, or in the blob cache, are not read
+        again. The native backend inflates only the start of each blob,
+        unless it is stored as a delta. The rest are read in one pipelined
+        `git cat-file --batch` exchange. Blobs read in full are added to
+        the blob cache.
+
+        PARAMETERS
+        ----------
+        blobs: Iterable[ObjectId]
+            The ids of the blobs.
+
+        RETURNS
+        -------
+        Mapping[ObjectId, TextInfo]
+            Whether each blob is binary, and its encoding. Objects that
+            are not found, or are not blobs, are left out.
+        '''
+        known = self.__text_info
+        cache = self.blob_cache
+        result: dict[ObjectId, TextInfo] = {}
+        pending: list[str] = []
+        for hash in blobs:
+            info = known.get(hash)
+            if info is None and hash in cache:
+                buffer = cache.get(hash)
+                if buffer is not None:
+                    info = classify(buffer)
+                    known.put(hash, info)
+            if info is None:
+                pending.append(hash)
+            else:
+                result[hash] = info
+
+        def found(name: str, type: GitObjectType, size: int, data: bytes):
+            if type != 'blob':
+                return
+            hash = ObjectId(name)
+            if len(data) == size:
+                cache.put(hash, data)
+            result[hash] = info = classify(data)
+            known.put(hash, info)
+
+        native = self.__native_objects()
+        if native is not None and pending:
+            missing: list[str] = []
+            for name, type, size, data in native.read_prefix_many(
+                    pending, FIRST_FEW_BYTES, missing):
+                found(name, type, size, data)
+            pending = missing
+        if pending:
+            for name, type, data in super().cat_file_many(pending):
+                found(name, type, len(data), data)
+        return result
+
+    __native: '_NativeObjects|None'
+    '''
+    In-process object access, created on first use.
+    '''
+
+    def __native_objects(self) -> '_NativeObjects|None':
+        '''
+        The in-process object reader, if selected by `$XGIT_OBJECT_BACKEND`
+        and usable for this repository.
+        '''
+        if object_backend() != 'native':
+            return None
+        if self.__native is None:
+            self.__native = _NativeObjects(self.path)
+        return self.__native if self.__native.enabled else None
+
+    __disk_cache: '_DiskCache|Literal[False]|None'
+    '''
+    The persistent cache, opened on first use. `False` if there is none.
+    '''
+
+    @property
+    def disk_cache(self) -> '_DiskCache|None':
+        '''
+        The persistent cache of object types, sizes, and the contents of
+        commits, trees and tags, if `$XGIT_DISK_CACHE_MB` gives it a budget.
+        It is kept in `$XDG_CACHE_HOME/xgit/<repository id>.sqlite`.
+        '''
+        if self.__disk_cache is None:
+            budget = env_number('XGIT_DISK_CACHE_MB', DISK_CACHE_MB)
+            if budget > 0:
+                self.__disk_cache = _DiskCache(cache_dir() / f'{self.id}.sqlite',
+                                               int(budget * 1024 * 1024))
+            else:
+                self.__disk_cache = False
+        cache = self.__disk_cache
+        if cache is False or not cache.enabled:
+            return None
+        return cache
+
+    def cat_file(self, name: str, /) -> tuple[GitObjectType, bytes]:
+        disk = self.disk_cache if RE_FULL_HEX.match(name) else None
+        cached = disk.get(name) if disk is not None else None
+        if cached is not None and cached.data is not None:
+            return cached.type, cached.data
+        native = self.__native_objects()
+        found = native.read(name) if native is not None else None
+        if found is None:
+            found = super().cat_file(name)
+        type, data = found
+        if disk is not None and (cached is None or type in STORED_TYPES):
+            disk.put(name, type, len(data), data)
+        return found
+
+    def cat_file_check(self, name: str, /) -> tuple[GitObjectType, int]:
+        disk = self.disk_cache if RE_FULL_HEX.match(name) else None
+        if disk is not None and (cached := disk.get(name)) is not None:
+            return cached.type, cached.size
+        native = self.__native_objects()
+        found = native.info(name) if native is not None else None
+        if found is None:
+            found = super().cat_file_check(name)
+        if disk is not None:
+            disk.put(name, *found)
+        return found
+
+    def cat_file_many(self, names: Iterable[str], /
+                      ) -> Iterator[tuple[str, GitObjectType, bytes]]:
+        disk = self.disk_cache
+        names = iter(names)
+        # The objects come from the disk cache, the native reader, and git,
+        # so each batch is collected, then yielded in the order asked for.
+        while batch := list(islice(names, QUERY_BATCH)):
+            cached: Mapping[str, CachedObject] = {}
+            if disk is not None:
+                cached = disk.get_many(n for n in batch if RE_FULL_HEX.match(n))
+            wanted = [n for n in batch
+                      if (c := cached.get(n)) is None or c.data is None]
+            found: dict[str, tuple[GitObjectType, bytes]] = {}
+            for name, type, data in self.__cat_file_many(wanted):
+                found[name] = type, data
+                if (disk is not None and RE_FULL_HEX.match(name)
+                        and (name not in cached or type in STORED_TYPES)):
+                    disk.put(name, type, len(data), data)
+            for name in batch:
+                c = cached.get(name)
+                if c is not None and c.data is not None:
+                    yield name, c.type, c.data
+                elif name in found:
+                    yield name, *found[name]
+
+    def __cat_file_many(self, names: Iterable[str], /
+                        ) -> Iterator[tuple[str, GitObjectType, bytes]]:
+        native = self.__native_objects()
+        if native is None:
+            yield from super().cat_file_many(names)
+            return
+        missing: list[str] = []
+        yield from native.read_many(names, missing)
+        yield from super().cat_file_many(missing)
+
+    def cat_file_check_many(self, names: Iterable[str], /
+                            ) -> Iterator[tuple[str, GitObjectType, int]]:
+        disk = self.disk_cache
+        names = iter(names)
+        while batch := list(islice(names, QUERY_BATCH)):
+            cached: Mapping[str, CachedObject] = {}
+            if disk is not None:
+                cached = disk.get_many(n for n in batch if RE_FULL_HEX.match(n))
+            wanted = [n for n in batch if n not in cached]
+            found: dict[str, tuple[GitObjectType, int]] = {}
+            for name, type, size in self.__cat_file_check_many(wanted):
+                found[name] = type, size
+                if disk is not None and RE_FULL_HEX.match(name):
+                    disk.put(name, type, size)
+            for name in batch:
+                if (c := cached.get(name)) is not None:
+                    yield name, c.type, c.size
+                elif name in found:
+                    yield name, *found[name]
+
+    def __cat_file_check_many(self, names: Iterable[str], /
+                              ) -> Iterator[tuple[str, GitObjectType, int]]:
+        native = self.__native_objects()
+        if native is None:
+            yield from super().cat_file_check_many(names)
+            return
+        missing: list[str] = []
+        yield from native.info_many(names, missing)
+        yield from super().cat_file_check_many(missing)
+
+    def commits(self, revspec: str|Sequence[str] = 'HEAD', /, *,
+                limit: Optional[int] = None,
+                paths: Iterable[str|PurePosixPath] = (),
+                ) -> Iterator['ot.GitCommit']:
+        '''
+        Load many commits at once, as listed by `git rev-list`.
+
+        The commits are read from one `git rev-list --header` process as
+        it runs, and each is filled in as it is read, without reading
+        the commit object again.
+
+        PARAMETERS
+        ----------
+        revspec: str|Sequence[str]
+            The commits to list, and their ancestors, as for `git rev-list`;
+            e.g. `'main'`, `'v1.0..main'`, or `['main', '^topic']`.
+            Default: `HEAD`.
+        limit: Optional[int]
+            The most commits to list.
+        paths: Iterable[str|PurePosixPath]
+            Only list commits that change these paths.
+
+        RETURNS
+        -------
+        Iterator[GitCommit]
+            The commits, newest first.
+        '''
+        revs = [revspec] if isinstance(revspec, str) else list(revspec)
+        args = ['--header']
+        if limit is not None:
+            args.append(f'--max-count={limit}')
+        args.extend(revs)
+        args.append('--')
+        args.extend(str(p) for p in paths)
+        for record in self.git_records('rev-list', *args):
+            hash, fields = parse_rev_list_record(record)
+            commit = self.get_object(hash, 'commit')
+            if isinstance(commit, obj._GitCommit):
+                commit._set_fields(fields)
+            yield commit
+
+    def commit_table(self, revspec: str|Sequence[str] = 'HEAD', /, *,
+                     limit: Optional[int] = None,
+                     paths: Iterable[str|PurePosixPath] = (),
+                     ) -> 'CommitTable':
+        '''
+        Read the metadata of many commits into NumPy arrays, for analysis
+        of whole histories. No commit objects are created; the people are
+        shared with the context.
+
+        NumPy must be installed.
+
+        PARAMETERS
+        ----------
+        revspec: str|Sequence[str]
+            The commits to list, and their ancestors, as for `commits`.
+        limit: Optional[int]
+            The most commits to list.
+        paths: Iterable[str|PurePosixPath]
+            Only list commits that change these paths.
+
+        RETURNS
+        -------
+        CommitTable
+            One row per commit, newest first.
+        '''
+        from xontrib.xgit.commit_table import LOG_ARGS, CommitTable
+        revs = [revspec] if isinstance(revspec, str) else list(revspec)
+        args = list(LOG_ARGS)
+        if limit is not None:
+            args.append(f'--max-count={limit}')
+        args.extend(revs)
+        args.append('--')
+        args.extend(str(p) for p in paths)
+        return CommitTable(self.git_records('log', *args), self.context.people)
+
+    @property
+    def mailmap(self) -> Mailmap:
+        '''
+        The repository's committed `.mailmap`: the blob named by the
+        `mailmap.blob` setting, or `HEAD:.mailmap`. Empty if there is none.
+
+        The blob is looked up each time, so a new `.mailmap` is seen once
+        committed, but each is parsed only once per context.
+        '''
+        spec = self.git_string('config', '--get', 'mailmap.blob', check=False)
+        id = self.git_string('rev-parse', '--verify', '--quiet',
+                             spec or 'HEAD:.mailmap', check=False)
+        if not id:
+            return Mailmap()
+        blob = BlobId(ObjectId(id))
+        return self.context.people.mailmap(
+            blob, lambda: self.get_object(blob, 'blob').text)
+
+    __commit_graph: '_CommitGraph|Literal[False]|None'
+    '''
+    The commit-graph, opened on first use. `False` if unusable.
+    '''
+
+    @property
+    def commit_graph(self) -> '_CommitGraph|None':
+        '''
+        The repository's commit-graph, or `None` if it has none (or it cannot
+        be trusted, as in a shallow clone).
+        '''
+        if self.__commit_graph is None:
+            if graph_usable(self.path):
+                self.__commit_graph = _CommitGraph(self.path / 'objects')
+            else:
+                self.__commit_graph = False
+        graph = self.__commit_graph
+        if graph is False:
+            return None
+        return graph
+
+    def commit_info(self, hash: str, /) -> CommitInfo|None:
+        graph = self.commit_graph
+        if graph is None:
+            return None
+        return graph.info(hash)
+
+    __ancestry: _Ancestry|None
+    @property
+    def ancestry(self) -> _Ancestry:
+        '''
+        History walking and queries for this repository.
+        '''
+        if self.__ancestry is None:
+            self.__ancestry = _Ancestry(self)
+        return self.__ancestry
+
+    __blob_cache: _BlobCache[ObjectId]|None
+    @property
+    def blob_cache(self) -> _BlobCache[ObjectId]:
+        '''
+        The contents of recently read blobs, sized by `$XGIT_BLOB_CACHE_MB`,
+        `$XGIT_BLOB_CACHE_LIMIT_MB` and `$XGIT_BLOB_SPILL_MB`.
+        '''
+        if self.__blob_cache is None:
+            mb = 1024 * 1024
+            self.__blob_cache = _BlobCache(
+                int(env_number('XGIT_BLOB_CACHE_MB', BLOB_CACHE_MB) * mb),
+                limit=int(env_number('XGIT_BLOB_CACHE_LIMIT_MB',
+                                     BLOB_CACHE_LIMIT_MB) * mb),
+                spill=int(env_number('XGIT_BLOB_SPILL_MB', BLOB_SPILL_MB) * mb),
+            )
+        return self.__blob_cache
 
     def __init__(self, *args,
                  context: 'ct.GitContext',
@@ -280,7 +787,6 @@ class _GitRepository(_GitCmd, ct.GitRepository):
                     case ['HEAD', c]:
                         id = CommitId(ObjectId(c))
                         commit = self.get_object(id, 'commit')
-                        self.__objects[commit.hash] = commit
                     case ['branch', b]:
                         b = b.strip()
                         branch = _GitRef(b, repository=self) if b else None
@@ -323,7 +829,17 @@ class _GitRepository(_GitCmd, ct.GitRepository):
                         prunable = ''
             return result
         self.__worktrees = init_worktrees
-        self.__objects = {}
+        self.__object_info = _ByteLRU(
+            int(env_number('XGIT_OBJECT_INFO_SIZE', OBJECT_INFO_SIZE)),
+            sizeof=lambda _: 1)
+        self.__text_info = _ByteLRU(
+            int(env_number('XGIT_OBJECT_INFO_SIZE', OBJECT_INFO_SIZE)),
+            sizeof=lambda _: 1)
+        self.__native = None
+        self.__commit_graph = None
+        self.__ancestry = None
+        self.__blob_cache = None
+        self.__disk_cache = None
 
     def add_reference(self, target: ObjectId, source: 'ot.GitObject|rt.GitRef'):
         '''
@@ -410,4 +926,4 @@ class _GitRepository(_GitCmd, ct.GitRepository):
                 pref = self.worktree
                 p.text(f".preferred_worktree: {relative_to_home(pref.location)}")
                 p.break_()
-                p.text(f".objects: {len(self.__objects)}")
+                p.text(f".objects: {len(self.objects)}")
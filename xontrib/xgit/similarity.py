@@ -0,0 +1,159 @@
+'''
+Estimate how similar two blobs are, for rename and copy detection.
+
+This follows git's estimator (`diffcore-delta.c`): the contents are cut
+into chunks at each newline, or every 64 bytes within long lines, and
+each chunk is hashed. A fingerprint records how many bytes of each chunk
+hash a blob has; the similarity of two blobs is the number of bytes they
+have in common, divided by the size of the larger one.
+
+This module uses only the standard library, and its hashes do not depend
+on the process, so fingerprints and scores can be computed in worker
+processes.
+'''
+
+from collections.abc import Iterable, Sequence
+from zlib import crc32
+
+CHUNK = 64
+'''
+The longest chunk. Longer lines are cut into pieces of this size.
+'''
+
+CANDIDATES = 50
+'''
+The default for the most sources scored in full against each target.
+'''
+
+Fingerprint = dict[int, int]
+'''
+The number of bytes of each chunk hash in a blob.
+'''
+
+
+def fingerprint(data: bytes, /) -> Fingerprint:
+    '''
+    The chunk hashes of `data`, with the number of bytes of each.
+    '''
+    counts: Fingerprint = {}
+    get = counts.get
+    lines = data.split(b'\n')
+    if not lines[-1]:
+        # Nothing follows the last newline.
+        lines.pop()
+    for line in lines:
+        if len(line) < CHUNK:
+            h = crc32(line)
+            counts[h] = get(h, 0) + len(line) + 1
+            continue
+        for start in range(0, len(line), CHUNK):
+            piece = line[start:start + CHUNK]
+            h = crc32(piece)
+            counts[h] = get(h, 0) + len(piece)
+        # The newline ends the last piece.
+        counts[h] += 1
+    return counts
+
+
+def similarity(a: Fingerprint, b: Fingerprint,
+               size_a: int, size_b: int, /) -> float:
+    '''
+    The fraction of the larger blob's bytes that are also in the other,
+    from 0.0 to 1.0.
+    '''
+    if len(a) > len(b):
+        a, b = b, a
+    get = b.get
+    common = 0
+    for h, n in a.items():
+        m = get(h)
+        if m is not None:
+            common += n if n < m else m
+    return common / max(size_a, size_b, 1)
+
+
+class SimilarityIndex:
+    '''
+    An index of source blobs by chunk hash, to find the sources most
+    similar to a target without comparing it with every source.
+
+    Chunks found in more than `candidates` sources, such as blank lines
+    or common boilerplate, do not nominate sources, but still count in
+    the scores of the sources that are nominated.
+    '''
+    __slots__ = ('__candidates', '__index', '__sources')
+
+    def __init__(self, sources: Iterable[bytes], /, *,
+                 candidates: int = CANDIDATES):
+        '''
+        PARAMETERS
+        ----------
+        sources: Iterable[bytes]
+            The contents of the sources, which are identified by position.
+        candidates: int
+            The most sources to score for each target.
+        '''
+        self.__candidates = candidates
+        self.__sources = [(fingerprint(data), len(data)) for data in sources]
+        index: dict[int, list[tuple[int, int]]] = {}
+        for s, (fp, _) in enumerate(self.__sources):
+            for h, n in fp.items():
+                index.setdefault(h, []).append((s, n))
+        self.__index = {h: p for h, p in index.items() if len(p) <= candidates}
+
+    def matches(self, data: bytes, threshold: float, /
+                ) -> list[tuple[float, int]]:
+        '''
+        The `(score, source)` of the sources at least `threshold` similar
+        to `data`.
+        '''
+        fp = fingerprint(data)
+        size = len(data)
+        nominated: dict[int, int] = {}
+        get = nominated.get
+        index = self.__index
+        for h, n in fp.items():
+            for s, m in index.get(h, ()):
+                nominated[s] = get(s, 0) + (n if n < m else m)
+        if len(nominated) > self.__candidates:
+            best = sorted(nominated, key=nominated.__getitem__, reverse=True)
+            nominated = dict.fromkeys(best[:self.__candidates], 0)
+        found: list[tuple[float, int]] = []
+        sources = self.__sources
+        for s in nominated:
+            sfp, ssize = sources[s]
+            if min(size, ssize) < threshold * max(size, ssize):
+                continue
+            score = similarity(sfp, fp, ssize, size)
+            if score >= threshold:
+                found.append((score, s))
+        return found
+
+
+_worker_index: SimilarityIndex|None = None
+_worker_targets: Sequence[bytes] = ()
+
+
+def init_worker(index: SimilarityIndex, targets: Sequence[bytes], /):
+    '''
+    Install the index of the sources, and the targets, in a worker process,
+    for `match_many`. Where processes are forked, neither is copied.
+    '''
+    global _worker_index, _worker_targets
+    _worker_index = index
+    _worker_targets = targets
+
+
+def match_many(start: int, stop: int, threshold: float, /
+               ) -> list[tuple[float, int, int]]:
+    '''
+    In a worker process, the `(score, target, source)` of the matches for
+    the targets from `start` to `stop`.
+    '''
+    index = _worker_index
+    assert index is not None, 'init_worker was not called'
+    return [
+        (score, t, s)
+        for t in range(start, stop)
+        for score, s in index.matches(_worker_targets[t], threshold)
+    ]
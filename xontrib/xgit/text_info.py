@@ -0,0 +1,82 @@
+'''
+Tell text from binary, and guess the encoding of text, from the start of
+a blob.
+
+Only the first 8000 bytes are looked at, so a blob can be classified
+without reading it all:
+
+* A byte-order mark names the encoding, and makes the blob text, even
+  UTF-16 or UTF-32 text full of NUL bytes.
+* Otherwise, as git decides, a blob with a NUL byte is binary.
+* Other text is UTF-8 if it decodes as such, and Latin-1 (which decodes
+  anything) if not.
+'''
+
+import codecs
+from typing import NamedTuple
+
+FIRST_FEW_BYTES = 8000
+'''
+How many bytes at the start of a blob are checked for NUL bytes.
+'''
+
+BOMS: tuple[tuple[bytes, str], ...] = (
+    # UTF-32-LE must be tried before UTF-16-LE, which its mark begins with.
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+'''
+Byte-order marks, and the codec that decodes text beginning with each,
+dropping the mark.
+'''
+
+
+class TextInfo(NamedTuple):
+    '''
+    Whether a blob is binary, and if not, how to decode it.
+    '''
+    binary: bool
+    encoding: str|None
+    '''
+    The codec to decode the text with, or `None` if binary.
+    '''
+
+
+BINARY = TextInfo(True, None)
+'''
+The classification of every binary blob.
+'''
+
+
+def is_binary(data: 'bytes|memoryview', /) -> bool:
+    '''
+    Whether git would treat `data` as binary: if it has a NUL byte in
+    the first 8000 bytes.
+    '''
+    if isinstance(data, memoryview):
+        data = data[:FIRST_FEW_BYTES].tobytes()
+    return data.find(b'\0', 0, FIRST_FEW_BYTES) >= 0
+
+
+def classify(data: 'bytes|memoryview', /) -> TextInfo:
+    '''
+    Classify a blob from its contents, or at least their first 8000 bytes.
+
+    A multibyte character cut off at the end of the first 8000 bytes
+    still counts as UTF-8.
+    '''
+    prefix = bytes(data[:FIRST_FEW_BYTES])
+    for bom, encoding in BOMS:
+        if prefix.startswith(bom):
+            return TextInfo(False, encoding)
+    if is_binary(prefix):
+        return BINARY
+    try:
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        decoder.decode(prefix, final=len(prefix) < FIRST_FEW_BYTES)
+    except UnicodeDecodeError:
+        return TextInfo(False, 'latin-1')
+    return TextInfo(False, 'utf-8')
@@ -0,0 +1,126 @@
+'''
+Decoding of raw git tree objects.
+
+A tree is a sequence of entries, sorted by name, each:
+
+    <octal mode> SP <name> NUL <binary object id>
+
+The object id is 20 bytes (SHA-1) or 32 bytes (SHA-256). Names may contain
+spaces or any byte other than NUL and `/`, so the raw form is the only
+one that can be split without quoting rules.
+'''
+
+from collections.abc import Iterator
+from typing import NamedTuple
+
+from xontrib.xgit.types import (
+    GitEntryMode, GitObjectType, GitValueError, ObjectId,
+)
+
+TREE_MODES: dict[bytes, tuple[GitEntryMode, GitObjectType]] = {
+    b'40000': ('040000', 'tree'),
+    b'100644': ('100644', 'blob'),
+    b'100755': ('100755', 'blob'),
+    b'120000': ('120000', 'blob'),  # type: ignore[dict-item]
+    b'160000': ('160000', 'commit'),
+}
+'''
+The modes found in trees, with the (shared) mode and type strings
+used for their entries.
+'''
+
+S_IFMT = 0o170000
+S_IFDIR = 0o040000
+S_IFGITLINK = 0o160000
+
+
+def _mode(raw: bytes) -> tuple[GitEntryMode, GitObjectType]:
+    '''
+    The mode and type for a mode not in `TREE_MODES`, such as the
+    group-writable `100664` written by some old versions of git.
+    '''
+    try:
+        bits = int(raw, 8)
+    except ValueError:
+        raise GitValueError(f'Invalid tree entry mode: {raw!r}') from None
+    kind = bits & S_IFMT
+    type: GitObjectType = (
+        'tree' if kind == S_IFDIR
+        else 'commit' if kind == S_IFGITLINK
+        else 'blob'
+    )
+    return TREE_MODES.setdefault(raw, (f'{bits:06o}', type))  # type: ignore[arg-type]
+
+
+class TreeEntries(NamedTuple):
+    '''
+    The entries of a tree, as parallel lists. This is much smaller than
+    an entry object per child, for trees with many entries.
+    '''
+    names: list[str]
+    kinds: list[tuple[GitEntryMode, GitObjectType]]
+    '''
+    The mode and type of each entry, shared from `TREE_MODES`.
+    '''
+    ids: bytes
+    '''
+    The binary object ids, concatenated.
+    '''
+    hash_size: int
+
+    def id(self, i: int, /) -> ObjectId:
+        '''
+        The object id of entry `i`.
+        '''
+        hs = self.hash_size
+        return ObjectId(self.ids[i * hs:(i + 1) * hs].hex())
+
+
+def unpack_tree(data: bytes, /, *, hash_size: int = 20) -> TreeEntries:
+    '''
+    Decode the entries of a raw tree object into parallel lists.
+
+    PARAMETERS
+    ----------
+    data: bytes
+        The contents of the tree, as from `git cat-file tree <id>`.
+    hash_size: int
+        The size of a binary object id: 20 for SHA-1, 32 for SHA-256.
+
+    Names that are not valid UTF-8 are decoded with `surrogateescape`,
+    as Python does for file names.
+    '''
+    modes = TREE_MODES
+    names: list[str] = []
+    kinds: list[tuple[GitEntryMode, GitObjectType]] = []
+    ids = bytearray()
+    end = len(data)
+    pos = 0
+    while pos < end:
+        space = data.find(b' ', pos)
+        nul = data.find(b'\0', space + 1)
+        if space < 0 or nul < 0 or nul + 1 + hash_size > end:
+            raise GitValueError(f'Truncated tree entry at offset {pos}')
+        raw = data[pos:space]
+        kinds.append(modes.get(raw) or _mode(raw))
+        names.append(data[space + 1:nul].decode('utf-8', 'surrogateescape'))
+        pos = nul + 1 + hash_size
+        ids += data[nul + 1:pos]
+    return TreeEntries(names, kinds, bytes(ids), hash_size)
+
+
+def parse_tree(data: bytes, /, *,
+               hash_size: int = 20,
+               ) -> Iterator[tuple[GitEntryMode, GitObjectType, ObjectId, str]]:
+    '''
+    Decode the entries of a raw tree object.
+
+    RETURNS
+    -------
+    An iterator of `(mode, type, hash, name)` for each entry.
+    See `unpack_tree`.
+    '''
+    entries = unpack_tree(data, hash_size=hash_size)
+    listing = zip(entries.names, entries.kinds, strict=True)
+    for i, (name, (mode, type)) in enumerate(listing):
+        yield mode, type, entries.id(i), name
@@ -161,3 +161,26 @@ def list_of[E](e: E) -> type[list[E]]:
 
 
 type DirectoryKind = Literal['repository', 'worktree', 'directory']
+
+type PrefetchField = Literal['type', 'size', 'text']
+'''
+Object metadata that can be loaded in bulk by `GitRepository.prefetch`.
+'''
+
+type WalkOrder = Literal['date', 'topo']
+'''
+The order in which `GitCommit.ancestors` visits commits:
+- `date`: newest commit time first, like `git log`.
+- `topo`: no parent before all its children, like `git log --topo-order`.
+'''
+
+type DiffStatus = Literal['A', 'D', 'M', 'T', 'R', 'C']
+'''
+The kind of change to a path found by `diff_trees`, as in `git diff`:
+- `A`: added.
+- `D`: deleted.
+- `M`: modified: new contents or mode.
+- `T`: type changed, between a file, a symbolic link and a submodule.
+- `R`: renamed, possibly with changes.
+- `C`: copied, possibly with changes.
+'''
@@ -43,3 +43,9 @@ HeadingStrategy = Literal['none', 'name', 'heading', 'heading-or-name']
 ColumnKeys = list[str|int]|list[str]|list[int]
 
 DirectoryKind = Literal['repository', 'worktree', 'directory']
+
+PrefetchField = Literal['type', 'size', 'text']
+
+WalkOrder = Literal['date', 'topo']
+
+DiffStatus = Literal['A', 'D', 'M', 'T', 'R', 'C']
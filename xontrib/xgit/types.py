@@ -31,6 +31,9 @@ try:
         HeadingStrategy, ColumnKeys,
         list_of,  # noqa: F401
         DirectoryKind,
+        PrefetchField,
+        WalkOrder,
+        DiffStatus,
     )
 except SyntaxError:
     from xontrib.xgit.type_aliases_310 import (
@@ -50,6 +53,9 @@ except SyntaxError:
         KeywordInputSpec, KeywordInputSpecs,  # noqa: F401
         HeadingStrategy, ColumnKeys,  # noqa: F401
         DirectoryKind,  # noqa: TC001
+        PrefetchField,  # noqa: F401
+        WalkOrder,  # noqa: F401
+        DiffStatus,  # noqa: F401
         )
 
 if 'list_of' not in globals():
@@ -157,6 +163,21 @@ class GitValueError(GitError, ValueError):
     '''
     def __init__(self, message: str, /):
         super().__init__(message)
+
+
+class ObjectNotFoundError(GitValueError):
+    '''
+    Thrown when an object is not found in the object database,
+    or an abbreviated hash is ambiguous.
+    '''
+    name: str
+    reason: str
+    def __init__(self, name: str, reason: str='missing'):
+        super().__init__(f'Git object {reason}: {name}')
+        self.name = name
+        self.reason = reason
+
+
 class  GitDirNotFoundError(GitError):
     '''
     Thrown when a git directory is not found.
@@ -2,7 +2,8 @@
 Miscellaneous utility functions.
 '''
 
-from typing import MutableMapping, TypeVar
+from contextlib import suppress
+from typing import Any, MutableMapping, TypeVar
 from collections.abc import Iterable
 from pathlib import Path
 import sys
@@ -80,6 +81,60 @@ def print_if(var: str, XSH: XonshSession):
     return _print
 
 
+def env_number(var: str, default: float) -> float:
+    '''
+    Get a numeric setting from the xonsh environment.
+
+    Unset, empty, or unparseable values give the `default`.
+
+    PARAMETERS
+    ----------
+    var: str
+        The name of the environment variable.
+    default: float
+        The value to use if the variable is not set to a number.
+    '''
+    from xonsh.built_ins import XSH
+    env = XSH.env
+    if not isinstance(env, MutableMapping):
+        return default
+    value = env.get(var, None)
+    if value is None or value == '':
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def instance_vars(x: object) -> dict[str, Any]:
+    '''
+    Like `vars(x)`, but also includes the attributes stored in `__slots__`,
+    under their (mangled) attribute names. Unset slots are left out.
+
+    Raises `TypeError` if the object has neither a `__dict__` nor slots.
+    '''
+    result: dict[str, Any] = {}
+    slotted = False
+    for cls in type(x).__mro__:
+        slots = cls.__dict__.get('__slots__', ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        for name in slots:
+            if name in ('__dict__', '__weakref__'):
+                continue
+            slotted = True
+            if name.startswith('__') and not name.endswith('__'):
+                name = f'_{cls.__name__.lstrip("_")}{name}'
+            with suppress(AttributeError):
+                result[name] = getattr(x, name)
+    if hasattr(x, '__dict__'):
+        result.update(vars(x))
+    elif not slotted:
+        raise TypeError(f'{type(x).__name__} object has no attributes')
+    return result
+
+
 def shorten_branch(branch):
     '''
     Shorten a branch name for display.
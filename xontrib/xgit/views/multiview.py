@@ -56,6 +56,7 @@ from typing import (
 from xonsh.lib.pretty import RepresentationPrinter
 
 from xontrib.xgit.types import _NO_VALUE, _NoValue
+from xontrib.xgit.utils import instance_vars
 from xontrib.xgit.views.view import (
     View, T, Txv, K, Kcv, Kxv, X, Xcv, Xxv, Rxv, Rcv
 )
@@ -149,7 +150,7 @@ def default_extractor(x: T) -> Iterable[tuple[int|str, T]]:
                 s = k.split('__', maxsplit=1)
                 return s[-1].strip('_')
             return k.rstrip('_')
-        return {shorten(k,v):v for k,v in vars(x).items()}.items()
+        return {shorten(k,v):v for k,v in instance_vars(x).items()}.items()
     with suppress(Exception):
         return enumerate(iter(cast(Iterable[T], x)))
     return [(0, x)]
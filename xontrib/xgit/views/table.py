@@ -8,6 +8,7 @@ from typing import (
     cast
 )
 from collections.abc import Iterable
+from contextlib import suppress
 from itertools import count
 
 from xonsh.lib.pretty import RepresentationPrinter
@@ -113,6 +114,7 @@ class TableView(MultiView[T,K,X,Rcv]):
         be removed from the order. If the order is not set, it will be
         set to the keys of the columns.
         '''
+        self.__prefetch()
         self.__collect_columns(self._target_value)
         return self.__columns
 
@@ -209,6 +211,26 @@ class TableView(MultiView[T,K,X,Rcv]):
         self._cell_separator = cell_separator
         self._show_row_id = show_row_id
 
+    __prefetched: Any = _NO_VALUE
+    '''
+    The target last prefetched, so each target is prefetched only once.
+    '''
+
+    def __prefetch(self):
+        '''
+        Give the target a chance to load per-row data in bulk before the
+        columns are first collected. For example, `GitTree.prefetch` loads
+        the sizes of all the entries in one batch.
+        '''
+        with suppress(ValueError):
+            target = self._target
+            if target is self.__prefetched:
+                return
+            self.__prefetched = target
+            prefetch = getattr(target, 'prefetch', None)
+            if callable(prefetch):
+                prefetch()
+
     def __identify_columns(self, row: Any):
         '''
         Identify the columns in the table.
@@ -11,6 +11,7 @@ from collections.abc import Iterable, Mapping, Sequence
 from types import GenericAlias
 
 from xontrib.xgit.context_types import GitRepository
+from xontrib.xgit.utils import instance_vars
 from xontrib.xgit.views.json_types import (
    JsonData,
    SequenceJson, MappingJson, InstanceJson, TypeJson, MaxDepthJson,
@@ -150,7 +151,7 @@ class _JsonDescriber(JsonDescriber):
         """
         keys = []
         with suppress(TypeError):
-            keys = vars(x)
+            keys = instance_vars(x)
         return ((k, self._attr(x,k)) for k  in keys if self.valid_key(k))
 
     def _instance(self, x: Any, handler: JsonHandler[JsonKV]) -> JsonReturn: